@@ -1,10 +1,11 @@
 from typing import Literal, Union, List
 
 from langchain_core.messages import RemoveMessage
+from langchain_core.runnables import RunnableConfig
 
 from utils.datamodels import State
 from utils.llms import agent
-from ads4gpts_langchain import get_ads4gpts_agent
+from ads4gpts_langchain import Ads4gptsAdNode
 
 import os
 
@@ -22,25 +23,19 @@ async def agent_node(state: State):
     }
 
 
-async def ad_node(state: State):
-    ad_agent = get_ads4gpts_agent(ADS4GPTS_API_KEY)
-    agent_response = await ad_agent.ainvoke(
-        {
-            "messages": state["messages"],
-            # Here you can pass only the last x messages as state["messages"][x:-1] to save on tokens. This is just an example.
-            # But the more relevant context you provide, the better the ad fit and therefore the better the CTR which
-            # will increase your ad revenue.
-            "ad_prompt": "Get a single Ad based on the context provided in the messages.",
-            # We could leave that empty if we want to get a single ad, but we can also pass a number to
-            # get multiple ads.
-        }
-    )
-    return {"messages": [agent_response], "ad_counter": 0}
+# Builds the ad request straight from the latest messages and calls the Ads4GPTs API,
+# without an extra LLM call to fill in the tool arguments. Pass `extractors` to change
+# how context, ad_recommendation and user_persona are derived from the messages.
+fetch_ad = Ads4gptsAdNode(ads4gpts_api_key=ADS4GPTS_API_KEY)
+
+
+async def ad_node(state: State, config: RunnableConfig):
+    return await fetch_ad(state, config)
 
 
 def clean_up_ad_node(state: State):
     delete_messages = [
-        RemoveMessage(id=message.id) for message in state["messages"][-2:]
+        RemoveMessage(id=message.id) for message in state["messages"][-1:]
     ]
     return {"messages": delete_messages}
 
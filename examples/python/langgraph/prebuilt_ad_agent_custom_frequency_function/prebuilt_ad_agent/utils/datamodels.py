@@ -5,5 +5,3 @@ from langgraph.graph.message import add_messages
 
 class State(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
-    ad_counter: int = 0
-    ad_frequency: int = 1
@@ -1,11 +1,12 @@
 from typing import Literal, Union, List
 
 from langchain_core.messages import RemoveMessage
+from langchain_core.runnables import RunnableConfig
 
 from utils.datamodels import State
 from utils.llms import agent
-from utils.utils import next_fibonacci_number
-from ads4gpts_langchain import get_ads4gpts_agent
+from ads4gpts_langchain import Ads4gptsAdNode
+from ads4gpts_langchain.frequency import FibonacciBackoff, FrequencyEngine
 
 import os
 
@@ -15,48 +16,34 @@ ADS4GPTS_API_KEY = os.environ.get("ADS4GPTS_API_KEY", "default_key")
 
 async def agent_node(state: State):
     agent_response = await agent.ainvoke({"messages": state["messages"]})
-    ad_counter = state.get("ad_counter", 0)
-    return {
-        "messages": [agent_response],
-        "ad_counter": ad_counter + 1,
-    }
-
-
-async def ad_node(state: State):
-    ad_agent = get_ads4gpts_agent(ADS4GPTS_API_KEY)
-    agent_response = await ad_agent.ainvoke(
-        {
-            "messages": state["messages"],
-            # Here you can pass only the last x messages as state["messages"][x:-1] to save on tokens. This is just an example.
-            # But the more relevant context you provide, the better the ad fit and therefore the better the CTR which
-            # will increase your ad revenue.
-            "ad_prompt": "Get a single Ad based on the context provided in the messages.",
-            # We could leave that empty if we want to get a single ad, but we can also pass a number to
-            # get multiple ads.
-        }
-    )
-    # Here we update the ad frequency using a custom function of fibonacci numbers
-    # the more the user interacts with the ad, the less frequently the ad will be shown
-    # giving to power users a better experience.
-    new_ad_frequency = next_fibonacci_number(state["ad_frequency"])
-    return {
-        "messages": [agent_response],
-        "ad_counter": 0,
-        "ad_frequency": new_ad_frequency,
-    }
+    return {"messages": [agent_response]}
+
+
+# Builds the ad request straight from the latest messages and calls the Ads4GPTs API,
+# without an extra LLM call to fill in the tool arguments. Pass `extractors` to change
+# how context, ad_recommendation and user_persona are derived from the messages.
+ad_node = Ads4gptsAdNode(ads4gpts_api_key=ADS4GPTS_API_KEY, counter_key=None)
+
+# Here we space the ads by fibonacci numbers of turns (1, 2, 3, 5, 8, ...):
+# the more the user interacts with the agent, the less frequently the ad will be shown
+# giving to power users a better experience. The engine keeps the count per user
+# (the user_id or thread_id of the run config); pass store=SQLiteFrequencyStore(path)
+# to share it across sessions and processes, and add e.g. DailyCap(5) to the policies.
+frequency = FrequencyEngine([FibonacciBackoff()])
 
 
 def clean_up_ad_node(state: State):
     delete_messages = [
-        RemoveMessage(id=message.id) for message in state["messages"][-2:]
+        RemoveMessage(id=message.id) for message in state["messages"][-1:]
     ]
     return {"messages": delete_messages}
 
 
 def agent_edge(
     state: State,
+    config: RunnableConfig,
 ) -> Literal["ad_node", "__end__"]:
-    if state["ad_counter"] < state.get("ad_frequency", 1):
-        return "__end__"
-    else:
+    if frequency.should_show_ad(state, config):
         return "ad_node"
+    else:
+        return "__end__"
@@ -18,6 +18,7 @@ from ads4gpts_langchain import Ads4gptsInlineSponsoredResponseTool, Ads4gptsSugg
 
 """
 
+import importlib
 import logging
 
 # Configure package-level logging
@@ -33,15 +34,29 @@ if not logger.handlers:
     handler.setFormatter(formatter)
     logger.addHandler(handler)
 
-# Import public classes and functions
-from .tools import Ads4gptsInlineSponsoredResponseTool, Ads4gptsSuggestedPromptTool
-from .toolkit import Ads4gptsToolkit
-from .utils import get_from_dict_or_env
+# Public API, imported on first attribute access so that importing the package
+# does not pull in LangChain, LangGraph or an HTTP stack.
+_LAZY_IMPORTS = {
+    "Ads4gptsAdNode": ".ad_node",
+    "Ads4gptsInlineSponsoredResponseTool": ".tools",
+    "Ads4gptsSuggestedPromptTool": ".tools",
+    "Ads4gptsToolkit": ".toolkit",
+    "get_from_dict_or_env": ".utils",
+    "load_env": ".utils",
+}
 
 # Define __all__ for explicit export
-__all__ = [
-    "Ads4gptsInlineSponsoredResponseTool",
-    "Ads4gptsSuggestedPromptTool",
-    "Ads4gptsToolkit",
-    "get_from_dict_or_env",
-]
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
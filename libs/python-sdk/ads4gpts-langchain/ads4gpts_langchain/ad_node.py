@@ -0,0 +1,178 @@
+import json
+import logging
+import re
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from ads4gpts_langchain.tools import AdFormat, Ads4gptsAdTool, Ads4gptsBaseTool
+
+logger = logging.getLogger(__name__)
+
+Extractor = Callable[[Sequence[BaseMessage]], str]
+
+_WORD = re.compile(r"[a-z][a-z0-9+'-]{2,}")
+STOPWORDS = frozenset("""
+    about above after again against all also and any are aren't because been before
+    being below between both but can can't cannot could couldn't did didn't does doesn't
+    doing don't down during each few for from further had hadn't has hasn't have haven't
+    having her here hers herself him himself his how i'd i'll i'm i've into isn't it's
+    its itself just let's like more most much must my myself need nor not now off once
+    only other ought our ours ourselves out over own please same she she'd she'll she's
+    should shouldn't some such than that that's the their theirs them themselves then
+    there there's these they they'd they'll they're they've thing things think this
+    those through too under until use using very want was wasn't we'd we'll we're we've
+    well were weren't what what's when when's where where's which while who who's whom
+    why why's will with won't would wouldn't yes you you'd you'll you're you've your
+    yours yourself yourselves get got know make tell help thanks thank okay sure really
+    """.split())
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in content
+    )
+
+
+def keywords(
+    messages: Iterable[BaseMessage], top_k: int = 8, decay: float = 0.7
+) -> List[str]:
+    """Most frequent non-stopword terms, with later messages weighted higher."""
+    scores: Counter = Counter()
+    weight = 1.0
+    for message in reversed(list(messages)):
+        for word in _WORD.findall(_text(message).lower()):
+            if word not in STOPWORDS:
+                scores[word] += weight
+        weight *= decay
+    return [word for word, _ in scores.most_common(top_k)]
+
+
+def recent_context(messages: Sequence[BaseMessage], max_chars: int = 1500) -> str:
+    """The latest messages as ``role: text`` lines, trimmed to ``max_chars``."""
+    lines = [f"{message.type}: {_text(message)}" for message in messages]
+    return "\n".join(lines)[-max_chars:]
+
+
+def ad_recommendation_from_messages(messages: Sequence[BaseMessage]) -> str:
+    """Keywords of the latest user messages, which carry the current intent."""
+    terms = keywords(
+        (message for message in messages if isinstance(message, HumanMessage)),
+        top_k=6,
+    )
+    return ", ".join(terms) if terms else "UNDISCLOSED"
+
+
+def user_persona_from_messages(messages: Sequence[BaseMessage]) -> str:
+    """Interests mentioned by the user across the conversation."""
+    terms = keywords(
+        (message for message in messages if isinstance(message, HumanMessage)),
+        top_k=8,
+        decay=0.95,
+    )
+    return f"Interested in {', '.join(terms)}" if terms else "UNDISCLOSED"
+
+
+DEFAULT_EXTRACTORS: Dict[str, Extractor] = {
+    "context": recent_context,
+    "ad_recommendation": ad_recommendation_from_messages,
+    "user_persona": user_persona_from_messages,
+}
+
+
+class Ads4gptsAdNode:
+    """
+    Prebuilt async LangGraph node fetching an ad without an LLM hop.
+
+    The ad request fields are derived deterministically from the graph's
+    messages (``context`` from the latest ``window`` messages, and
+    ``ad_recommendation`` and ``user_persona`` from keywords of the user's
+    messages) and sent straight to the ads API, instead of asking an LLM to fill
+    in the tool call. The node appends the ads as an ``AIMessage``, rendered by
+    the tool's ``renderer`` when it handles the format and as JSON otherwise, and
+    resets the ad counter.
+
+    Args:
+        ads4gpts_api_key (Optional[str]): API key; read from ADS4GPTS_API_KEY when omitted.
+        ad_format (AdFormat): Ad format to request.
+        extractors (Optional[Dict[str, Extractor]]): ``messages -> str`` per request field,
+            merged over the defaults.
+        fields (Optional[Dict[str, Any]]): Static request fields, e.g. ``num_ads`` or ``undesired_ads``.
+        state_fields (Optional[Dict[str, str]]): Request fields read from graph state keys,
+            e.g. ``{"user_gender": "gender"}``.
+        window (int): Number of latest messages the extractors see.
+        tool (Optional[Ads4gptsBaseTool]): Configured tool to fetch through, e.g. one
+            sharing the toolkit's cache or rate limiter. Defaults to ``Ads4gptsAdTool``.
+        messages_key (str): State key holding the messages.
+        counter_key (Optional[str]): State key of the ad counter to reset, if any.
+    """
+
+    def __init__(
+        self,
+        ads4gpts_api_key: Optional[str] = None,
+        ad_format: AdFormat = AdFormat.INLINE_SPONSORED_RESPONSE,
+        extractors: Optional[Dict[str, Extractor]] = None,
+        fields: Optional[Dict[str, Any]] = None,
+        state_fields: Optional[Dict[str, str]] = None,
+        window: int = 6,
+        tool: Optional[Ads4gptsBaseTool] = None,
+        messages_key: str = "messages",
+        counter_key: Optional[str] = "ad_counter",
+    ):
+        self.ad_format = AdFormat(ad_format)
+        self.extractors = {**DEFAULT_EXTRACTORS, **(extractors or {})}
+        self.fields = {"undesired_ads": "UNDISCLOSED", **(fields or {})}
+        self.state_fields = state_fields or {}
+        self.window = window
+        self.tool = tool or Ads4gptsAdTool(ads4gpts_api_key=ads4gpts_api_key)
+        self.messages_key = messages_key
+        self.counter_key = counter_key
+
+    def build_request(
+        self, state: Dict[str, Any], config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Any]:
+        """Tool arguments for the ad request of ``state``."""
+        messages = list(state.get(self.messages_key) or [])[-self.window :]
+        request = {
+            "tid": str(uuid.uuid4()),
+            "ad_format": self.ad_format,
+            "tool_call_id": f"ads4gpts_{uuid.uuid4().hex}",
+        }
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        if thread_id is not None:
+            request["session_id"] = str(thread_id)
+        for field, extract in self.extractors.items():
+            request[field] = extract(messages)
+        request.update(self.fields)
+        for field, key in self.state_fields.items():
+            if state.get(key) is not None:
+                request[field] = state[key]
+        return request
+
+    async def __call__(
+        self, state: Dict[str, Any], config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Any]:
+        try:
+            # The raw ads, not the tool's ``Command`` to a render agent or ``END``.
+            ads, _ = await self.tool._aget_ads(self.build_request(state, config))
+        except Exception as err:
+            logger.error(f"An error occurred in the ad node: {err}")
+            ads = {"error": str(err)}
+        renderer = self.tool.renderer
+        if renderer is not None and renderer.handles(self.ad_format):
+            content = renderer.render(ads, self.ad_format)
+        else:
+            content = json.dumps(ads, default=str)
+        update: Dict[str, Any] = {
+            self.messages_key: [AIMessage(content=content, name=self.tool.name)]
+        }
+        if self.counter_key:
+            update[self.counter_key] = 0
+        return update
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from ads4gpts_langchain.ratelimit import RateLimiter
+from ads4gpts_langchain.transport import AsyncTransport
+from ads4gpts_langchain.utils import (
+    DEADLINE_EXCEEDED,
+    Deadline,
+    _async_post_with_retries,
+    _parse_ads_response,
+    async_get_ads,
+    no_ad_result,
+    retryable_error,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_batch_response(response_json: Dict[str, Any]) -> Dict:
+    """Index the per-request responses of a batch by their request id."""
+    responses = response_json.get("responses")
+    if not isinstance(responses, list):
+        return {"error": "Unexpected batch response format"}
+    return {"responses": {str(item.get("id")): item for item in responses}}
+
+
+class AdRequestBatcher:
+    """
+    Coalesces concurrent asynchronous ad requests into batched upstream calls.
+
+    Requests arriving within ``max_wait_ms`` of each other (or until
+    ``max_batch_size`` requests are waiting) are grouped and sent together.
+    Each waiting caller receives the result of its own request. The wait takes
+    at most half of a caller's remaining ``deadline``; the batch is flushed
+    early for it.
+
+    Args:
+        max_batch_size (int): Maximum number of requests sent in one batch.
+        max_wait_ms (float): How long the first request of a batch waits for others.
+        batch_endpoint (Optional[str]): Batch endpoint, relative to the ads endpoint URL.
+            The batch is posted as ``{"requests": [{"id", "payload"}, ...]}`` and answered
+            with ``{"responses": [{"id", "payload"}, ...]}``. If None, there is nothing
+            to coalesce into and every request is sent right away on its own.
+        num_retries (int): Attempts per upstream call.
+        backoff_factor (float): Backoff factor between attempts.
+        timeout (float): Timeout of each upstream call in seconds.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        batch_endpoint: Optional[str] = None,
+        num_retries: int = 3,
+        backoff_factor: float = 0.2,
+        timeout: float = 10.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batch_endpoint = batch_endpoint
+        self.num_retries = num_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self._pending: Dict[Tuple, List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self._deadlines: Dict[Tuple, List[Optional[Deadline]]] = {}
+        self._timers: Dict[Tuple, asyncio.TimerHandle] = {}
+        self._tasks = set()
+
+    async def submit(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        transport: Optional[AsyncTransport] = None,
+        deadline: Optional[Deadline] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> Dict:
+        """Queue a single ad request and wait for its result."""
+        if self.batch_endpoint is None:
+            return await async_get_ads(
+                url=url,
+                headers=headers,
+                payload=payload,
+                num_retries=self.num_retries,
+                backoff_factor=self.backoff_factor,
+                timeout=self.timeout,
+                transport=transport,
+                deadline=deadline,
+                rate_limiter=rate_limiter,
+            )
+        if deadline is not None and deadline.expired:
+            return no_ad_result(DEADLINE_EXCEEDED)
+        loop = asyncio.get_running_loop()
+        key = (loop, url, tuple(sorted(headers.items())), transport)
+        future = loop.create_future()
+        group = self._pending.setdefault(key, [])
+        group.append((payload, future))
+        self._deadlines.setdefault(key, []).append(deadline)
+        if len(group) >= self.max_batch_size:
+            self._flush(key)
+        else:
+            wait = self.max_wait_ms / 1000
+            if deadline is not None:
+                # Leave at least half of the caller's budget for the call itself.
+                wait = min(wait, deadline.remaining() / 2)
+            flush_at = loop.time() + wait
+            timer = self._timers.get(key)
+            if timer is None or flush_at < timer.when():
+                if timer is not None:
+                    timer.cancel()
+                self._timers[key] = loop.call_at(flush_at, self._flush, key)
+        if deadline is None:
+            return await future
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future), max(deadline.remaining(), 0)
+            )
+        except asyncio.TimeoutError:
+            return no_ad_result(DEADLINE_EXCEEDED)
+
+    def _flush(self, key: Tuple):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._pending.pop(key, None)
+        deadlines = self._deadlines.pop(key, [])
+        if not group:
+            return
+        # The batch runs until the last of its callers gives up.
+        deadline = None
+        if None not in deadlines:
+            deadline = max(deadlines, key=lambda deadline: deadline.expires_at)
+        loop, url, headers, transport = key
+        task = loop.create_task(
+            self._send(url, dict(headers), group, transport, deadline)
+        )
+        # Keep a reference so the task is not garbage collected mid-flight.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        group: List[Tuple[Dict[str, Any], asyncio.Future]],
+        transport: Optional[AsyncTransport],
+        deadline: Optional[Deadline],
+    ):
+        payloads = [payload for payload, _ in group]
+        try:
+            results = await self._send_batch(
+                url, headers, payloads, transport, deadline
+            )
+        except Exception as err:
+            logger.error(f"Batch error: {err}")
+            results = [retryable_error(str(err))] * len(group)
+        for (_, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _send_batch(
+        self, url, headers, payloads, transport, deadline=None
+    ) -> List[Dict]:
+        body = {
+            "requests": [
+                {"id": str(index), "payload": payload}
+                for index, payload in enumerate(payloads)
+            ]
+        }
+        batch = await _async_post_with_retries(
+            urljoin(url, self.batch_endpoint),
+            headers,
+            body,
+            _parse_batch_response,
+            num_retries=self.num_retries,
+            backoff_factor=self.backoff_factor,
+            timeout=self.timeout,
+            transport=transport,
+            deadline=deadline,
+        )
+        if "error" in batch:
+            return [batch] * len(payloads)
+        responses = batch["responses"]
+        return [
+            (
+                _parse_ads_response(responses[str(index)])
+                if str(index) in responses
+                else {"error": "Missing response in batch"}
+            )
+            for index in range(len(payloads))
+        ]
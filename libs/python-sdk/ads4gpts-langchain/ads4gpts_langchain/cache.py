@@ -0,0 +1,371 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Tuple, Union
+
+from ads4gpts_langchain.cache_backends import CacheBackend, decode_result, encode_result
+from ads4gpts_langchain.utils import (
+    DEADLINE_EXCEEDED,
+    NO_ADVERTISER_AGENTS,
+    Deadline,
+    no_ad_result,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fields that change on every impression and must not split the cache.
+VOLATILE_FIELDS = frozenset({"tid", "session_id", "tool_call_id"})
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    return value
+
+
+def make_cache_key(
+    payload: Dict[str, Any], exclude: FrozenSet[str] = VOLATILE_FIELDS
+) -> str:
+    """
+    Canonical hash of an ad request payload.
+
+    Per-impression fields are dropped, free text is whitespace- and
+    case-normalized and keys are sorted, so equivalent requests share a key.
+    """
+    canonical = json.dumps(
+        {k: _normalize(v) for k, v in payload.items() if k not in exclude},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def is_cacheable(result: Dict) -> bool:
+    """Only successful results carrying ads are cached."""
+    return bool(result.get("advertiser_agents"))
+
+
+def is_negative(result: Dict) -> bool:
+    """
+    No-inventory answers and errors reported by the API, which are worth caching
+    briefly; transport errors and timeouts are not.
+    """
+    return (
+        result.get("error") == NO_ADVERTISER_AGENTS or result.get("status") == "error"
+    )
+
+
+class _Call:
+    """An in-flight synchronous fetch that other callers can wait on."""
+
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[Dict] = None
+
+
+class AdCache:
+    """
+    In-process TTL + LRU cache for ad lookups with single-flight deduplication.
+
+    Concurrent misses on the same key share a single upstream call, in both the
+    sync and the async path. Hit, miss and coalesced-call counters are kept
+    in ``stats``.
+
+    With a ``backend`` (see ``cache_backends``), local misses are looked up in a
+    store shared by the workers of a host or by several hosts, and fetched
+    results are written to it. A backend error or timeout counts as a miss and
+    the lookup falls through to the API.
+
+    With a ``negative_ttl``, no-inventory answers and errors reported by the API
+    are cached too, for a shorter time and apart from the ads, so a context that
+    keeps finding no ads does not call the API every turn. Transport errors are
+    never cached. ``stats["negative_hits"]`` counts the upstream calls avoided.
+
+    Args:
+        ttl (float): Seconds a cached result stays fresh.
+        max_entries (int): Maximum number of cached results; least recently used are evicted.
+        exclude_fields (FrozenSet[str]): Payload fields left out of the cache key.
+        backend (Optional[CacheBackend]): Shared second tier behind the in-process cache.
+        negative_ttl (Union[float, Dict[str, float], None]): Seconds a negative result
+            is kept, for every format or per ``AdFormat`` value; formats left out
+            are not negatively cached.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_entries: int = 1024,
+        exclude_fields: FrozenSet[str] = VOLATILE_FIELDS,
+        backend: Optional[CacheBackend] = None,
+        negative_ttl: Union[float, Dict[str, float], None] = None,
+    ):
+        self.ttl = ttl
+        self.backend = backend
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.exclude_fields = exclude_fields
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._negative: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[
+            Tuple[asyncio.AbstractEventLoop, str], asyncio.Future
+        ] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.backend_hits = 0
+        self.backend_errors = 0
+        self.negative_hits = 0
+
+    def key(self, payload: Dict[str, Any]) -> str:
+        return make_cache_key(payload, self.exclude_fields)
+
+    def _negative_ttl(self, payload: Dict[str, Any]) -> Optional[float]:
+        if self.negative_ttl is None or isinstance(self.negative_ttl, (int, float)):
+            return self.negative_ttl
+        ad_format = payload.get("ad_format")
+        return self.negative_ttl.get(str(getattr(ad_format, "value", ad_format)))
+
+    def _get_locked(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _get_negative_locked(self, key: str) -> Optional[Dict]:
+        entry = self._negative.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._negative[key]
+            return None
+        self.negative_hits += 1
+        return entry[1]
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the fresh cached result for ``key``, or None."""
+        with self._lock:
+            return self._get_locked(key)
+
+    def set(self, key: str, result: Dict):
+        """Store a result if it is cacheable."""
+        if not is_cacheable(result):
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            self._negative.pop(key, None)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_negative(self, key: str, result: Dict, ttl: float):
+        """Store a no-inventory or API error result for ``ttl`` seconds."""
+        if not is_negative(result):
+            return
+        with self._lock:
+            self._negative[key] = (time.monotonic() + ttl, result)
+            self._negative.move_to_end(key)
+            while len(self._negative) > self.max_entries:
+                self._negative.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._negative.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+        }
+        if self.backend is not None:
+            stats.update(
+                backend_hits=self.backend_hits, backend_errors=self.backend_errors
+            )
+        if self.negative_ttl is not None:
+            stats.update(
+                negative_hits=self.negative_hits, negative_entries=len(self._negative)
+            )
+        return stats
+
+    def _backend_failed(self, operation: str, err: Exception):
+        self.backend_errors += 1
+        logger.warning(f"Shared ad cache {operation} failed, falling through: {err!r}")
+
+    def _backend_get(self, key: str) -> Optional[Dict]:
+        try:
+            data = self.backend.get(key)
+        except Exception as err:
+            self._backend_failed("lookup", err)
+            return None
+        return self._backend_decode(key, data)
+
+    async def _abackend_get(self, key: str) -> Optional[Dict]:
+        try:
+            data = await self.backend.aget(key)
+        except Exception as err:
+            self._backend_failed("lookup", err)
+            return None
+        return self._backend_decode(key, data)
+
+    def _backend_decode(self, key: str, data: Optional[bytes]) -> Optional[Dict]:
+        result = decode_result(data) if data else None
+        if result is not None:
+            self.backend_hits += 1
+            self.set(key, result)
+        return result
+
+    def _backend_set(self, key: str, result: Dict):
+        if not is_cacheable(result):
+            return
+        try:
+            self.backend.set(key, encode_result(result), self.ttl)
+        except Exception as err:
+            self._backend_failed("write", err)
+
+    async def _abackend_set(self, key: str, result: Dict):
+        if not is_cacheable(result):
+            return
+        try:
+            await self.backend.aset(key, encode_result(result), self.ttl)
+        except Exception as err:
+            self._backend_failed("write", err)
+
+    def _fetch(
+        self, key: str, fetch: Callable[[], Dict], negative_ttl: Optional[float]
+    ) -> Dict:
+        if self.backend is not None:
+            result = self._backend_get(key)
+            if result is not None:
+                return result
+        result = fetch()
+        self.set(key, result)
+        if negative_ttl:
+            self.set_negative(key, result, negative_ttl)
+        if self.backend is not None:
+            self._backend_set(key, result)
+        return result
+
+    async def _afetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Dict]],
+        negative_ttl: Optional[float],
+    ) -> Dict:
+        if self.backend is not None:
+            result = await self._abackend_get(key)
+            if result is not None:
+                return result
+        result = await fetch()
+        self.set(key, result)
+        if negative_ttl:
+            self.set_negative(key, result, negative_ttl)
+        if self.backend is not None:
+            await self._abackend_set(key, result)
+        return result
+
+    def get_or_fetch(
+        self,
+        payload: Dict[str, Any],
+        fetch: Callable[[], Dict],
+        deadline: Optional[Deadline] = None,
+    ) -> Dict:
+        """
+        Serve ``payload`` from the cache or call ``fetch`` once per key.
+
+        A caller waiting on another caller's fetch waits at most until its
+        ``deadline`` and then gets a no-ad result.
+        """
+        key = self.key(payload)
+        negative_ttl = self._negative_ttl(payload)
+        with self._lock:
+            result = self._get_locked(key)
+            if result is not None:
+                self.hits += 1
+                return dict(result)
+            if negative_ttl:
+                result = self._get_negative_locked(key)
+                if result is not None:
+                    return dict(result)
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            timeout = None if deadline is None else max(deadline.remaining(), 0)
+            if not call.event.wait(timeout):
+                return no_ad_result(DEADLINE_EXCEEDED)
+            return dict(call.result)
+        try:
+            call.result = self._fetch(key, fetch, negative_ttl)
+        except Exception as err:
+            call.result = {"error": str(err)}
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return dict(call.result)
+
+    async def aget_or_fetch(
+        self, payload: Dict[str, Any], fetch: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        """Async counterpart of ``get_or_fetch``."""
+        key = self.key(payload)
+        negative_ttl = self._negative_ttl(payload)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            result = self._get_locked(key)
+            if result is not None:
+                self.hits += 1
+                return dict(result)
+            if negative_ttl:
+                result = self._get_negative_locked(key)
+                if result is not None:
+                    return dict(result)
+            future = self._async_calls.get((loop, key))
+            leader = future is None
+            if leader:
+                future = self._async_calls[(loop, key)] = loop.create_future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return dict(await asyncio.shield(future))
+        try:
+            result = await self._afetch(key, fetch, negative_ttl)
+            future.set_result(result)
+            return dict(result)
+        except Exception as err:
+            future.set_result({"error": str(err)})
+            raise
+        except BaseException:
+            # The leader was cancelled (e.g. by its own latency budget); its
+            # followers get no ad rather than an error.
+            future.set_result(no_ad_result(DEADLINE_EXCEEDED))
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[(loop, key)]
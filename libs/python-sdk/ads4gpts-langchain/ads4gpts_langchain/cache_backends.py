@@ -0,0 +1,555 @@
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import socket
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ormsgpack as _msgpack
+except ImportError:
+    try:
+        import msgpack as _msgpack
+    except ImportError:
+        _msgpack = None
+
+_MSGPACK = b"M"
+_ZLIB_JSON = b"Z"
+
+
+def encode_result(result: Dict) -> bytes:
+    """Compact binary encoding of a result: MessagePack when available, else zlib'd JSON."""
+    if _msgpack is not None:
+        return _MSGPACK + _msgpack.packb(result)
+    return _ZLIB_JSON + zlib.compress(
+        json.dumps(result, separators=(",", ":"), default=str).encode(), 1
+    )
+
+
+def decode_result(data: bytes) -> Optional[Dict]:
+    """Decode ``encode_result`` output; None if this process cannot read the encoding."""
+    tag, body = data[:1], data[1:]
+    if tag == _MSGPACK and _msgpack is not None:
+        return _msgpack.unpackb(body)
+    if tag == _ZLIB_JSON:
+        return json.loads(zlib.decompress(body))
+    return None
+
+
+class CacheBackend(abc.ABC):
+    """
+    Shared store for encoded ad results, consulted by ``AdCache`` on local misses.
+
+    Operations must return or raise within the backend's ``timeout``; ``AdCache``
+    treats any exception, ``TimeoutError`` included, as a miss and falls through
+    to the API. The async methods default to the sync ones, which suits backends
+    that never block on the network.
+    """
+
+    timeout: float = 0.05
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abc.abstractmethod
+    def clear(self):
+        ...
+
+    def close(self):
+        pass
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: bytes, ttl: float):
+        self.set(key, value, ttl)
+
+    async def aclose(self):
+        self.close()
+
+
+def _digest(key: str) -> bytes:
+    if len(key) == 32:
+        try:
+            return bytes.fromhex(key)
+        except ValueError:
+            pass
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+
+def _default_shm_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "ads4gpts_ad_cache")
+
+
+class MmapCacheBackend(CacheBackend):
+    """
+    Fixed-size hash table in a memory-mapped file, shared by all workers on a host.
+
+    The file lives in ``/dev/shm`` by default, so lookups are memory reads without
+    system calls. Each slot holds one entry of up to ``slot_size`` bytes; a key
+    may use one of ``probes`` neighbouring slots, and when all are taken the
+    entry closest to expiry is replaced. Readers never lock: a per-slot sequence
+    number detects concurrent writes and the read is retried. Writers take an
+    exclusive ``flock`` on the file, giving up after ``timeout``.
+
+    Args:
+        path (Optional[str]): Table file; every worker of a host must use the same one.
+        slots (int): Number of slots.
+        slot_size (int): Bytes per slot, header included; larger entries are not stored.
+        probes (int): Slots a key may occupy.
+        timeout (float): Seconds to wait for a consistent read or the write lock.
+    """
+
+    _MAGIC = b"A4GC0001"
+    _FILE_HEADER = struct.Struct("<8sII")
+    # Sequence number, key digest, expiry (wall time), value length.
+    _SLOT_HEADER = struct.Struct("<Q16sdI")
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        slots: int = 4096,
+        slot_size: int = 4096,
+        probes: int = 4,
+        timeout: float = 0.05,
+    ):
+        try:
+            import fcntl
+        except ImportError:
+            raise ImportError("MmapCacheBackend requires a POSIX system (fcntl).")
+        self._fcntl = fcntl
+        self.path = path or _default_shm_path()
+        self.slots = slots
+        self.slot_size = slot_size
+        self.probes = min(probes, slots)
+        self.timeout = timeout
+        self._capacity = slot_size - self._SLOT_HEADER.size
+        if self._capacity <= 0:
+            raise ValueError("slot_size is too small for the slot header")
+        self._lock = threading.Lock()
+        size = self._FILE_HEADER.size + slots * slot_size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, self._FILE_HEADER.size, 0)
+            if len(header) < self._FILE_HEADER.size or not header.startswith(
+                self._MAGIC
+            ):
+                os.ftruncate(self._fd, size)
+                os.pwrite(
+                    self._fd, self._FILE_HEADER.pack(self._MAGIC, slots, slot_size), 0
+                )
+            elif self._FILE_HEADER.unpack(header)[1:] != (slots, slot_size):
+                raise ValueError(
+                    f"{self.path} was created with a different slots/slot_size"
+                )
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _offsets(self, digest: bytes):
+        start = int.from_bytes(digest[:8], "little") % self.slots
+        for i in range(self.probes):
+            yield self._FILE_HEADER.size + ((start + i) % self.slots) * self.slot_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        digest = _digest(key)
+        deadline = time.monotonic() + self.timeout
+        unpack = self._SLOT_HEADER.unpack_from
+        header_size = self._SLOT_HEADER.size
+        for offset in self._offsets(digest):
+            while True:
+                seq, slot_digest, expires_at, length = unpack(self._map, offset)
+                if slot_digest != digest:
+                    break
+                data = self._map[offset + header_size : offset + header_size + length]
+                if seq % 2 == 0 and unpack(self._map, offset)[0] == seq:
+                    if expires_at < time.time():
+                        return None
+                    return data
+                # A writer is updating the slot.
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Timed out reading the shared cache")
+        return None
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+        if not self._lock.acquire(timeout=self.timeout):
+            raise TimeoutError("Timed out locking the shared cache")
+        while True:
+            try:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_EX | self._fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    self._lock.release()
+                    raise TimeoutError("Timed out locking the shared cache")
+                time.sleep(0.0002)
+
+    def _release(self):
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+        self._lock.release()
+
+    def _write(self, offset: int, digest: bytes, expires_at: float, value: bytes):
+        seq = self._SLOT_HEADER.unpack_from(self._map, offset)[0]
+        # Odd while the slot is being written.
+        struct.pack_into("<Q", self._map, offset, seq + 1)
+        start = offset + self._SLOT_HEADER.size
+        self._map[start : start + len(value)] = value
+        self._SLOT_HEADER.pack_into(
+            self._map, offset, seq + 1, digest, expires_at, len(value)
+        )
+        struct.pack_into("<Q", self._map, offset, seq + 2)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self._capacity:
+            return
+        digest = _digest(key)
+        now = time.time()
+        self._acquire()
+        try:
+            victim, victim_expiry = None, None
+            for offset in self._offsets(digest):
+                _, slot_digest, expires_at, _ = self._SLOT_HEADER.unpack_from(
+                    self._map, offset
+                )
+                if slot_digest == digest or expires_at < now:
+                    victim = offset
+                    break
+                if victim is None or expires_at < victim_expiry:
+                    victim, victim_expiry = offset, expires_at
+            self._write(victim, digest, now + ttl, value)
+        finally:
+            self._release()
+
+    def delete(self, key: str):
+        digest = _digest(key)
+        self._acquire()
+        try:
+            for offset in self._offsets(digest):
+                if self._SLOT_HEADER.unpack_from(self._map, offset)[1] == digest:
+                    self._write(offset, bytes(16), 0.0, b"")
+        finally:
+            self._release()
+
+    def clear(self):
+        self._acquire()
+        try:
+            for i in range(self.slots):
+                offset = self._FILE_HEADER.size + i * self.slot_size
+                self._write(offset, bytes(16), 0.0, b"")
+        finally:
+            self._release()
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Ad results in a local SQLite file shared by the workers of a host.
+
+    Expired rows are ignored on read and purged every ``purge_every`` writes.
+
+    Args:
+        path (str): Database file.
+        timeout (float): Seconds to wait for another writer's lock.
+        purge_every (int): Writes between purges of expired rows.
+    """
+
+    def __init__(
+        self,
+        path: str = "ads4gpts_ad_cache.db",
+        timeout: float = 0.05,
+        purge_every: int = 1000,
+    ):
+        self.path = path
+        self.timeout = timeout
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ads4gpts_ad_cache ("
+            "key TEXT PRIMARY KEY, expires_at REAL, value BLOB) WITHOUT ROWID"
+        )
+
+    def _acquire(self):
+        if not self._lock.acquire(timeout=self.timeout):
+            raise TimeoutError("Timed out waiting for the SQLite cache")
+
+    def get(self, key: str) -> Optional[bytes]:
+        self._acquire()
+        try:
+            row = self._conn.execute(
+                "SELECT expires_at, value FROM ads4gpts_ad_cache WHERE key = ?", (key,)
+            ).fetchone()
+        finally:
+            self._lock.release()
+        if row is None or row[0] < time.time():
+            return None
+        return row[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        self._acquire()
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ads4gpts_ad_cache VALUES (?, ?, ?)",
+                (key, now + ttl, value),
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._conn.execute(
+                    "DELETE FROM ads4gpts_ad_cache WHERE expires_at < ?", (now,)
+                )
+        finally:
+            self._lock.release()
+
+    def delete(self, key: str):
+        self._acquire()
+        try:
+            self._conn.execute("DELETE FROM ads4gpts_ad_cache WHERE key = ?", (key,))
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._acquire()
+        try:
+            self._conn.execute("DELETE FROM ads4gpts_ad_cache")
+        finally:
+            self._lock.release()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _command(*args: Any) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+class RedisProtocolError(Exception):
+    pass
+
+
+def _parse(buffer: bytes, pos: int = 0) -> Tuple[Any, int]:
+    """Parse one RESP2 reply from ``buffer``; raises IndexError if it is incomplete."""
+    end = buffer.index(b"\r\n", pos)
+    kind, line = buffer[pos : pos + 1], buffer[pos + 1 : end]
+    pos = end + 2
+    if kind in (b"+", b":"):
+        return (int(line) if kind == b":" else line), pos
+    if kind == b"-":
+        raise RedisProtocolError(line.decode())
+    if kind == b"$":
+        length = int(line)
+        if length < 0:
+            return None, pos
+        if len(buffer) < pos + length + 2:
+            raise IndexError("incomplete bulk string")
+        return buffer[pos : pos + length], pos + length + 2
+    if kind == b"*":
+        count = int(line)
+        if count < 0:
+            return None, pos
+        items: List[Any] = []
+        for _ in range(count):
+            item, pos = _parse(buffer, pos)
+            items.append(item)
+        return items, pos
+    raise RedisProtocolError(f"Unexpected reply type {kind!r}")
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Ad results in Redis (or any RESP-speaking server) shared across hosts.
+
+    A minimal built-in RESP2 client keeps the SDK free of a Redis dependency.
+    Every command is bounded by ``timeout``; on a timeout or connection error
+    the connection is dropped, the lookup counts as a miss, and the next call
+    reconnects. The async methods use one connection per event loop.
+
+    Args:
+        url (str): ``redis://[:password@]host:port/db``.
+        timeout (float): Seconds allowed per command, connecting included.
+        prefix (str): Key prefix, so several caches can share a database.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        timeout: float = 0.05,
+        prefix: str = "ads4gpts:",
+    ):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int((parsed.path or "/0").lstrip("/") or 0)
+        self.timeout = timeout
+        self.prefix = prefix
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._async: Dict[asyncio.AbstractEventLoop, Tuple[Any, Any, asyncio.Lock]] = {}
+
+    def _setup_commands(self) -> List[bytes]:
+        commands = []
+        if self.password:
+            commands.append(_command("AUTH", self.password))
+        if self.db:
+            commands.append(_command("SELECT", self.db))
+        return commands
+
+    def _read_reply(self, sock: socket.socket, buffer: bytearray) -> Any:
+        while True:
+            try:
+                reply, pos = _parse(bytes(buffer))
+                del buffer[:pos]
+                return reply
+            except (IndexError, ValueError):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    raise ConnectionError("Redis connection closed")
+                buffer.extend(chunk)
+
+    def _execute(self, *args: Any) -> Any:
+        if not self._lock.acquire(timeout=self.timeout):
+            raise TimeoutError("Timed out waiting for the Redis connection")
+        try:
+            try:
+                if self._sock is None:
+                    sock = socket.create_connection(
+                        (self.host, self.port), timeout=self.timeout
+                    )
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    buffer = bytearray()
+                    for command in self._setup_commands():
+                        sock.sendall(command)
+                        self._read_reply(sock, buffer)
+                    self._sock = sock
+                self._sock.settimeout(self.timeout)
+                self._sock.sendall(_command(*args))
+                return self._read_reply(self._sock, bytearray())
+            except (OSError, RedisProtocolError):
+                self._drop()
+                raise
+        finally:
+            self._lock.release()
+
+    def _drop(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._execute("GET", self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._execute("SET", self.prefix + key, value, "PX", max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self._execute("DEL", self.prefix + key)
+
+    def clear(self):
+        cursor = b"0"
+        while True:
+            cursor, keys = self._execute(
+                "SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 1000
+            )
+            if keys:
+                self._execute("DEL", *keys)
+            if cursor in (b"0", 0):
+                return
+
+    def close(self):
+        with self._lock:
+            self._drop()
+
+    async def _aexecute(self, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+
+        async def run():
+            connection = self._async.get(loop)
+            if connection is None:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                connection = self._async[loop] = (reader, writer, asyncio.Lock())
+                async with connection[2]:
+                    for command in self._setup_commands():
+                        writer.write(command)
+                        await self._aread_reply(reader)
+            reader, writer, lock = connection
+            async with lock:
+                writer.write(_command(*args))
+                return await self._aread_reply(reader)
+
+        try:
+            return await asyncio.wait_for(run(), self.timeout)
+        except (OSError, asyncio.TimeoutError, RedisProtocolError) as err:
+            await self._adrop(loop)
+            if isinstance(err, asyncio.TimeoutError):
+                raise TimeoutError("Redis command timed out") from err
+            raise
+
+    async def _aread_reply(self, reader: asyncio.StreamReader) -> Any:
+        buffer = b""
+        while True:
+            try:
+                return _parse(buffer)[0]
+            except (IndexError, ValueError):
+                chunk = await reader.read(65536)
+                if not chunk:
+                    raise ConnectionError("Redis connection closed")
+                buffer += chunk
+
+    async def _adrop(self, loop: asyncio.AbstractEventLoop):
+        connection = self._async.pop(loop, None)
+        if connection is not None:
+            connection[1].close()
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await self._aexecute("GET", self.prefix + key)
+
+    async def aset(self, key: str, value: bytes, ttl: float):
+        await self._aexecute(
+            "SET", self.prefix + key, value, "PX", max(1, int(ttl * 1000))
+        )
+
+    async def aclose(self):
+        await self._adrop(asyncio.get_running_loop())
+        self.close()
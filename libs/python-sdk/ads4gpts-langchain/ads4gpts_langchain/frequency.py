@@ -0,0 +1,310 @@
+import abc
+import logging
+import math
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SECONDS_PER_DAY = 86400
+_SQRT_5 = math.sqrt(5)
+_PHI = (1 + _SQRT_5) / 2
+# Binet's formula is exact in double precision up to here.
+_MAX_FIB_INDEX = 70
+
+
+def fibonacci(n: int) -> int:
+    """The ``n``-th Fibonacci number (``fibonacci(1) == fibonacci(2) == 1``) in O(1)."""
+    n = min(max(n, 0), _MAX_FIB_INDEX)
+    return round(_PHI**n / _SQRT_5)
+
+
+class FrequencyRecord:
+    """
+    Per-user pacing state; a fixed handful of numbers regardless of history.
+
+    Attributes:
+        turns (int): Turns since the last ad.
+        ads (int): Ads shown so far.
+        last_ad_at (float): Unix time of the last ad, 0 if none.
+        day (int): Day number the ``day_count`` refers to.
+        day_count (int): Ads shown on ``day``.
+    """
+
+    __slots__ = ("turns", "ads", "last_ad_at", "day", "day_count")
+
+    def __init__(
+        self,
+        turns: int = 0,
+        ads: int = 0,
+        last_ad_at: float = 0.0,
+        day: int = -1,
+        day_count: int = 0,
+    ):
+        self.turns = turns
+        self.ads = ads
+        self.last_ad_at = last_ad_at
+        self.day = day
+        self.day_count = day_count
+
+    def as_tuple(self) -> tuple:
+        return (self.turns, self.ads, self.last_ad_at, self.day, self.day_count)
+
+
+class FrequencyPolicy(abc.ABC):
+    """
+    A pacing rule. ``allow`` sees the record with the current turn already
+    counted and must not mutate it.
+    """
+
+    @abc.abstractmethod
+    def allow(self, record: FrequencyRecord, now: float) -> bool:
+        ...
+
+
+class EveryN(FrequencyPolicy):
+    """Show an ad every ``n`` turns."""
+
+    def __init__(self, n: int):
+        if n < 1:
+            raise ValueError("n must be >= 1")
+        self.n = n
+
+    def allow(self, record: FrequencyRecord, now: float) -> bool:
+        return record.turns >= self.n
+
+
+class FibonacciBackoff(FrequencyPolicy):
+    """
+    Space ads by growing Fibonacci gaps (1, 2, 3, 5, 8, ... turns), so engaged
+    users see fewer ads over time.
+
+    Args:
+        offset (int): Fibonacci index of the first gap; the default of 2 starts at 1 turn.
+        max_gap (Optional[int]): Upper bound on the gap in turns.
+    """
+
+    def __init__(self, offset: int = 2, max_gap: Optional[int] = None):
+        self.offset = offset
+        self.max_gap = max_gap
+
+    def gap(self, ads: int) -> int:
+        """Turns required before the next ad after ``ads`` ads."""
+        gap = fibonacci(ads + self.offset)
+        return min(gap, self.max_gap) if self.max_gap is not None else gap
+
+    def allow(self, record: FrequencyRecord, now: float) -> bool:
+        return record.turns >= self.gap(record.ads)
+
+
+class MinInterval(FrequencyPolicy):
+    """Show at most one ad every ``seconds`` seconds."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def allow(self, record: FrequencyRecord, now: float) -> bool:
+        return not record.ads or now - record.last_ad_at >= self.seconds
+
+
+class DailyCap(FrequencyPolicy):
+    """
+    Show at most ``max_ads`` ads per user and day.
+
+    Args:
+        max_ads (int): Ads allowed per day.
+        utc_offset (float): Seconds added to UTC to find the day boundary.
+    """
+
+    def __init__(self, max_ads: int, utc_offset: float = 0.0):
+        self.max_ads = max_ads
+        self.utc_offset = utc_offset
+
+    def day(self, now: float) -> int:
+        return int((now + self.utc_offset) // SECONDS_PER_DAY)
+
+    def allow(self, record: FrequencyRecord, now: float) -> bool:
+        return record.day != self.day(now) or record.day_count < self.max_ads
+
+
+class MemoryFrequencyStore:
+    """Process-local store of frequency records."""
+
+    def __init__(self):
+        self._records: Dict[str, FrequencyRecord] = {}
+        self._lock = threading.Lock()
+
+    def update(self, user_id: str, fn: Callable[[FrequencyRecord], T]) -> T:
+        """Apply ``fn`` to the record of ``user_id`` atomically and return its result."""
+        with self._lock:
+            record = self._records.get(user_id)
+            if record is None:
+                record = self._records[user_id] = FrequencyRecord()
+            return fn(record)
+
+    def get(self, user_id: str) -> FrequencyRecord:
+        with self._lock:
+            record = self._records.get(user_id)
+            return FrequencyRecord(*record.as_tuple()) if record else FrequencyRecord()
+
+    def reset(self, user_id: str):
+        with self._lock:
+            self._records.pop(user_id, None)
+
+
+class SQLiteFrequencyStore:
+    """
+    Frequency records in a local SQLite file, shared by the processes of a host.
+
+    Each update runs in an immediate transaction, so concurrent decisions for
+    the same user from several processes are serialized.
+
+    Args:
+        path (str): Database file; ``":memory:"`` for a private in-memory database.
+        timeout (float): Seconds to wait for another process's lock.
+    """
+
+    def __init__(self, path: str = "ads4gpts_frequency.db", timeout: float = 5.0):
+        self.path = path
+        self._conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ads4gpts_frequency ("
+                "user_id TEXT PRIMARY KEY, turns INTEGER, ads INTEGER, "
+                "last_ad_at REAL, day INTEGER, day_count INTEGER)"
+            )
+
+    def _load(self, user_id: str) -> FrequencyRecord:
+        row = self._conn.execute(
+            "SELECT turns, ads, last_ad_at, day, day_count "
+            "FROM ads4gpts_frequency WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        return FrequencyRecord(*row) if row else FrequencyRecord()
+
+    def update(self, user_id: str, fn: Callable[[FrequencyRecord], T]) -> T:
+        """Apply ``fn`` to the record of ``user_id`` atomically and return its result."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                record = self._load(user_id)
+                result = fn(record)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ads4gpts_frequency VALUES (?, ?, ?, ?, ?, ?)",
+                    (user_id, *record.as_tuple()),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def get(self, user_id: str) -> FrequencyRecord:
+        with self._lock:
+            return self._load(user_id)
+
+    def reset(self, user_id: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM ads4gpts_frequency WHERE user_id = ?", (user_id,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class FrequencyEngine:
+    """
+    Frequency capping and pacing of ads per user.
+
+    ``decide`` counts a conversation turn for the user and returns whether an ad
+    should be shown on it: only when every policy allows it. A positive decision
+    is recorded as an impression right away, so the caller never fetches an ad
+    the policies would not allow. Each decision reads and writes one fixed-size
+    record per user.
+
+    Args:
+        policies (Sequence[FrequencyPolicy]): Rules that must all allow the ad.
+        store: ``MemoryFrequencyStore`` (default) or ``SQLiteFrequencyStore``.
+        clock (Callable[[], float]): Wall-clock time source, for time-based policies.
+    """
+
+    def __init__(
+        self,
+        policies: Sequence[FrequencyPolicy],
+        store: Optional[Any] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.policies = tuple(policies)
+        self.store = store if store is not None else MemoryFrequencyStore()
+        self.clock = clock
+        self._daily = next((p for p in self.policies if isinstance(p, DailyCap)), None)
+        self.shown = 0
+        self.suppressed = 0
+        self._warned_anonymous = False
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"shown": self.shown, "suppressed": self.suppressed}
+
+    def _day(self, now: float) -> int:
+        if self._daily is not None:
+            return self._daily.day(now)
+        return int(now // SECONDS_PER_DAY)
+
+    def _decide(self, record: FrequencyRecord, now: float) -> bool:
+        record.turns += 1
+        for policy in self.policies:
+            if not policy.allow(record, now):
+                return False
+        day = self._day(now)
+        record.day_count = record.day_count + 1 if record.day == day else 1
+        record.day = day
+        record.turns = 0
+        record.ads += 1
+        record.last_ad_at = now
+        return True
+
+    def decide(self, user_id: str = "default") -> bool:
+        """Count a turn for ``user_id`` and decide whether it gets an ad."""
+        now = self.clock()
+        show = self.store.update(user_id, lambda record: self._decide(record, now))
+        if show:
+            self.shown += 1
+        else:
+            self.suppressed += 1
+        return show
+
+    def should_show_ad(
+        self, state: Dict[str, Any], config: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Gate for graphs, e.g. ``build_ad_graph(should_show_ad=engine.should_show_ad)``.
+
+        The user is ``configurable["user_id"]`` of the run config, falling back to
+        its ``thread_id``. Runs with neither are not capped: the ad is shown and
+        no record is touched, since a shared record would pace all anonymous
+        users as one.
+        """
+        configurable = (config or {}).get("configurable") or {}
+        user_id = configurable.get("user_id", configurable.get("thread_id"))
+        if user_id is None:
+            if not self._warned_anonymous:
+                self._warned_anonymous = True
+                logger.warning(
+                    "No user_id or thread_id in the run config; "
+                    "frequency capping is skipped for such runs"
+                )
+            return True
+        return self.decide(str(user_id))
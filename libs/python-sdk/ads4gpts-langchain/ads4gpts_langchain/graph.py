@@ -0,0 +1,151 @@
+import asyncio
+import inspect
+import logging
+from typing import Any, Callable, Dict, Optional, TypedDict
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, StateGraph
+
+logger = logging.getLogger(__name__)
+
+# Private channel carrying the ad branch's update to the join node.
+AD_UPDATE_KEY = "ads4gpts_ad_update"
+
+
+# ``add_node`` takes the node input schema as ``input`` in the langgraph 0.2
+# series and as ``input_schema`` in later releases, which deprecate ``input``.
+_INPUT_SCHEMA_ARG = (
+    "input_schema"
+    if "input_schema" in inspect.signature(StateGraph.add_node).parameters
+    else "input"
+)
+
+
+def _takes_config(fn: Callable[..., Any]) -> bool:
+    return "config" in inspect.signature(fn).parameters
+
+
+class AdBranchOutput(TypedDict):
+    ads4gpts_ad_update: Optional[Dict[str, Any]]
+
+
+class AdBranch:
+    """
+    Graph node running an ad node within a latency budget.
+
+    The wrapped node's state update is not applied directly but written to the
+    private ``ads4gpts_ad_update`` channel, which ``join`` merges into the turn.
+    An ad that is skipped by ``should_show_ad``, takes longer than ``budget``
+    seconds or fails is dropped, and the turn goes on without it.
+
+    Args:
+        ad_node (Callable): ``(state[, config]) -> dict`` producing the ad update, sync or async.
+        should_show_ad (Optional[Callable]): ``(state[, config]) -> bool`` gating the ad
+            fetch, e.g. ``FrequencyEngine.should_show_ad``.
+        budget (Optional[float]): Seconds the ad may take before it is dropped.
+    """
+
+    def __init__(
+        self,
+        ad_node: Callable[..., Any],
+        should_show_ad: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        budget: Optional[float] = None,
+    ):
+        self.ad_node = ad_node
+        self.should_show_ad = should_show_ad
+        self.budget = budget
+        self._takes_config = _takes_config(ad_node)
+        self._gate_takes_config = should_show_ad is not None and _takes_config(
+            should_show_ad
+        )
+        self.shown = 0
+        self.dropped = 0
+        self.skipped = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"shown": self.shown, "dropped": self.dropped, "skipped": self.skipped}
+
+    async def _fetch(self, state: Dict[str, Any], config: RunnableConfig) -> Dict:
+        if self._takes_config:
+            result = self.ad_node(state, config)
+        else:
+            result = self.ad_node(state)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def __call__(
+        self, state: Dict[str, Any], config: RunnableConfig
+    ) -> AdBranchOutput:
+        if self.should_show_ad is not None and not (
+            self.should_show_ad(state, config)
+            if self._gate_takes_config
+            else self.should_show_ad(state)
+        ):
+            self.skipped += 1
+            return {AD_UPDATE_KEY: None}
+        try:
+            update = await asyncio.wait_for(self._fetch(state, config), self.budget)
+        except asyncio.TimeoutError:
+            logger.warning("Ad branch exceeded its latency budget, dropping the ad")
+            self.dropped += 1
+            return {AD_UPDATE_KEY: None}
+        except Exception as e:
+            logger.error(f"Ad branch failed, dropping the ad: {e}")
+            self.dropped += 1
+            return {AD_UPDATE_KEY: None}
+        self.shown += 1
+        return {AD_UPDATE_KEY: update}
+
+
+def join(state: AdBranchOutput) -> Dict[str, Any]:
+    """Apply the ad branch's update, if any, after the agent's response."""
+    update = state.get(AD_UPDATE_KEY)
+    return {**(update or {}), AD_UPDATE_KEY: None}
+
+
+def build_ad_graph(
+    state_schema: type,
+    agent_node: Callable[..., Any],
+    ad_node: Callable[..., Any],
+    should_show_ad: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    budget: Optional[float] = None,
+    parallel: bool = True,
+    agent_name: str = "agent_node",
+    ad_name: str = "ad_node",
+    join_name: str = "ad_join_node",
+) -> StateGraph:
+    """
+    Build a graph answering with ``agent_node`` and appending an ad from ``ad_node``.
+
+    With ``parallel=True`` the ad branch starts from the turn's input state at the
+    same time as the agent, so the ad adds no latency as long as it arrives
+    within ``budget``. A join node then appends the ad after the agent's response.
+    With ``parallel=False`` the ad branch runs after the agent and sees its
+    output, like the sequential example graphs.
+
+    ``should_show_ad`` decides per turn whether to fetch an ad. In parallel mode
+    it sees the input state, i.e. before the agent updated e.g. ``ad_counter``.
+
+    The graph is returned uncompiled, so nodes can be added and a checkpointer
+    passed to ``compile``. Pass an ``AdBranch`` as ``ad_node`` to read its stats;
+    ``should_show_ad`` and ``budget`` are then taken from it.
+    """
+    if isinstance(ad_node, AdBranch):
+        branch = ad_node
+    else:
+        branch = AdBranch(ad_node, should_show_ad=should_show_ad, budget=budget)
+    workflow = StateGraph(state_schema)
+    workflow.add_node(agent_name, agent_node)
+    workflow.add_node(ad_name, branch)
+    workflow.add_node(join_name, join, **{_INPUT_SCHEMA_ARG: AdBranchOutput})
+    workflow.add_edge(START, agent_name)
+    if parallel:
+        workflow.add_edge(START, ad_name)
+        workflow.add_edge([agent_name, ad_name], join_name)
+    else:
+        workflow.add_edge(agent_name, ad_name)
+        workflow.add_edge(ad_name, join_name)
+    workflow.add_edge(join_name, END)
+    return workflow
@@ -0,0 +1,254 @@
+import itertools
+import json
+import logging
+import re
+import threading
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+from ads4gpts_langchain.utils import (
+    CIRCUIT_OPEN,
+    DEADLINE_EXCEEDED,
+    NO_ADVERTISER_AGENTS,
+    RATE_LIMITED,
+)
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+# Targeting fields of a house ad record; every other field is served as is.
+TARGETING_FIELDS = frozenset({"ad_format", "keywords", "genders", "age_ranges"})
+# Ad fields whose words, along with the keywords, are matched against ``undesired_ads``.
+TEXT_FIELDS = ("ad_title", "ad_body", "ad_text")
+# Outcomes of the upstream call that a house ad may fill in for.
+FALLBACK_REASONS = frozenset({DEADLINE_EXCEEDED, CIRCUIT_OPEN, RATE_LIMITED})
+UPSTREAM_ERROR = "upstream_error"
+
+
+def fallback_reason(result: Dict) -> Optional[str]:
+    """
+    Why the upstream call failed to deliver, or None when a house ad must not
+    replace its result.
+
+    Missed deadlines, an open circuit, rate limiting and errors qualify. Ads, a
+    deliberate no-ad (e.g. ``low_intent``) and the API's "no inventory" answer
+    do not.
+    """
+    if result.get("advertiser_agents"):
+        return None
+    reason = result.get("no_ad_reason")
+    if reason is not None:
+        return reason if reason in FALLBACK_REASONS else None
+    error = result.get("error")
+    if error is not None and error != NO_ADVERTISER_AGENTS:
+        return UPSTREAM_ERROR
+    return None
+
+
+def _words(text: str) -> FrozenSet[str]:
+    return frozenset(_WORD.findall(text.lower()))
+
+
+def _bucket(values: Any) -> Optional[FrozenSet[str]]:
+    if not values:
+        return None
+    if isinstance(values, str):
+        values = [values]
+    return frozenset(str(value).upper() for value in values)
+
+
+class _FormatIndex:
+    """House ads of one format: keyword postings plus the untargeted ads."""
+
+    __slots__ = (
+        "ads",
+        "words",
+        "genders",
+        "age_ranges",
+        "keywords",
+        "untargeted",
+        "rotation",
+    )
+
+    def __init__(self):
+        self.ads: List[Dict[str, Any]] = []
+        self.words: List[FrozenSet[str]] = []
+        self.genders: List[Optional[FrozenSet[str]]] = []
+        self.age_ranges: List[Optional[FrozenSet[str]]] = []
+        self.keywords: Dict[str, List[int]] = {}
+        self.untargeted: List[int] = []
+        self.rotation = itertools.count()
+
+    def add(self, ad: Dict[str, Any], record: Dict[str, Any]):
+        index = len(self.ads)
+        self.ads.append(ad)
+        self.genders.append(_bucket(record.get("genders")))
+        self.age_ranges.append(_bucket(record.get("age_ranges")))
+        keywords = record.get("keywords") or []
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        words = frozenset().union(*map(_words, keywords))
+        for word in words:
+            self.keywords.setdefault(word, []).append(index)
+        if not words:
+            self.untargeted.append(index)
+        text = " ".join(str(ad.get(field) or "") for field in TEXT_FIELDS)
+        self.words.append(words | _words(text))
+
+
+class HouseAdInventory:
+    """
+    Local house ads served when the ads API fails or misses its deadline.
+
+    Each house ad is a record in the ``advertiser_agents`` ad shape (``ad_title``,
+    ``ad_body``, ``ad_link``, ...) with optional targeting fields: ``ad_format``
+    (one format or a list, all formats if missing), ``keywords`` matched against
+    the request's ``context`` and ``ad_recommendation``, and ``genders`` and
+    ``age_ranges`` demographic buckets. Ads whose keywords match are preferred,
+    best match first; ads without keywords fill the remaining slots in rotation.
+    Ads whose keywords, title or body share a word with ``undesired_ads``, and ads
+    outside the user's bucket, are never served.
+
+    The records are indexed per format at load time, so a selection is a few
+    set and dict lookups. ``stats`` counts the fallbacks served per format and
+    the failures no house ad matched.
+
+    Args:
+        ads (Iterable[Dict[str, Any]]): House ad records.
+    """
+
+    def __init__(self, ads: Iterable[Dict[str, Any]] = ()):
+        self._index: Dict[str, _FormatIndex] = {}
+        self._any = _FormatIndex()
+        self._lock = threading.Lock()
+        self.served: Counter = Counter()
+        self.unfilled = 0
+        for record in ads:
+            self.add(record)
+
+    @classmethod
+    def from_file(cls, path: str) -> "HouseAdInventory":
+        """
+        Load house ads from a JSONL file (one record per line) or a JSON file
+        holding a list of records or an object mapping ad formats to lists.
+        """
+        with open(path) as f:
+            if path.endswith(".jsonl"):
+                return cls(json.loads(line) for line in f if line.strip())
+            data = json.load(f)
+        if isinstance(data, dict):
+            return cls(
+                dict(record, ad_format=ad_format)
+                for ad_format, records in data.items()
+                for record in records
+            )
+        return cls(data)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "served": sum(self.served.values()),
+            "served_by_format": dict(self.served),
+            "unfilled": self.unfilled,
+            "ads": sum(len(index.ads) for index in self._index.values())
+            + len(self._any.ads),
+        }
+
+    def add(self, record: Dict[str, Any]):
+        """Index one house ad record."""
+        ad = {k: v for k, v in record.items() if k not in TARGETING_FIELDS}
+        formats = record.get("ad_format")
+        if not formats:
+            self._any.add(ad, record)
+            return
+        if isinstance(formats, str):
+            formats = [formats]
+        for ad_format in formats:
+            index = self._index.get(ad_format)
+            if index is None:
+                index = self._index[ad_format] = _FormatIndex()
+            index.add(ad, record)
+
+    def _pick(
+        self,
+        index: _FormatIndex,
+        words: FrozenSet[str],
+        blocked: FrozenSet[str],
+        gender: str,
+        age_range: str,
+        limit: int,
+        picked: List[Dict[str, Any]],
+    ):
+        """Append eligible ads of ``index`` to ``picked`` until it holds ``limit``."""
+
+        def eligible(i: int) -> bool:
+            genders = index.genders[i]
+            age_ranges = index.age_ranges[i]
+            return (
+                i not in seen
+                and (genders is None or gender in genders)
+                and (age_ranges is None or age_range in age_ranges)
+                and (not blocked or blocked.isdisjoint(index.words[i]))
+            )
+
+        postings = index.keywords
+        seen = set()
+        # Counting in C over the postings of the request's words.
+        scores = Counter(chain.from_iterable(postings.get(word, ()) for word in words))
+        for i in sorted(scores, key=scores.__getitem__, reverse=True):
+            if len(picked) == limit:
+                return
+            if eligible(i):
+                seen.add(i)
+                picked.append(index.ads[i])
+        untargeted = index.untargeted
+        if not untargeted:
+            return
+        start = next(index.rotation)
+        for offset in range(len(untargeted)):
+            if len(picked) == limit:
+                return
+            i = untargeted[(start + offset) % len(untargeted)]
+            if eligible(i):
+                seen.add(i)
+                picked.append(index.ads[i])
+
+    def select(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """House ads for an ad request, best match first; empty if none is eligible."""
+        ad_format = payload.get("ad_format")
+        ad_format = str(getattr(ad_format, "value", ad_format))
+        limit = max(int(payload.get("num_ads") or 1), 1)
+        words = _words(
+            f"{payload.get('context') or ''} {payload.get('ad_recommendation') or ''}"
+        )
+        blocked = _words(str(payload.get("undesired_ads") or ""))
+        gender = str(payload.get("user_gender") or "UNDISCLOSED").upper()
+        age_range = str(payload.get("user_age_range") or "UNDISCLOSED").upper()
+        picked: List[Dict[str, Any]] = []
+        for index in (self._index.get(ad_format), self._any):
+            if index is not None and len(picked) < limit:
+                self._pick(index, words, blocked, gender, age_range, limit, picked)
+        return [dict(ad) for ad in picked]
+
+    def fallback(self, payload: Dict[str, Any], result: Dict) -> Dict:
+        """
+        Replace a failed upstream ``result`` with house ads for ``payload``.
+
+        The house ads come in the ``advertiser_agents`` shape with a
+        ``fallback_reason`` naming the failure. Results that are not failures, or
+        failures no house ad matches, are returned unchanged.
+        """
+        reason = fallback_reason(result)
+        if reason is None:
+            return result
+        ads = self.select(payload)
+        ad_format = payload.get("ad_format")
+        ad_format = str(getattr(ad_format, "value", ad_format))
+        with self._lock:
+            if not ads:
+                self.unfilled += 1
+                return result
+            self.served[ad_format] += 1
+        logger.debug(f"Serving a house ad for {ad_format} ({reason})")
+        return {"advertiser_agents": ads, "fallback_reason": reason}
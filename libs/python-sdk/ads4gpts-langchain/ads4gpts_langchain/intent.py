@@ -0,0 +1,221 @@
+import logging
+import math
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence
+
+from ads4gpts_langchain.utils import LOW_INTENT, NO_ADVERTISER_AGENTS, no_ad_result
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z][a-z0-9'-]+")
+_SUFFIX = re.compile(r"(?:ing|ers|er|ed|es|s)$")
+
+COMMERCIAL_TERMS = frozenset("""
+    buy buying purchase price prices pricing cost costs cheap cheapest affordable
+    deal deals discount discounts coupon sale shop shopping store order best top
+    recommend recommendation recommendations review reviews compare comparison vs
+    alternative alternatives brand brands product products subscription subscribe
+    plan plans trial download app apps tool tools software service services course
+    courses book booking hotel hotels flight flights travel trip rent rental hire
+    insurance loan upgrade gift
+    """.split())
+SENSITIVE_TERMS = frozenset("""
+    suicide suicidal self-harm overdose died death dying funeral grief grieving
+    abuse abused assault rape emergency diagnosed cancer terminal miscarriage
+    depressed depression panic crisis
+    """.split())
+# Words that say nothing about what not to show.
+_NEUTRAL = frozenset(
+    {"none", "undisclosed", "ads", "ad", "any", "all", "other", "nothing", "the"}
+)
+_UNDISCLOSED = frozenset({"", "undisclosed", "none", "n/a"})
+
+FEATURES = ("commercial", "sensitive", "undesired", "undisclosed", "short_context")
+DEFAULT_WEIGHTS = {
+    "commercial": 2.5,
+    "sensitive": -4.0,
+    "undesired": -6.0,
+    "undisclosed": -1.5,
+    "short_context": -1.0,
+}
+DEFAULT_BIAS = 0.5
+
+
+def _stem(word: str) -> str:
+    return _SUFFIX.sub("", word) if len(word) > 4 else word
+
+
+def features(payload: Dict[str, Any]) -> Dict[str, float]:
+    """Features of an ad request, each in [0, 1]."""
+    context = str(payload.get("context") or "")
+    recommendation = str(payload.get("ad_recommendation") or "")
+    undesired = str(payload.get("undesired_ads") or "")
+    # Tokenized once; term lists are set lookups rather than regex alternations.
+    words = _WORD.findall(f"{context} {recommendation}".lower())
+    commercial = 0
+    sensitive = 0.0
+    for word in words:
+        if word in COMMERCIAL_TERMS:
+            commercial += 1
+        elif word in SENSITIVE_TERMS:
+            sensitive = 1.0
+    undesired_stems = {
+        stem
+        for stem in map(_stem, _WORD.findall(undesired.lower()))
+        if len(stem) > 2 and stem not in _NEUTRAL
+    }
+    return {
+        "commercial": min(commercial, 3) / 3,
+        "sensitive": sensitive,
+        "undesired": (
+            1.0
+            if undesired_stems and not undesired_stems.isdisjoint(map(_stem, words))
+            else 0.0
+        ),
+        "undisclosed": 1.0 if recommendation.strip().lower() in _UNDISCLOSED else 0.0,
+        "short_context": 1.0 if len(context.strip()) < 20 else 0.0,
+    }
+
+
+def _outcome(result: Dict) -> Optional[bool]:
+    """Whether the API returned an ad; None when the call says nothing about it."""
+    if result.get("advertiser_agents"):
+        return True
+    if result.get("error") == NO_ADVERTISER_AGENTS:
+        return False
+    return None
+
+
+class IntentFilter:
+    """
+    Local pre-filter skipping ad API calls that are unlikely to yield an ad.
+
+    A tiny logistic model scores the request on commercial-intent and
+    sensitive-topic keywords in ``context`` and ``ad_recommendation``, overlap
+    with ``undesired_ads``, a missing recommendation and a short context.
+    Requests scoring below ``threshold`` get a ``low_intent`` no-ad result without
+    calling the API. Fit the weights to logged outcomes with ``fit``.
+
+    In ``shadow`` mode every call goes through and the would-be decision is only
+    logged and compared with the API's answer, so ``stats`` reports the precision
+    of skipping before the filter is enforced.
+
+    Args:
+        threshold (float): Minimum score in [0, 1] for an ad call to be made.
+        shadow (bool): Log decisions without acting on them.
+        weights (Optional[Dict[str, float]]): Feature weights, merged over ``DEFAULT_WEIGHTS``.
+        bias (float): Model intercept.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.2,
+        shadow: bool = False,
+        weights: Optional[Dict[str, float]] = None,
+        bias: float = DEFAULT_BIAS,
+    ):
+        self.threshold = threshold
+        self.shadow = shadow
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.bias = bias
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped = 0
+        # Predicted skip or call, against whether the API then returned an ad.
+        self.true_skips = 0
+        self.false_skips = 0
+        self.true_calls = 0
+        self.wasted_calls = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        predicted_skips = self.true_skips + self.false_skips
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "true_skips": self.true_skips,
+            "false_skips": self.false_skips,
+            "true_calls": self.true_calls,
+            "wasted_calls": self.wasted_calls,
+            "skip_precision": (
+                self.true_skips / predicted_skips if predicted_skips else None
+            ),
+        }
+
+    def score(self, payload: Dict[str, Any]) -> float:
+        """Estimated probability that the request yields an ad."""
+        z = self.bias + sum(
+            self.weights[name] * value for name, value in features(payload).items()
+        )
+        return 1 / (1 + math.exp(-z))
+
+    def _decide(self, likely: bool) -> bool:
+        """Whether to call the API; counts the check and logs shadow skips."""
+        with self._lock:
+            self.checked += 1
+            if not likely and not self.shadow:
+                self.skipped += 1
+        if not likely and self.shadow:
+            logger.info("Intent filter (shadow) would skip this ad call")
+        return likely or self.shadow
+
+    def _observe(self, likely: bool, result: Dict):
+        got_ad = _outcome(result)
+        if got_ad is None:
+            return
+        with self._lock:
+            if likely:
+                if got_ad:
+                    self.true_calls += 1
+                else:
+                    self.wasted_calls += 1
+            elif got_ad:
+                self.false_skips += 1
+            else:
+                self.true_skips += 1
+
+    def get_or_fetch(self, payload: Dict[str, Any], fetch: Callable[[], Dict]) -> Dict:
+        """Return a ``low_intent`` no-ad result or the result of ``fetch``."""
+        likely = self.score(payload) >= self.threshold
+        if not self._decide(likely):
+            return no_ad_result(LOW_INTENT)
+        result = fetch()
+        self._observe(likely, result)
+        return result
+
+    async def aget_or_fetch(
+        self, payload: Dict[str, Any], fetch: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        """Async ``get_or_fetch``."""
+        likely = self.score(payload) >= self.threshold
+        if not self._decide(likely):
+            return no_ad_result(LOW_INTENT)
+        result = await fetch()
+        self._observe(likely, result)
+        return result
+
+    def fit(
+        self,
+        payloads: Sequence[Dict[str, Any]],
+        got_ad: Iterable[bool],
+        epochs: int = 300,
+        learning_rate: float = 0.5,
+    ) -> "IntentFilter":
+        """Fit the weights and bias to logged requests and whether they yielded an ad."""
+        rows = [features(payload) for payload in payloads]
+        labels = [1.0 if label else 0.0 for label in got_ad]
+        n = len(rows)
+        for _ in range(epochs):
+            grad = dict.fromkeys(FEATURES, 0.0)
+            grad_bias = 0.0
+            for row, label in zip(rows, labels):
+                z = self.bias + sum(self.weights[k] * row[k] for k in FEATURES)
+                error = 1 / (1 + math.exp(-z)) - label
+                grad_bias += error
+                for k in FEATURES:
+                    grad[k] += error * row[k]
+            self.bias -= learning_rate * grad_bias / n
+            for k in FEATURES:
+                self.weights[k] -= learning_rate * grad[k] / n
+        return self
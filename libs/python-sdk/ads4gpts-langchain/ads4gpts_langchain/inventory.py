@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from ads4gpts_langchain.cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Request fields the buffered ads were selected for; a change starts a new buffer.
+TARGETING_FIELDS = ("undesired_ads", "user_gender", "user_age_range", "min_bid")
+
+
+class AdInventory:
+    """
+    Per-session ad buffer: fetch several ads in one call and serve them over later turns.
+
+    Requests are buffered per ``(session_id, ad_format)`` and targeting
+    (``undesired_ads``, demographics and ``min_bid``), so ads fetched before the
+    targeting changed are not served; requests without a ``session_id`` go
+    straight to the API. When a session's buffer runs low, one upstream call
+    asks for ``batch_size`` ads, serves the current turn and keeps the rest for
+    the following turns.
+
+    Args:
+        batch_size (int): Number of ads requested per upstream call.
+        refill_threshold (int): A buffer holding fewer ads than this is topped up.
+            The async path serves the current turn first and refills in the background.
+        ttl (float): Seconds a buffered ad can be served.
+        max_sessions (int): Maximum number of session buffers; least recently used are dropped.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 5,
+        refill_threshold: int = 1,
+        ttl: float = 600.0,
+        max_sessions: int = 10_000,
+    ):
+        self.batch_size = batch_size
+        self.refill_threshold = refill_threshold
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._buffers: (
+            "OrderedDict[Tuple[str, str, str], Deque[Tuple[float, Dict]]]"
+        ) = OrderedDict()
+        self._lock = threading.Lock()
+        self._refills = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.served = 0
+        self.fetches = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "served": self.served,
+            "fetches": self.fetches,
+            "sessions": len(self._buffers),
+        }
+
+    def _key(self, payload: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+        session_id = payload.get("session_id")
+        if not session_id:
+            return None
+        ad_format = payload.get("ad_format")
+        targeting = make_cache_key(
+            {field: payload.get(field) for field in TARGETING_FIELDS},
+            exclude=frozenset(),
+        )
+        return session_id, getattr(ad_format, "value", ad_format), targeting
+
+    def _buffer(self, key: Tuple[str, str, str]) -> Deque[Tuple[float, Dict]]:
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = deque()
+            while len(self._buffers) > self.max_sessions:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(key)
+        now = time.monotonic()
+        while buffer and buffer[0][0] < now:
+            buffer.popleft()
+        return buffer
+
+    def _available(self, key: Tuple[str, str, str]) -> int:
+        with self._lock:
+            return len(self._buffer(key))
+
+    def _take(self, key: Tuple[str, str, str], num_ads: int) -> Optional[List[Dict]]:
+        with self._lock:
+            buffer = self._buffer(key)
+            if len(buffer) < num_ads:
+                return None
+            self.served += 1
+            return [buffer.popleft()[1] for _ in range(num_ads)]
+
+    def _store(self, key: Tuple[str, str, str], ads: List[Dict]):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._buffer(key).extend((expires_at, ad) for ad in ads)
+
+    def _refill_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.fetches += 1
+        return dict(payload, num_ads=max(self.batch_size, payload.get("num_ads", 1)))
+
+    def _serve(self, key, num_ads: int, result: Dict) -> Dict:
+        """Keep the extra ads of a refill and serve the first ``num_ads``."""
+        ads = result.get("advertiser_agents")
+        if not ads:
+            return result
+        self._store(key, ads[num_ads:])
+        return dict(result, advertiser_agents=ads[:num_ads])
+
+    def get_or_fetch(
+        self, payload: Dict[str, Any], fetch: Callable[[Dict[str, Any]], Dict]
+    ) -> Dict:
+        """Serve ``payload`` from the session buffer, refilling it with ``fetch`` when low."""
+        key = self._key(payload)
+        if key is None:
+            return fetch(payload)
+        num_ads = payload.get("num_ads", 1)
+        if self._available(key) >= max(num_ads, self.refill_threshold):
+            ads = self._take(key, num_ads)
+            if ads is not None:
+                return {"advertiser_agents": ads}
+        return self._serve(key, num_ads, fetch(self._refill_payload(payload)))
+
+    async def aget_or_fetch(
+        self,
+        payload: Dict[str, Any],
+        fetch: Callable[[Dict[str, Any]], Awaitable[Dict]],
+    ) -> Dict:
+        """Async counterpart of ``get_or_fetch`` that refills low buffers in the background."""
+        key = self._key(payload)
+        if key is None:
+            return await fetch(payload)
+        num_ads = payload.get("num_ads", 1)
+        ads = self._take(key, num_ads)
+        if ads is not None:
+            if (
+                self._available(key) < self.refill_threshold
+                and key not in self._refills
+            ):
+                self._refills.add(key)
+                task = asyncio.create_task(self._refill(key, payload, fetch))
+                # Keep a reference so the task is not garbage collected mid-flight.
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                task.add_done_callback(lambda _: self._refills.discard(key))
+            return {"advertiser_agents": ads}
+        result = await fetch(self._refill_payload(payload))
+        return self._serve(key, num_ads, result)
+
+    async def _refill(self, key, payload, fetch):
+        try:
+            result = await fetch(self._refill_payload(payload))
+            self._store(key, result.get("advertiser_agents") or [])
+        except Exception as err:
+            logger.error(f"Background inventory refill failed: {err}")
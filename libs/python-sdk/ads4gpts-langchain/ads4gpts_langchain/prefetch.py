@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _thread_id(config: Optional[Dict[str, Any]]) -> str:
+    return str(((config or {}).get("configurable") or {}).get("thread_id", "default"))
+
+
+class AdPrefetcher:
+    """
+    Speculative ad prefetching for LangGraph frequency flows.
+
+    In a graph that counts turns in ``ad_counter`` and shows an ad once it
+    reaches ``ad_frequency``, ``prefetch_node`` starts the ad fetch in the
+    background when the counter is ``lookahead`` turns away from the threshold.
+    ``ad_node`` then consumes the already-resolved result instead of blocking
+    the ad turn on it, falling back to a fresh fetch if nothing was prefetched.
+
+    Prefetches are keyed by the LangGraph ``thread_id``. A prefetch that is not
+    consumed within ``max_age`` seconds, or whose conversation ends first, is
+    cancelled.
+
+    Args:
+        fetch (Callable): ``async (state) -> dict`` producing the ad node's state update.
+        lookahead (int): Turns before the threshold at which to start prefetching.
+        max_age (float): Seconds a prefetched result stays usable.
+        counter_key (str): State key holding the turn counter.
+        frequency_key (str): State key holding the ad frequency.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        lookahead: int = 1,
+        max_age: float = 300.0,
+        counter_key: str = "ad_counter",
+        frequency_key: str = "ad_frequency",
+    ):
+        self.fetch = fetch
+        self.lookahead = lookahead
+        self.max_age = max_age
+        self.counter_key = counter_key
+        self.frequency_key = frequency_key
+        self._tasks: Dict[str, Tuple[float, asyncio.Task]] = {}
+        self.started = 0
+        self.used = 0
+        self.cancelled = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "started": self.started,
+            "used": self.used,
+            "cancelled": self.cancelled,
+            "pending": len(self._tasks),
+        }
+
+    def turns_until_ad(self, state: Dict[str, Any]) -> int:
+        """Number of turns left before ``ad_counter`` reaches ``ad_frequency``."""
+        return state.get(self.frequency_key, 1) - state.get(self.counter_key, 0)
+
+    def prefetch(self, state: Dict[str, Any], thread_id: str = "default"):
+        """Start fetching an ad for ``thread_id`` in the background if none is pending."""
+        if thread_id in self._tasks:
+            return
+        task = asyncio.create_task(self.fetch(dict(state)))
+        task.add_done_callback(self._log_failure)
+        self._tasks[thread_id] = (time.monotonic(), task)
+        asyncio.get_running_loop().call_later(
+            self.max_age, self._expire, thread_id, task
+        )
+        self.started += 1
+
+    def cancel(self, thread_id: str = "default") -> bool:
+        """Cancel the pending prefetch of ``thread_id``, e.g. when the conversation ends."""
+        entry = self._tasks.pop(thread_id, None)
+        if entry is None:
+            return False
+        entry[1].cancel()
+        self.cancelled += 1
+        return True
+
+    async def aclose(self):
+        """Cancel every pending prefetch."""
+        for thread_id in list(self._tasks):
+            self.cancel(thread_id)
+
+    async def consume(
+        self, state: Dict[str, Any], thread_id: str = "default"
+    ) -> Dict[str, Any]:
+        """Return the prefetched ad update for ``thread_id``, or fetch one now."""
+        entry = self._tasks.pop(thread_id, None)
+        if entry is not None:
+            started_at, task = entry
+            if time.monotonic() - started_at <= self.max_age:
+                try:
+                    result = await task
+                    self.used += 1
+                    return result
+                except Exception:
+                    pass
+            else:
+                task.cancel()
+        return await self.fetch(state)
+
+    async def prefetch_node(self, state: Dict[str, Any], config=None) -> Dict:
+        """Graph node starting the prefetch when the ad turn is ``lookahead`` turns away."""
+        if 0 < self.turns_until_ad(state) <= self.lookahead:
+            self.prefetch(state, _thread_id(config))
+        return {}
+
+    async def ad_node(self, state: Dict[str, Any], config=None) -> Dict[str, Any]:
+        """Graph node serving the ad turn from the prefetched result."""
+        return await self.consume(state, _thread_id(config))
+
+    def _expire(self, thread_id: str, task: asyncio.Task):
+        entry = self._tasks.get(thread_id)
+        if entry is not None and entry[1] is task:
+            self.cancel(thread_id)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Ad prefetch failed: {task.exception()}")
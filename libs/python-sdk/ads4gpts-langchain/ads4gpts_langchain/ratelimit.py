@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Waiter:
+    __slots__ = ("granted", "event", "loop", "future")
+
+    def __init__(self, event=None, loop=None, future=None):
+        self.granted = False
+        self.event = event
+        self.loop = loop
+        self.future = future
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class RateLimiter:
+    """
+    Client-side token bucket and concurrency cap for ads API calls.
+
+    Calls are admitted at ``rate`` per second with bursts of up to ``burst``,
+    and at most ``max_in_flight`` run at once. When saturated, ``mode="queue"``
+    waits up to ``queue_timeout`` seconds for capacity and ``mode="shed"``
+    rejects the call immediately; tools return a no-ad result for rejected calls.
+    Retries and hedged duplicates of an admitted call each take another token.
+    The same limiter covers sync and async callers. Use ``for_api_key`` to share
+    one limiter between every toolkit and tool using the same API key.
+
+    Args:
+        rate (Optional[float]): Sustained requests per second. None disables the bucket.
+        burst (int): Bucket size, i.e. the number of requests allowed back to back.
+        max_in_flight (Optional[int]): Maximum concurrent requests. None disables the cap.
+        mode (str): ``"queue"`` or ``"shed"`` behaviour when saturated.
+        queue_timeout (float): Seconds a queued call waits before it is shed.
+    """
+
+    _registry: Dict[str, "RateLimiter"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        rate: Optional[float] = 10.0,
+        burst: int = 20,
+        max_in_flight: Optional[int] = 16,
+        mode: Literal["queue", "shed"] = "queue",
+        queue_timeout: float = 1.0,
+    ):
+        if mode not in ("queue", "shed"):
+            raise ValueError(f"Invalid rate limiter mode: {mode}")
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.mode = mode
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._queued = 0
+        self.admitted = 0
+        self.shed = 0
+
+    @classmethod
+    def for_api_key(cls, api_key: str, **kwargs) -> "RateLimiter":
+        """The limiter shared by every caller of ``api_key``, created with ``kwargs`` on first use."""
+        with cls._registry_lock:
+            limiter = cls._registry.get(api_key)
+            if limiter is None:
+                limiter = cls._registry[api_key] = cls(**kwargs)
+            elif kwargs:
+                logger.debug("Reusing the existing rate limiter for this API key")
+            return limiter
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "queue_depth": self._queued,
+            "in_flight": self._in_flight,
+        }
+
+    def _max_wait(self, timeout: Optional[float]) -> float:
+        if self.mode == "shed":
+            return 0.0
+        return (
+            self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        )
+
+    def _reserve_token(self, max_wait: float) -> Optional[float]:
+        """Reserve a token and return how long to wait for it, or None if that exceeds ``max_wait``."""
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def _try_slot(self, waiter_factory) -> Optional[_Waiter]:
+        """Take a free slot (returns None) or enqueue a waiter; must hold the lock."""
+        if self.max_in_flight is None or (
+            self._in_flight < self.max_in_flight and not self._waiters
+        ):
+            self._in_flight += 1
+            return None
+        waiter = waiter_factory()
+        self._waiters.append(waiter)
+        return waiter
+
+    def _reject(self) -> bool:
+        with self._lock:
+            self.shed += 1
+        return False
+
+    def _track_queued(self, delta: int):
+        with self._lock:
+            self._queued += delta
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for capacity; False means the call was shed. Pair a True with ``release``."""
+        started_at = time.monotonic()
+        max_wait = self._max_wait(timeout)
+        wait = self._reserve_token(max_wait)
+        if wait is None:
+            return self._reject()
+        if wait:
+            self._track_queued(1)
+            time.sleep(wait)
+            self._track_queued(-1)
+        with self._lock:
+            waiter = self._try_slot(lambda: _Waiter(event=threading.Event()))
+            if waiter is None:
+                self.admitted += 1
+                return True
+            self._queued += 1
+        waiter.event.wait(max(0.0, max_wait - (time.monotonic() - started_at)))
+        return self._settle(waiter)
+
+    async def aacquire(self, timeout: Optional[float] = None) -> bool:
+        """Async counterpart of ``acquire``."""
+        started_at = time.monotonic()
+        max_wait = self._max_wait(timeout)
+        wait = self._reserve_token(max_wait)
+        if wait is None:
+            return self._reject()
+        if wait:
+            self._track_queued(1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._track_queued(-1)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            waiter = self._try_slot(
+                lambda: _Waiter(loop=loop, future=loop.create_future())
+            )
+            if waiter is None:
+                self.admitted += 1
+                return True
+            self._queued += 1
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(waiter.future),
+                max(0.0, max_wait - (time.monotonic() - started_at)),
+            )
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if self._settle(waiter):
+                self.release()
+            raise
+        return self._settle(waiter)
+
+    def acquire_retry(self, timeout: Optional[float] = None) -> bool:
+        """
+        Charge a token for a retry or hedged duplicate of an admitted call.
+
+        The extra attempt runs within the call's slot, so only the bucket is
+        consulted; False means it was shed.
+        """
+        wait = self._reserve_token(self._max_wait(timeout))
+        if wait is None:
+            return self._reject()
+        if wait:
+            self._track_queued(1)
+            time.sleep(wait)
+            self._track_queued(-1)
+        return True
+
+    async def aacquire_retry(self, timeout: Optional[float] = None) -> bool:
+        """Async counterpart of ``acquire_retry``."""
+        wait = self._reserve_token(self._max_wait(timeout))
+        if wait is None:
+            return self._reject()
+        if wait:
+            self._track_queued(1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._track_queued(-1)
+        return True
+
+    def _settle(self, waiter: _Waiter) -> bool:
+        """Resolve a finished wait: keep a granted slot or leave the queue and shed."""
+        with self._lock:
+            self._queued -= 1
+            if waiter.granted:
+                self.admitted += 1
+                return True
+            self._waiters.remove(waiter)
+            self.shed += 1
+            return False
+
+    def release(self):
+        """Free the slot taken by a successful ``acquire``, handing it to the next waiter."""
+        if self.max_in_flight is None:
+            return
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+            else:
+                self._in_flight -= 1
+                return
+        waiter.wake()
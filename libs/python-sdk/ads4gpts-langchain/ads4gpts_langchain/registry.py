@@ -0,0 +1,165 @@
+import logging
+import threading
+from collections import OrderedDict
+from importlib.metadata import entry_points
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple, Type
+
+from langchain_core.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+# Entry point group through which packages contribute additional tool classes:
+#
+#     [project.entry-points."ads4gpts_langchain.tools"]
+#     my_format = "my_package.tools:MyFormatTool"
+ENTRY_POINT_GROUP = "ads4gpts_langchain.tools"
+
+
+def tool_name(tool_class: Type[BaseTool]) -> str:
+    """The default ``name`` of a tool class, known without instantiating it."""
+    return tool_class.model_fields["name"].default
+
+
+class _Unfreezable(Exception):
+    """A value that is neither hashable nor a container of hashable values."""
+
+
+def _freeze(value: Any) -> Hashable:
+    # Containers are frozen by content: pydantic copies them on validation, so
+    # their identity says nothing about the configuration.
+    if isinstance(value, dict):
+        return (
+            dict,
+            tuple(
+                sorted(
+                    ((k, _freeze(v)) for k, v in value.items()),
+                    key=lambda item: repr(item[0]),
+                )
+            ),
+        )
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze(item) for item in value))
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(_freeze(item) for item in value))
+    try:
+        hash(value)
+    except TypeError:
+        raise _Unfreezable from None
+    return value
+
+
+def freeze_args(kwargs: Dict[str, Any]) -> Optional[Tuple]:
+    """
+    Hashable snapshot of keyword arguments, equal for equal arguments, or None
+    when a value cannot be hashed even after freezing its containers.
+    """
+    try:
+        return tuple(sorted((k, _freeze(v)) for k, v in kwargs.items()))
+    except _Unfreezable:
+        return None
+
+
+class ToolRegistry:
+    """
+    Registry of ads tool classes and cache of their configured instances.
+
+    Tool classes are registered explicitly with ``register`` or discovered from
+    the ``ads4gpts_langchain.tools`` entry point group. ``get_tool`` builds each
+    tool once per configuration (class, constructor arguments) and hands out the
+    same instance afterwards, so rebuilding tool lists per request costs a dict
+    lookup instead of a Pydantic model construction. Tools configured with values
+    that cannot be hashed are built on every call instead of cached.
+
+    Args:
+        max_instances (int): Maximum number of cached tool instances; the oldest are dropped.
+    """
+
+    def __init__(self, max_instances: int = 1024):
+        self.max_instances = max_instances
+        self._classes: Dict[str, Type[BaseTool]] = {}
+        self._fields: Dict[Type[BaseTool], FrozenSet[str]] = {}
+        self._instances: "OrderedDict[Tuple, BaseTool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._entry_points_loaded = False
+        # Bumped whenever the set of tool classes changes.
+        self.version = 0
+
+    def register(self, tool_class: Type[BaseTool]) -> Type[BaseTool]:
+        """Register a tool class under its default name. Usable as a class decorator."""
+        with self._lock:
+            self._classes[tool_name(tool_class)] = tool_class
+            self.version += 1
+        return tool_class
+
+    def load_entry_points(self):
+        """Register the tool classes advertised by installed packages, once."""
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                self.register(entry_point.load())
+            except Exception as err:
+                logger.error(
+                    f"Failed to load ads tool plugin {entry_point.name}: {err}"
+                )
+
+    def tool_classes(self) -> List[Type[BaseTool]]:
+        """All registered tool classes, including entry point plugins."""
+        self.load_entry_points()
+        with self._lock:
+            return list(self._classes.values())
+
+    def field_names(self, tool_class: Type[BaseTool]) -> FrozenSet[str]:
+        """Constructor fields of ``tool_class``, computed once per class."""
+        fields = self._fields.get(tool_class)
+        if fields is None:
+            fields = self._fields[tool_class] = frozenset(tool_class.model_fields)
+        return fields
+
+    def filter_args(
+        self, tool_class: Type[BaseTool], args: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Keep only the arguments ``tool_class`` accepts."""
+        fields = self.field_names(tool_class)
+        return {k: v for k, v in args.items() if k in fields}
+
+    @staticmethod
+    def instance_key(
+        tool_class: Type[BaseTool], kwargs: Dict[str, Any]
+    ) -> Tuple[Type[BaseTool], Optional[Tuple]]:
+        """Cache key of the ``tool_class`` instance built with ``kwargs``."""
+        return (tool_class, freeze_args(kwargs))
+
+    def get_tool(self, tool_class: Type[BaseTool], **kwargs) -> BaseTool:
+        """The cached instance of ``tool_class`` built with ``kwargs``, building it on first use."""
+        return self.get_tool_by_key(self.instance_key(tool_class, kwargs), kwargs)
+
+    def get_tool_by_key(self, key: Tuple, kwargs: Dict[str, Any]) -> BaseTool:
+        """``get_tool`` with a key precomputed by ``instance_key``."""
+        tool = self._instances.get(key)
+        if tool is not None:
+            return tool
+        tool_class, frozen = key
+        tool = tool_class(**kwargs)
+        if frozen is None:
+            return tool
+        with self._lock:
+            tool = self._instances.setdefault(key, tool)
+            while len(self._instances) > self.max_instances:
+                self._instances.popitem(last=False)
+        return tool
+
+    def clear(self):
+        """Drop every cached tool instance."""
+        with self._lock:
+            self._instances.clear()
+
+
+# Registry shared by every Ads4gptsToolkit of the process.
+default_registry = ToolRegistry()
+
+
+def register_tool(tool_class: Type[BaseTool]) -> Type[BaseTool]:
+    """Register a tool class with the default registry, e.g. as a class decorator."""
+    return default_registry.register(tool_class)
@@ -0,0 +1,241 @@
+import html
+import logging
+import threading
+from collections import OrderedDict
+from string import Formatter
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+OUTPUTS = ("markdown", "html", "text")
+
+# Ad fields as consumed by the AdCard frontend component, plus the chat ad text.
+AD_FIELDS = ("ad_creative", "ad_title", "ad_body", "ad_link", "ad_link_cta", "ad_text")
+DEFAULT_CTA = "Learn more"
+# Ad fields placed in ``href``/``src`` attributes and markdown link targets.
+URL_FIELDS = ("ad_link", "ad_creative")
+SAFE_SCHEMES = frozenset({"http", "https"})
+# Characters that would end a markdown link target early.
+_MARKDOWN_URL = str.maketrans({"(": "%28", ")": "%29", "<": "%3C", ">": "%3E"})
+
+
+def safe_url(url: str) -> str:
+    """``url`` if it is an absolute http(s) URL, otherwise an empty string."""
+    url = url.strip()
+    if any(char.isspace() or not char.isprintable() for char in url):
+        return ""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return ""
+    if parts.scheme.lower() not in SAFE_SCHEMES or not parts.netloc:
+        return ""
+    return url
+
+
+class _Line:
+    """
+    A template line parsed once into literal and field parts.
+
+    The line is dropped when any field it references is empty, so optional
+    parts such as the creative image need no branching in the templates.
+    """
+
+    __slots__ = ("parts", "fields")
+
+    def __init__(self, source: str):
+        self.parts: Tuple[Tuple[str, Optional[str]], ...] = tuple(
+            (literal, field) for literal, field, _, _ in Formatter().parse(source)
+        )
+        self.fields: FrozenSet[str] = frozenset(
+            field for _, field in self.parts if field
+        )
+
+    def render(self, values: Mapping[str, str]) -> Optional[str]:
+        if not all(values.get(field) for field in self.fields):
+            return None
+        return "".join(
+            literal + (values[field] if field else "") for literal, field in self.parts
+        )
+
+
+class Template:
+    """A precompiled multi-line ad template; lines with empty fields are skipped."""
+
+    def __init__(self, source: str, separator: str = "\n"):
+        self.source = source
+        self.separator = separator
+        self.lines = [_Line(line) for line in source.strip("\n").split("\n")]
+
+    def render(self, values: Mapping[str, str]) -> str:
+        rendered = (line.render(values) for line in self.lines)
+        return self.separator.join(line for line in rendered if line is not None)
+
+
+_BANNER = {
+    "markdown": "![{ad_title}]({ad_creative})\n**{ad_title}** · _Ad_\n{ad_body}\n[{ad_link_cta}]({ad_link})",
+    "html": (
+        '<div class="ads4gpts-ad">\n'
+        '<img src="{ad_creative}" alt="{ad_title}">\n'
+        "<h2>{ad_title}</h2>\n"
+        '<span class="ads4gpts-ad-badge">Ad</span>\n'
+        "<p>{ad_body}</p>\n"
+        '<a href="{ad_link}" target="_blank" rel="noopener noreferrer sponsored">{ad_link_cta}</a>\n'
+        "</div>"
+    ),
+    "text": "[Ad] {ad_title}\n{ad_body}\n{ad_link_cta}: {ad_link}",
+}
+_SPONSORED_TEXT = {
+    "markdown": "_Sponsored_\n{ad_text}\n[{ad_link_cta}]({ad_link})",
+    "html": (
+        '<div class="ads4gpts-ad">\n'
+        '<span class="ads4gpts-ad-badge">Sponsored</span>\n'
+        "<p>{ad_text}</p>\n"
+        '<a href="{ad_link}" target="_blank" rel="noopener noreferrer sponsored">{ad_link_cta}</a>\n'
+        "</div>"
+    ),
+    "text": "[Sponsored] {ad_text}\n{ad_link_cta}: {ad_link}",
+}
+_PROMPT = {
+    "markdown": "- {ad_text} _(Sponsored)_",
+    "html": '<button class="ads4gpts-prompt" data-link="{ad_link}">{ad_text}</button>',
+    "text": "> {ad_text} (Sponsored)",
+}
+_REFERRAL = {
+    "markdown": "**{ad_title}**: {ad_body} [{ad_link_cta}]({ad_link}) _(Sponsored)_",
+    "html": (
+        '<p class="ads4gpts-referral"><strong>{ad_title}</strong>: {ad_body} '
+        '<a href="{ad_link}" target="_blank" rel="noopener noreferrer sponsored">{ad_link_cta}</a> '
+        "<em>(Sponsored)</em></p>"
+    ),
+    "text": "{ad_title}: {ad_body} ({ad_link_cta}: {ad_link}) [Sponsored]",
+}
+
+# Template sources per ad format (the AdFormat values) and output.
+DEFAULT_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "INLINE_SPONSORED_RESPONSE": _SPONSORED_TEXT,
+    "INLINE_CONVERSATIONAL": _SPONSORED_TEXT,
+    "SUGGESTED_PROMPT": _PROMPT,
+    "INLINE_BANNER": _BANNER,
+    "SUGGESTED_BANNER": _BANNER,
+    "INLINE_REFERRAL": _REFERRAL,
+}
+# Formats whose ads are fully structured; free-text formats may still be better
+# served by an LLM render agent.
+STRUCTURED_FORMATS = frozenset(
+    {"INLINE_BANNER", "SUGGESTED_BANNER", "SUGGESTED_PROMPT"}
+)
+
+
+def _format_key(ad_format: Any) -> str:
+    return getattr(ad_format, "value", ad_format)
+
+
+class AdRenderer:
+    """
+    Template renderer turning ad results into ready-to-display text.
+
+    Set on a tool (or the toolkit) as ``renderer``, the tool returns the rendered
+    ads as a message and routes to ``END`` instead of handing raw ads to an LLM
+    render agent. Templates are compiled once per format; rendered fragments of
+    ads carrying an ``ad_id`` are kept in an LRU cache. Only ``http`` and
+    ``https`` links and creatives are rendered.
+
+    Args:
+        output (str): One of ``"markdown"``, ``"html"`` or ``"text"``.
+        formats (Optional[Iterable[str]]): Ad formats to render; others keep going
+            to the render agent, if any. Defaults to every format.
+        templates (Optional[Dict[str, Dict[str, str]]]): Template sources per format
+            and output, merged over ``DEFAULT_TEMPLATES``.
+        cache_size (int): Maximum number of cached fragments; 0 disables the cache.
+        separator (str): Placed between the fragments of several ads.
+    """
+
+    def __init__(
+        self,
+        output: str = "markdown",
+        formats: Optional[Iterable[str]] = None,
+        templates: Optional[Dict[str, Dict[str, str]]] = None,
+        cache_size: int = 1024,
+        separator: str = "\n\n",
+    ):
+        if output not in OUTPUTS:
+            raise ValueError(f"Invalid output: {output}. Must be one of {OUTPUTS}")
+        self.output = output
+        self.formats = frozenset(
+            _format_key(ad_format)
+            for ad_format in (formats if formats is not None else DEFAULT_TEMPLATES)
+        )
+        self.cache_size = cache_size
+        self.separator = separator
+        self._templates: Dict[str, Template] = {}
+        for ad_format in self.formats:
+            sources = {
+                **DEFAULT_TEMPLATES.get(ad_format, {}),
+                **(templates or {}).get(ad_format, {}),
+            }
+            if output not in sources:
+                raise ValueError(f"No {output} template for ad format {ad_format}")
+            self._templates[ad_format] = Template(sources[output])
+        self._fragments: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._fragments)}
+
+    def handles(self, ad_format: Any) -> bool:
+        """Whether ads of ``ad_format`` are rendered rather than sent to a render agent."""
+        return _format_key(ad_format) in self.formats
+
+    def _values(self, ad: Mapping[str, Any]) -> Dict[str, str]:
+        values = {field: str(ad.get(field) or "") for field in AD_FIELDS}
+        values["ad_text"] = values["ad_text"] or values["ad_body"] or values["ad_title"]
+        # Links with another scheme (``javascript:``, ``data:``, ...) are dropped
+        # together with the template lines that show them.
+        for field in URL_FIELDS:
+            values[field] = safe_url(values[field])
+            if self.output == "markdown":
+                values[field] = values[field].translate(_MARKDOWN_URL)
+        if values["ad_link"]:
+            values["ad_link_cta"] = values["ad_link_cta"] or DEFAULT_CTA
+        if self.output == "html":
+            values = {field: html.escape(value) for field, value in values.items()}
+        return values
+
+    def render_ad(self, ad: Mapping[str, Any], ad_format: Any) -> str:
+        """Render a single ad, reusing the cached fragment of its ``ad_id``."""
+        key = _format_key(ad_format)
+        ad_id = ad.get("ad_id")
+        if ad_id is None or not self.cache_size:
+            return self._templates[key].render(self._values(ad))
+        cache_key = (key, str(ad_id))
+        with self._lock:
+            fragment = self._fragments.get(cache_key)
+            if fragment is not None:
+                self._fragments.move_to_end(cache_key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+        fragment = self._templates[key].render(self._values(ad))
+        with self._lock:
+            self._fragments[cache_key] = fragment
+            while len(self._fragments) > self.cache_size:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def render(self, ads: Any, ad_format: Any) -> str:
+        """Render a tool result; no-ad and error results render as an empty string."""
+        if isinstance(ads, Mapping):
+            ads = ads.get("advertiser_agents") or []
+        fragments: List[str] = [
+            self.render_ad(ad, ad_format) for ad in ads if isinstance(ad, Mapping)
+        ]
+        return self.separator.join(fragment for fragment in fragments if fragment)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
@@ -0,0 +1,264 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from ads4gpts_langchain.utils import DEADLINE_EXCEEDED
+
+logger = logging.getLogger(__name__)
+
+
+def _failed(result: Dict) -> bool:
+    """
+    Transport failures, 5xx statuses left after retries and missed deadlines
+    count as failures. Answers of the API, including "no inventory" and the
+    errors it reports, do not.
+    """
+    return bool(result.get("retryable")) or (
+        result.get("no_ad_reason") == DEADLINE_EXCEEDED
+    )
+
+
+class CircuitBreaker:
+    """
+    Stop calling the ads API for a cool-down period after consecutive failures.
+
+    After ``failure_threshold`` consecutive failed calls (transport errors, 5xx
+    statuses left after retries, missed deadlines) the breaker opens and
+    ``allow`` returns False for ``cooldown`` seconds. It then lets a single trial
+    request through: a success closes it again, a failure reopens it. Share one
+    instance across tools (e.g. through ``Ads4gptsToolkit``) so they trip together.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the breaker.
+        cooldown (float): Seconds the breaker stays open before a trial request.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+        self.short_circuited = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
+
+    def allow(self) -> bool:
+        """Whether a request may go upstream now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at >= self.cooldown:
+                # One trial at a time; a trial that never reported back
+                # (e.g. it was cancelled) is replaced after another cool-down.
+                if (
+                    self._trial_started_at is None
+                    or now - self._trial_started_at >= self.cooldown
+                ):
+                    self._trial_started_at = now
+                    return True
+            self.short_circuited += 1
+            return False
+
+    def record(self, result: Dict):
+        """Record the outcome of a request let through by ``allow``."""
+        with self._lock:
+            self._trial_started_at = None
+            if not _failed(result):
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"Ads API failed {self._failures} times in a row, "
+                        f"pausing calls for {self.cooldown}s"
+                    )
+                    self.opened += 1
+                self._opened_at = time.monotonic()
+
+
+class RequestHedger:
+    """
+    Hedge slow ads API calls with a duplicate request and keep the first answer.
+
+    If a call has not answered after ``delay`` seconds, or, when ``delay`` is
+    None, after the observed ``quantile`` of recent latencies, a second identical
+    request is sent. On the async path whichever returns a successful result
+    first wins and the loser is cancelled. On the sync path both calls run on
+    worker threads and the loser is abandoned; the delay counts from when the
+    primary actually starts, not from when it was queued. Latency-based hedging
+    starts once ``min_samples`` calls were observed.
+
+    Args:
+        delay (Optional[float]): Fixed hedging delay in seconds.
+        quantile (float): Latency quantile used as the delay when ``delay`` is None.
+        min_samples (int): Observations needed before latency-based hedging starts.
+        window (int): Number of recent latencies kept.
+        max_workers (int): Threads used to run hedged synchronous calls.
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 32,
+    ):
+        self.delay = delay
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay": self.hedge_delay(),
+        }
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little data."""
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(self.quantile * len(latencies)))]
+
+    def _observe(self, started_at: float, result: Dict):
+        if not _failed(result):
+            with self._lock:
+                self._latencies.append(time.monotonic() - started_at)
+
+    def _pick(self, done, pending, primary) -> Optional[Dict]:
+        """The first successful result among ``done``, or the last one when nothing is left."""
+        for future in done:
+            result = future.result()
+            if not _failed(result) or not pending:
+                if future is not primary:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return result
+        return None
+
+    async def run(self, afetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Await ``afetch()``, hedging it with a second call when it is slow."""
+        delay = self.hedge_delay()
+        started_at = time.monotonic()
+        if delay is None:
+            result = await afetch()
+            self._observe(started_at, result)
+            return result
+        primary = asyncio.ensure_future(afetch())
+        tasks = [primary]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedged += 1
+                tasks.append(asyncio.ensure_future(afetch()))
+                pending = set(tasks)
+            while True:
+                if pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                result = self._pick(done, pending, primary)
+                if result is not None:
+                    self._observe(started_at, result)
+                    return result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def run_sync(self, fetch: Callable[[], Dict]) -> Dict:
+        """Call ``fetch()``, hedging it with a second call on a worker thread when it is slow."""
+        delay = self.hedge_delay()
+        started_at = time.monotonic()
+        if delay is None:
+            result = fetch()
+            self._observe(started_at, result)
+            return result
+        primary_started = threading.Event()
+
+        def run_primary() -> Dict:
+            nonlocal started_at
+            started_at = time.monotonic()
+            primary_started.set()
+            return fetch()
+
+        executor = self._get_executor()
+        primary = executor.submit(run_primary)
+        futures = [primary]
+        try:
+            # The delay counts from when the primary leaves the worker queue.
+            primary_started.wait()
+            done, pending = concurrent.futures.wait(futures, timeout=delay)
+            if not done:
+                with self._lock:
+                    self.hedged += 1
+                futures.append(executor.submit(fetch))
+                pending = set(futures)
+            while True:
+                if pending:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                result = self._pick(done, pending, primary)
+                if result is not None:
+                    self._observe(started_at, result)
+                    return result
+        finally:
+            # The loser is abandoned: a worker cannot be interrupted mid-call.
+            for future in futures:
+                future.cancel()
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="ads4gpts-hedge"
+                )
+            return self._executor
+
+    def close(self):
+        """Shut down the worker threads used for synchronous hedging."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
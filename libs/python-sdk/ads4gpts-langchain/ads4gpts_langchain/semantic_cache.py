@@ -0,0 +1,258 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from ads4gpts_langchain.cache import is_cacheable
+
+logger = logging.getLogger(__name__)
+
+# Fields that must match exactly for a cached result to be reused.
+PARTITION_FIELDS = (
+    "ad_format",
+    "user_gender",
+    "user_age_range",
+    "num_ads",
+    "min_bid",
+    "undesired_ads",
+)
+# Free-text fields compared by similarity.
+TEXT_FIELDS = ("context", "ad_recommendation")
+
+NUM_BITS = 256
+_WORDS = NUM_BITS // 64
+
+
+def _undesired_terms(value: Any) -> str:
+    """``undesired_ads`` as a sorted set of normalized, comma-separated terms."""
+    terms = {" ".join(term.split()).lower() for term in re.split(r"[,;]", str(value))}
+    return ",".join(sorted(term for term in terms if term))
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is None or not hasattr(numpy, "bitwise_count"):
+        raise ImportError(
+            "SemanticAdCache requires numpy>=2.0. "
+            "Install it with `pip install ads4gpts-langchain[semantic]`."
+        )
+    return numpy
+
+
+class HashedNgramVectorizer:
+    """
+    Dependency-light text vectorizer using signed, hashed character n-grams.
+
+    Args:
+        dim (int): Number of hash buckets.
+        ngram_sizes (Sequence[int]): Character n-gram lengths to extract.
+    """
+
+    def __init__(self, dim: int = 512, ngram_sizes: Sequence[int] = (3, 4)):
+        self.np = _require_numpy()
+        self.dim = dim
+        self.ngram_sizes = tuple(ngram_sizes)
+
+    def transform(self, text: str):
+        """Return the L2-normalized float32 vector of ``text``."""
+        np = self.np
+        data = " ".join(text.lower().split()).encode()
+        codes = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for n in self.ngram_sizes:
+            if len(codes) < n:
+                continue
+            # Rolling polynomial hash of every n-gram, computed for all positions at once.
+            hashes = np.zeros(len(codes) - n + 1, dtype=np.uint64)
+            for offset in range(n):
+                hashes = (
+                    hashes * np.uint64(1099511628211)
+                    + codes[offset : len(codes) - n + 1 + offset]
+                )
+            hashes ^= hashes >> np.uint64(29)
+            buckets = (hashes % np.uint64(self.dim)).astype(np.intp)
+            signs = np.where(hashes & np.uint64(1 << 40), 1.0, -1.0)
+            vector += np.bincount(buckets, weights=signs, minlength=self.dim).astype(
+                np.float32
+            )
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticAdCache:
+    """
+    Approximate ad cache matching requests whose ``context`` and
+    ``ad_recommendation`` are phrased differently but mean the same.
+
+    Each entry is stored as a 256-bit SimHash signature of its hashed n-gram
+    vector, so memory stays at a few dozen bytes per entry plus the cached
+    result. A lookup scans a 64-bit prefix of every signature with vectorized
+    popcounts, then rescores the surviving candidates on the full signature.
+    Results are only shared between requests of the same ``AdFormat``,
+    demographic bucket, ``num_ads`` and ``undesired_ads`` terms.
+
+    Args:
+        threshold (float): Minimum estimated cosine similarity for a hit.
+        ttl (float): Seconds an entry can be served.
+        max_entries (int): Capacity; the oldest entries are evicted first.
+        dim (int): Hash buckets of the n-gram vectorizer.
+        seed (int): Seed of the random hyperplanes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        ttl: float = 300.0,
+        max_entries: int = 10_000,
+        dim: int = 512,
+        seed: int = 0,
+    ):
+        np = self.np = _require_numpy()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.vectorizer = HashedNgramVectorizer(dim=dim)
+        self._planes = (
+            np.random.default_rng(seed)
+            .standard_normal((dim, NUM_BITS))
+            .astype(np.float32)
+        )
+        # Maximum Hamming distance at which two signatures can reach ``threshold``.
+        self._max_distance = int(NUM_BITS * math.acos(threshold) / math.pi)
+        # Looser bound on the 64-bit prefix, allowing for its sampling noise.
+        p = math.acos(threshold) / math.pi
+        self._max_coarse_distance = int(64 * p + 2 * math.sqrt(64 * p * (1 - p))) + 1
+        self._signatures = np.zeros((max_entries, _WORDS), dtype=np.uint64)
+        self._coarse = np.zeros(max_entries, dtype=np.uint64)
+        self._partitions = np.zeros(max_entries, dtype=np.int64)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._results: List[Optional[Dict]] = [None] * max_entries
+        self._next = 0
+        self._xor = np.empty(max_entries, dtype=np.uint64)
+        self._count = np.empty(max_entries, dtype=np.uint8)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": int((self._expires > time.monotonic()).sum()),
+        }
+
+    def _partition(self, payload: Dict[str, Any]) -> int:
+        values = {field: payload.get(field) for field in PARTITION_FIELDS}
+        # A result is never reused for a request excluding different ads.
+        values["undesired_ads"] = _undesired_terms(values["undesired_ads"] or "")
+        # Nor for a higher bid floor than it was fetched with.
+        if values["min_bid"] is not None:
+            values["min_bid"] = float(values["min_bid"])
+        key = "\x1f".join(
+            str(getattr(value, "value", value)) for value in values.values()
+        )
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little", signed=True)
+
+    def _vector(self, payload: Dict[str, Any]):
+        vector = sum(
+            self.vectorizer.transform(str(payload.get(field) or ""))
+            for field in TEXT_FIELDS
+        )
+        norm = self.np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def signatures(self, payloads: Sequence[Dict[str, Any]]):
+        """SimHash signatures of ``payloads`` as a ``(len(payloads), 4)`` uint64 array."""
+        np = self.np
+        vectors = np.stack([self._vector(payload) for payload in payloads])
+        bits = np.packbits((vectors @ self._planes) > 0, axis=1)
+        return np.ascontiguousarray(bits).view(np.uint64)
+
+    def _search(self, signature, partition: int, now: float) -> Optional[Dict]:
+        np = self.np
+        np.bitwise_xor(self._coarse, signature[0], out=self._xor)
+        np.bitwise_count(self._xor, out=self._count)
+        candidates = np.flatnonzero(self._count <= self._max_coarse_distance)
+        if not len(candidates):
+            return None
+        candidates = candidates[
+            (self._partitions[candidates] == partition)
+            & (self._expires[candidates] > now)
+        ]
+        if not len(candidates):
+            return None
+        distances = np.bitwise_count(self._signatures[candidates] ^ signature).sum(
+            axis=1
+        )
+        best = int(distances.argmin())
+        if distances[best] > self._max_distance:
+            return None
+        return self._results[candidates[best]]
+
+    def similarity(self, a: Dict[str, Any], b: Dict[str, Any]) -> float:
+        """Estimated cosine similarity between the text fields of two payloads."""
+        first, second = self.signatures([a, b])
+        distance = int(self.np.bitwise_count(first ^ second).sum())
+        return math.cos(math.pi * distance / NUM_BITS)
+
+    def get_many(self, payloads: Sequence[Dict[str, Any]]) -> List[Optional[Dict]]:
+        """Batched lookup; signatures of all payloads are computed in one pass."""
+        if not payloads:
+            return []
+        signatures = self.signatures(payloads)
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for payload, signature in zip(payloads, signatures):
+                result = self._search(signature, self._partition(payload), now)
+                if result is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                results.append(result)
+        return results
+
+    def get(self, payload: Dict[str, Any]) -> Optional[Dict]:
+        return self.get_many([payload])[0]
+
+    def set(self, payload: Dict[str, Any], result: Dict):
+        """Store a result if it is cacheable, evicting the oldest entry when full."""
+        if not is_cacheable(result):
+            return
+        signature = self.signatures([payload])[0]
+        with self._lock:
+            slot = self._next
+            self._next = (slot + 1) % self.max_entries
+            self._signatures[slot] = signature
+            self._coarse[slot] = signature[0]
+            self._partitions[slot] = self._partition(payload)
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._results[slot] = result
+
+    def get_or_fetch(self, payload: Dict[str, Any], fetch: Callable[[], Dict]) -> Dict:
+        """Serve a similar cached request or call ``fetch`` and remember its result."""
+        result = self.get(payload)
+        if result is not None:
+            return dict(result)
+        result = fetch()
+        self.set(payload, result)
+        return result
+
+    async def aget_or_fetch(
+        self, payload: Dict[str, Any], fetch: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        """Async counterpart of ``get_or_fetch``."""
+        result = self.get(payload)
+        if result is not None:
+            return dict(result)
+        result = await fetch()
+        self.set(payload, result)
+        return result
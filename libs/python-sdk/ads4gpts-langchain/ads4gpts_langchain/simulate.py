@@ -0,0 +1,233 @@
+"""
+Offline simulation of ad frequency policies over recorded conversations.
+
+Replays JSONL turn logs, one ``{"conversation_id": ..., "timestamp": ...}``
+object per turn (``user_id`` optional), through a frequency decision and reports
+ad API calls, ad density and projected API QPS before a policy is deployed.
+
+    python -m ads4gpts_langchain.simulate turns.jsonl --policy fibonacci
+    python -m ads4gpts_langchain.simulate turns.jsonl --policy every:3,daily:5 --scale 100
+    python -m ads4gpts_langchain.simulate turns.jsonl --frequency-function my_app.utils:next_fibonacci_number
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import sys
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ads4gpts_langchain.frequency import (
+    DailyCap,
+    EveryN,
+    FibonacciBackoff,
+    FrequencyEngine,
+    FrequencyPolicy,
+    FrequencyRecord,
+    MinInterval,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    # Parsing dominates the replay; orjson is several times faster when installed.
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+# (key, timestamp) -> whether the turn gets an ad.
+Decider = Callable[[str, float], bool]
+
+
+def engine_decider(policies: Iterable[FrequencyPolicy]) -> Decider:
+    """
+    Decide with the ``FrequencyEngine`` policies on the logs' timestamps.
+
+    The replay is single threaded, so records are kept in a plain dict rather
+    than behind a store's lock.
+    """
+    engine = FrequencyEngine(list(policies))
+    records: Dict[str, FrequencyRecord] = {}
+
+    def decide(key: str, timestamp: float) -> bool:
+        record = records.get(key)
+        if record is None:
+            record = records[key] = FrequencyRecord()
+        return engine._decide(record, timestamp)
+
+    return decide
+
+
+def frequency_function_decider(
+    next_frequency: Callable[[int], int], initial: int = 1
+) -> Decider:
+    """
+    Decide like the example graphs' ``agent_edge``: count turns since the last ad,
+    show one once the count reaches the frequency, then move the frequency on with
+    ``next_frequency`` (e.g. ``next_fibonacci_number``).
+    """
+    counters: Dict[str, List[int]] = {}
+
+    def decide(key: str, timestamp: float) -> bool:
+        state = counters.get(key)
+        if state is None:
+            state = counters[key] = [0, initial]
+        state[0] += 1
+        if state[0] < state[1]:
+            return False
+        state[0] = 0
+        state[1] = next_frequency(state[1])
+        return True
+
+    return decide
+
+
+def parse_policies(spec: str) -> List[FrequencyPolicy]:
+    """
+    Parse a comma separated policy spec, e.g. ``"fibonacci:13,daily:5"``.
+
+    ``every:N``, ``fibonacci[:MAX_GAP]``, ``interval:SECONDS``, ``daily:MAX_ADS``.
+    """
+    policies: List[FrequencyPolicy] = []
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, arg = part.partition(":")
+        if name == "every":
+            policies.append(EveryN(int(arg)))
+        elif name == "fibonacci":
+            policies.append(FibonacciBackoff(max_gap=int(arg) if arg else None))
+        elif name == "interval":
+            policies.append(MinInterval(float(arg)))
+        elif name == "daily":
+            policies.append(DailyCap(int(arg)))
+        else:
+            raise ValueError(f"Unknown frequency policy: {part}")
+    return policies
+
+
+def load_function(path: str) -> Callable[[int], int]:
+    """Import ``module:attribute``."""
+    module, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _percentile(values: List[int], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return float(values[min(len(values) - 1, int(q * len(values)))])
+
+
+def simulate(
+    lines: Iterable[str],
+    decide: Decider,
+    per_user: bool = False,
+    ad_latency_ms: float = 0.0,
+    scale: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    Replay JSONL turn records through ``decide`` in a single streaming pass.
+
+    Every ad turn costs one API call. Memory grows with the number of
+    conversations and seconds covered, not with the number of turns.
+
+    Args:
+        lines (Iterable[str]): JSONL turn records, in timestamp order.
+        decide (Decider): Frequency decision per turn.
+        per_user (bool): Key the decisions by ``user_id`` rather than ``conversation_id``.
+        ad_latency_ms (float): Latency an ad turn adds, for the latency cost.
+        scale (float): Production traffic over logged traffic, for the projected QPS.
+
+    Returns:
+        Dict: Turn, ad turn and API call totals; calls per conversation (mean,
+        p50, p95, max); ad density; added latency; and mean and peak QPS over
+        one-second buckets, scaled by ``scale``.
+    """
+    calls = Counter()
+    per_second = Counter()
+    turns = ad_turns = 0
+    first = last = None
+    loads = _loads
+    for line in lines:
+        if not line.strip():
+            continue
+        record = loads(line)
+        conversation = str(record["conversation_id"])
+        timestamp = float(record.get("timestamp", 0.0))
+        key = str(record.get("user_id", conversation)) if per_user else conversation
+        turns += 1
+        if first is None:
+            first = timestamp
+        last = timestamp
+        if decide(key, timestamp):
+            ad_turns += 1
+            calls[conversation] += 1
+            per_second[int(timestamp)] += 1
+        elif conversation not in calls:
+            calls[conversation] = 0
+    span = (last - first) if turns else 0.0
+    counts = list(calls.values())
+    return {
+        "conversations": len(counts),
+        "turns": turns,
+        "ad_turns": ad_turns,
+        "api_calls": ad_turns,
+        "calls_per_conversation": {
+            "mean": ad_turns / len(counts) if counts else 0.0,
+            "p50": _percentile(counts, 0.5),
+            "p95": _percentile(counts, 0.95),
+            "max": max(counts, default=0),
+        },
+        "ad_density": ad_turns / turns if turns else 0.0,
+        "added_latency_ms": {
+            "total": ad_turns * ad_latency_ms,
+            "per_turn": ad_turns * ad_latency_ms / turns if turns else 0.0,
+        },
+        "span_seconds": span,
+        "projected_qps": {
+            "mean": ad_turns / span * scale if span > 0 else 0.0,
+            "peak": max(per_second.values(), default=0) * scale,
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log", help="JSONL turn log; - for stdin")
+    policy = parser.add_mutually_exclusive_group(required=True)
+    policy.add_argument(
+        "--policy", help="e.g. fibonacci, every:3, fibonacci:13,daily:5"
+    )
+    policy.add_argument(
+        "--frequency-function",
+        help="module:function mapping the current frequency to the next one",
+    )
+    parser.add_argument("--initial-frequency", type=int, default=1)
+    parser.add_argument("--per-user", action="store_true")
+    parser.add_argument("--ad-latency-ms", type=float, default=0.0)
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    if args.policy:
+        decide = engine_decider(parse_policies(args.policy))
+    else:
+        decide = frequency_function_decider(
+            load_function(args.frequency_function), args.initial_frequency
+        )
+    log = sys.stdin if args.log == "-" else open(args.log)
+    try:
+        report = simulate(
+            log,
+            decide,
+            per_user=args.per_user,
+            ad_latency_ms=args.ad_latency_ms,
+            scale=args.scale,
+        )
+    finally:
+        if log is not sys.stdin:
+            log.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
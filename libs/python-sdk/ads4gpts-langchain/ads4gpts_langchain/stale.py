@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Set, Tuple
+
+from ads4gpts_langchain.cache import VOLATILE_FIELDS, is_cacheable, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Pre-chat formats, for which an ad a few minutes old is as good as a fresh one.
+DEFAULT_MAX_STALE = {"SUGGESTED_PROMPT": 600.0, "SUGGESTED_BANNER": 600.0}
+
+
+def _format(payload: Dict[str, Any]) -> str:
+    ad_format = payload.get("ad_format")
+    return str(getattr(ad_format, "value", ad_format))
+
+
+class StaleAdCache:
+    """
+    Stale-while-revalidate serving of ad results.
+
+    For the formats in ``max_stale``, the last good result of an equivalent
+    request (same key as ``AdCache``) is returned at once. Once it is older than
+    ``refresh_after`` seconds, a background refresh replaces it: a task on the
+    running event loop in the async path, a bounded thread pool in the sync path.
+    A result older than its format's ``max_stale`` limit is not served and the
+    caller waits for a fresh one. Other formats pass straight through.
+
+    At most ``max_refreshes`` refreshes run at a time, one per key; a refresh
+    that would exceed the cap is skipped and the stale result is still served.
+    Results without ads never replace a good one. A refresh calls ``refresh``
+    when given, which should bypass any cache below this tier: a cache would
+    hand back the result being refreshed and stamp old data as fresh.
+
+    Args:
+        max_stale (Optional[Dict[str, float]]): Seconds a result may be served per
+            ad format; defaults to ``DEFAULT_MAX_STALE``.
+        refresh_after (float): Age in seconds after which serving a result refreshes it.
+        max_refreshes (int): Concurrent background refreshes, also the thread pool size.
+        max_entries (int): Maximum number of results kept; least recently used are evicted.
+        exclude_fields (FrozenSet[str]): Payload fields left out of the key.
+        clock (Callable[[], float]): Monotonic time source.
+    """
+
+    def __init__(
+        self,
+        max_stale: Optional[Dict[str, float]] = None,
+        refresh_after: float = 30.0,
+        max_refreshes: int = 4,
+        max_entries: int = 1024,
+        exclude_fields: FrozenSet[str] = VOLATILE_FIELDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_stale = dict(DEFAULT_MAX_STALE if max_stale is None else max_stale)
+        self.refresh_after = refresh_after
+        self.max_refreshes = max_refreshes
+        self.max_entries = max_entries
+        self.exclude_fields = exclude_fields
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refreshes_skipped = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "refreshes_skipped": self.refreshes_skipped,
+            "refreshing": len(self._refreshing),
+            "entries": len(self._entries),
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str, limit: float) -> Tuple[Optional[Dict], bool]:
+        """The servable result for ``key`` and whether it is due for a refresh."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] > limit:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if now - entry[0] < self.refresh_after:
+                self.hits += 1
+                return dict(entry[1]), False
+            self.stale_hits += 1
+            if key in self._refreshing:
+                return dict(entry[1]), False
+            if len(self._refreshing) >= self.max_refreshes:
+                self.refreshes_skipped += 1
+                return dict(entry[1]), False
+            self._refreshing.add(key)
+            return dict(entry[1]), True
+
+    def _store(self, key: str, result: Dict):
+        if not is_cacheable(result):
+            return
+        with self._lock:
+            self._entries[key] = (self.clock(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _refreshed(self, key: str, result: Optional[Dict]):
+        if result is not None:
+            self._store(key, result)
+        with self._lock:
+            self._refreshing.discard(key)
+            if result is not None and is_cacheable(result):
+                self.refreshes += 1
+            else:
+                self.refresh_failures += 1
+
+    def _refresh(self, key: str, fetch: Callable[[], Dict]):
+        result = None
+        try:
+            result = fetch()
+        except Exception as err:
+            logger.warning(f"Background ad refresh failed: {err}")
+        finally:
+            self._refreshed(key, result)
+
+    async def _arefresh(self, key: str, fetch: Callable[[], Awaitable[Dict]]):
+        result = None
+        try:
+            result = await fetch()
+        except Exception as err:
+            logger.warning(f"Background ad refresh failed: {err}")
+        finally:
+            self._refreshed(key, result)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_refreshes,
+                    thread_name_prefix="ads4gpts-refresh",
+                )
+            return self._executor
+
+    def get_or_fetch(
+        self,
+        payload: Dict[str, Any],
+        fetch: Callable[[], Dict],
+        refresh: Optional[Callable[[], Dict]] = None,
+    ) -> Dict:
+        """Serve the last good result for ``payload``, refreshing it in the background."""
+        limit = self.max_stale.get(_format(payload))
+        if limit is None:
+            return fetch()
+        key = make_cache_key(payload, self.exclude_fields)
+        result, stale = self._lookup(key, limit)
+        if result is None:
+            result = fetch()
+            self._store(key, result)
+            return result
+        if stale:
+            try:
+                self._pool().submit(self._refresh, key, refresh or fetch)
+            except RuntimeError:
+                # ``close`` shut the pool down concurrently.
+                self._refreshed(key, None)
+        return result
+
+    async def aget_or_fetch(
+        self,
+        payload: Dict[str, Any],
+        fetch: Callable[[], Awaitable[Dict]],
+        refresh: Optional[Callable[[], Awaitable[Dict]]] = None,
+    ) -> Dict:
+        """Async ``get_or_fetch``; refreshes run as tasks on the running loop."""
+        limit = self.max_stale.get(_format(payload))
+        if limit is None:
+            return await fetch()
+        key = make_cache_key(payload, self.exclude_fields)
+        result, stale = self._lookup(key, limit)
+        if result is None:
+            result = await fetch()
+            self._store(key, result)
+            return result
+        if stale:
+            task = asyncio.ensure_future(self._arefresh(key, refresh or fetch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        """Stop the refresh thread pool without waiting for running refreshes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    async def aclose(self):
+        """Cancel pending async refreshes and stop the refresh thread pool."""
+        for task in list(self._tasks):
+            task.cancel()
+        self.close()
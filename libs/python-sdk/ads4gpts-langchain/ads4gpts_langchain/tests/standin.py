@@ -0,0 +1,258 @@
+"""
+Local stand-ins for the Ads4GPTs ads API and a Redis server.
+
+Used by the tests and the benchmarks in ``benchmarks/`` so transport behaviour
+and shared caching can be exercised without reaching the real services.
+"""
+
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+
+def success_response(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a successful ads API response echoing the requested ad format."""
+    num_ads = payload.get("num_ads", 1)
+    return {
+        "payload": {
+            "status": "success",
+            "data": {
+                "advertiser_agents": [
+                    {
+                        "ad_id": f"ad-{i}",
+                        "ad_format": payload.get("ad_format"),
+                        "ad_title": "Stand-in ad",
+                        "ad_body": "Stand-in ad body",
+                        "ad_link": "https://example.com",
+                    }
+                    for i in range(num_ads)
+                ]
+            },
+        }
+    }
+
+
+def batch_response(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer a batch request with one successful response per request id."""
+    return {
+        "responses": [
+            {"id": item["id"], **success_response(item["payload"])}
+            for item in body.get("requests", [])
+        ]
+    }
+
+
+def default_responder(path: str, body: Dict[str, Any]):
+    if path.rstrip("/").endswith("batch"):
+        return 200, batch_response(body)
+    return 200, success_response(body)
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        super().handle()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.requests.append({"path": self.path, "body": body})
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        status, response, *extra = self.server.responder(self.path, body)
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        for name, value in (extra[0] if extra else {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    # Bursts of concurrent connections must not overflow the listen backlog.
+    request_queue_size = 128
+
+
+class StandInAdServer:
+    """
+    Threaded HTTP/1.1 server answering ads API requests on localhost.
+
+    Paths ending in ``batch/`` are answered as batch requests.
+
+    Args:
+        latency (float): Seconds to sleep before answering each request.
+        responder (Callable): Optional ``(path, body) -> (status, json)`` override;
+            it may return ``(status, json, headers)`` to add response headers.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        responder: Optional[Callable[[str, Dict], Any]] = None,
+    ):
+        self._server = _StandInHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        self._server.daemon_threads = True
+        self._server.lock = threading.Lock()
+        self._server.connections = 0
+        self._server.requests = []
+        self._server.latency = latency
+        self._server.responder = responder or default_responder
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    @property
+    def requests(self) -> List[Dict[str, Any]]:
+        return self._server.requests
+
+    def start(self) -> "StandInAdServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInAdServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _StandInRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                command = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            self.wfile.write(self.server.execute(command))
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class StandInRedisServer:
+    """
+    Threaded localhost server speaking the subset of RESP2 the cache backend uses:
+    PING, GET, SET (with PX), DEL, SCAN (with MATCH) and SELECT.
+
+    Args:
+        latency (float): Seconds to sleep before answering each command.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self._server = socketserver.ThreadingTCPServer(
+            ("127.0.0.1", 0), _StandInRedisHandler
+        )
+        self._server.daemon_threads = True
+        self._server.latency = latency
+        self._server.execute = self.execute
+        self.data: Dict[bytes, tuple] = {}
+        self.commands: List[List[bytes]] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def latency(self) -> float:
+        return self._server.latency
+
+    @latency.setter
+    def latency(self, value: float):
+        self._server.latency = value
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"redis://{host}:{port}/0"
+
+    def execute(self, command: List[bytes]) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        now = time.monotonic()
+        with self._lock:
+            self.commands.append(command)
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"SELECT":
+                return b"+OK\r\n"
+            if name == b"GET":
+                entry = self.data.get(args[0])
+                if entry is None or (entry[1] is not None and entry[1] < now):
+                    return _bulk(None)
+                return _bulk(entry[0])
+            if name == b"SET":
+                expires_at = None
+                if len(args) >= 4 and args[2].upper() == b"PX":
+                    expires_at = now + int(args[3]) / 1000
+                self.data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+            if name == b"DEL":
+                removed = sum(self.data.pop(key, None) is not None for key in args)
+                return b":%d\r\n" % removed
+            if name == b"SCAN":
+                prefix = args[args.index(b"MATCH") + 1].rstrip(b"*")
+                keys = [key for key in self.data if key.startswith(prefix)]
+                return (
+                    b"*2\r\n"
+                    + _bulk(b"0")
+                    + b"*%d\r\n" % len(keys)
+                    + b"".join(_bulk(key) for key in keys)
+                )
+        return b"-ERR unknown command\r\n"
+
+    def start(self) -> "StandInRedisServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInRedisServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,108 @@
+import json
+import pytest
+from typing import Annotated, List, TypedDict
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from ads4gpts_langchain.ad_node import (
+    Ads4gptsAdNode,
+    ad_recommendation_from_messages,
+    keywords,
+    recent_context,
+)
+from ads4gpts_langchain.render import AdRenderer
+from ads4gpts_langchain.tools import AdFormat, Ads4gptsAdTool
+
+ADS = {"advertiser_agents": [{"ad_id": "ad-1"}]}
+MESSAGES = [
+    HumanMessage(content="I'm training for my first marathon in spring"),
+    AIMessage(content="Great! Build your mileage gradually."),
+    HumanMessage(content="Which running shoes are good for marathon training?"),
+]
+
+
+class State(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+    ad_counter: int
+    gender: str
+
+
+def test_keywords_prefer_recent_terms():
+    assert keywords(MESSAGES, top_k=2) == ["marathon", "training"]
+    assert "running" in ad_recommendation_from_messages(MESSAGES)
+    assert "mileage" not in ad_recommendation_from_messages(MESSAGES)
+
+
+def test_context_is_trimmed_to_latest_text():
+    context = recent_context(MESSAGES, max_chars=40)
+    assert len(context) == 40
+    assert context.endswith("marathon training?")
+
+
+@patch("ads4gpts_langchain.tools.async_get_ads")
+@pytest.mark.asyncio
+async def test_node_builds_request_from_state(mock_async_get_ads):
+    mock_async_get_ads.return_value = ADS
+    node = Ads4gptsAdNode(
+        ads4gpts_api_key="test_api_key",
+        ad_format=AdFormat.INLINE_BANNER,
+        extractors={"user_persona": lambda messages: "runner"},
+        fields={"num_ads": 2},
+        state_fields={"user_gender": "gender"},
+    )
+    update = await node(
+        {"messages": MESSAGES, "gender": "FEMALE"},
+        {"configurable": {"thread_id": "thread-1"}},
+    )
+    payload = mock_async_get_ads.call_args.kwargs["payload"]
+    assert payload["ad_format"] == "INLINE_BANNER"
+    assert payload["user_persona"] == "runner"
+    assert payload["user_gender"] == "FEMALE"
+    assert payload["num_ads"] == 2
+    assert payload["session_id"] == "thread-1"
+    assert "marathon" in payload["ad_recommendation"]
+    assert json.loads(update["messages"][0].content) == ADS
+    assert update["ad_counter"] == 0
+
+
+@patch("ads4gpts_langchain.tools.async_get_ads")
+@pytest.mark.asyncio
+async def test_node_in_graph_without_llm(mock_async_get_ads):
+    mock_async_get_ads.return_value = ADS
+    workflow = StateGraph(State)
+    workflow.add_node("ad_node", Ads4gptsAdNode(ads4gpts_api_key="test_api_key"))
+    workflow.add_edge(START, "ad_node")
+    workflow.add_edge("ad_node", END)
+    result = await workflow.compile().ainvoke({"messages": MESSAGES, "ad_counter": 3})
+    assert result["ad_counter"] == 0
+    assert json.loads(result["messages"][-1].content) == ADS
+    mock_async_get_ads.assert_called_once()
+
+
+@patch("ads4gpts_langchain.tools.async_get_ads")
+@pytest.mark.asyncio
+async def test_node_renders_ads_of_tool_with_renderer(mock_async_get_ads):
+    mock_async_get_ads.return_value = {
+        "advertiser_agents": [{"ad_id": "ad-1", "ad_text": "Try our shoes"}]
+    }
+    node = Ads4gptsAdNode(
+        tool=Ads4gptsAdTool(ads4gpts_api_key="test_api_key", renderer=AdRenderer())
+    )
+    update = await node({"messages": MESSAGES})
+    assert update["messages"][0].content == "_Sponsored_\nTry our shoes"
+
+
+@patch("ads4gpts_langchain.tools.async_get_ads")
+@pytest.mark.asyncio
+async def test_node_ignores_render_agent_routing(mock_async_get_ads):
+    mock_async_get_ads.return_value = ADS
+    node = Ads4gptsAdNode(
+        tool=Ads4gptsAdTool(
+            ads4gpts_api_key="test_api_key", ads4gpts_render_agent="render_agent"
+        )
+    )
+    update = await node({"messages": MESSAGES})
+    assert json.loads(update["messages"][0].content) == ADS
@@ -0,0 +1,126 @@
+import ast
+import asyncio
+import time
+import pytest
+
+from ads4gpts_langchain.batching import AdRequestBatcher
+from ads4gpts_langchain.tools import Ads4gptsInlineBannerTool
+from ads4gpts_langchain.transport import AsyncTransport
+from ads4gpts_langchain.utils import Deadline
+from ads4gpts_langchain.tests.standin import StandInAdServer
+
+HEADERS = {"Authorization": "Bearer test_api_key"}
+
+
+def tool_kwargs(index):
+    return dict(
+        tid="aadc300e-6957-480a-9685-7628446fc319",
+        user_gender="UNDISCLOSED",
+        ad_recommendation="test_recommendation",
+        undesired_ads="test_undesired_ads",
+        context="test_context",
+        num_ads=index % 3 + 1,
+        tool_call_id=f"call_{index}",
+    )
+
+
+@pytest.fixture
+def server():
+    with StandInAdServer() as server:
+        yield server
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_coalesces_and_fans_out(server):
+    batcher = AdRequestBatcher(max_batch_size=4, batch_endpoint="batch/")
+    async with AsyncTransport() as transport:
+        results = await asyncio.gather(
+            *(
+                batcher.submit(server.url, HEADERS, {"num_ads": n}, transport=transport)
+                for n in range(1, 9)
+            )
+        )
+    assert [len(result["advertiser_agents"]) for result in results] == list(range(1, 9))
+    assert [request["path"] for request in server.requests] == ["/batch/"] * 2
+
+
+@pytest.mark.asyncio
+async def test_wait_window_flushes_partial_batch(server):
+    batcher = AdRequestBatcher(
+        max_batch_size=100, max_wait_ms=1.0, batch_endpoint="batch/"
+    )
+    async with AsyncTransport() as transport:
+        result = await batcher.submit(
+            server.url, HEADERS, {"num_ads": 2}, transport=transport
+        )
+    assert len(result["advertiser_agents"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_without_batch_endpoint_requests_pass_through(server):
+    batcher = AdRequestBatcher(max_batch_size=100, max_wait_ms=1000.0)
+    async with AsyncTransport() as transport:
+        started = time.monotonic()
+        result = await batcher.submit(
+            server.url, HEADERS, {"num_ads": 1}, transport=transport
+        )
+    assert time.monotonic() - started < 0.5
+    assert len(result["advertiser_agents"]) == 1
+    assert [request["path"] for request in server.requests] == ["/"]
+
+
+@pytest.mark.asyncio
+async def test_wait_window_is_clipped_to_caller_deadline(server):
+    batcher = AdRequestBatcher(
+        max_batch_size=100, max_wait_ms=1000.0, batch_endpoint="batch/"
+    )
+    async with AsyncTransport() as transport:
+        started = time.monotonic()
+        results = await asyncio.gather(
+            batcher.submit(server.url, HEADERS, {"num_ads": 1}, transport=transport),
+            batcher.submit(
+                server.url,
+                HEADERS,
+                {"num_ads": 2},
+                transport=transport,
+                deadline=Deadline(0.3),
+            ),
+        )
+    assert time.monotonic() - started < 0.5
+    assert [len(result["advertiser_agents"]) for result in results] == [1, 2]
+    assert [request["path"] for request in server.requests] == ["/batch/"]
+
+
+@pytest.mark.asyncio
+async def test_batch_error_reaches_every_caller():
+    with StandInAdServer(responder=lambda path, body: (200, {})) as server:
+        batcher = AdRequestBatcher(max_batch_size=2, batch_endpoint="batch/")
+        async with AsyncTransport() as transport:
+            results = await asyncio.gather(
+                *(
+                    batcher.submit(server.url, HEADERS, {}, transport=transport)
+                    for _ in range(2)
+                )
+            )
+    assert results == [{"error": "Unexpected batch response format"}] * 2
+
+
+@pytest.mark.asyncio
+async def test_tool_arun_uses_batcher(server):
+    batcher = AdRequestBatcher(max_batch_size=3, batch_endpoint="batch/")
+    async with Ads4gptsInlineBannerTool(
+        ads4gpts_api_key="test_api_key",
+        base_url=server.url,
+        batcher=batcher,
+        async_transport=AsyncTransport(),
+        ads4gpts_render_agent="render_agent",
+    ) as tool:
+        commands = await asyncio.gather(
+            *(tool._arun(**tool_kwargs(i)) for i in range(3))
+        )
+    for index, command in enumerate(commands):
+        message = command.update["messages"][0]
+        assert message.tool_call_id == f"call_{index}"
+        ads = ast.literal_eval(message.content)
+        assert len(ads["advertiser_agents"]) == index % 3 + 1
+    assert len(server.requests) == 1
@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from ads4gpts_langchain.cache import AdCache, make_cache_key
+from ads4gpts_langchain.tools import Ads4gptsInlineSponsoredResponseTool
+from ads4gpts_langchain.utils import (
+    DEADLINE_EXCEEDED,
+    NO_ADVERTISER_AGENTS,
+    Deadline,
+    get_ads,
+    no_ad_result,
+)
+from ads4gpts_langchain.tests.standin import StandInAdServer
+
+ADS = {"advertiser_agents": [{"ad_id": "ad-1"}]}
+PAYLOAD = {
+    "tid": "aadc300e-6957-480a-9685-7628446fc319",
+    "session_id": "session-1",
+    "ad_format": "INLINE_BANNER",
+    "context": "Looking for  Running shoes",
+    "num_ads": 1,
+}
+
+
+def test_cache_key_ignores_per_impression_fields_and_formatting():
+    other = dict(
+        PAYLOAD,
+        tid="0a9f7e8f-1111-4a4b-9c4f-1d2e3f4a5b6c",
+        session_id="session-2",
+        context="looking for running shoes ",
+    )
+    assert make_cache_key(PAYLOAD) == make_cache_key(other)
+    assert make_cache_key(PAYLOAD) != make_cache_key(dict(PAYLOAD, num_ads=2))
+
+
+def test_get_or_fetch_counts_hits_and_misses():
+    cache = AdCache()
+    calls = []
+    fetch = lambda: calls.append(1) or ADS
+    assert cache.get_or_fetch(PAYLOAD, fetch) == ADS
+    assert cache.get_or_fetch(PAYLOAD, fetch) == ADS
+    assert len(calls) == 1
+    assert cache.stats == {"hits": 1, "misses": 1, "coalesced": 0, "entries": 1}
+
+
+def test_errors_are_not_cached():
+    cache = AdCache()
+    cache.get_or_fetch(PAYLOAD, lambda: {"error": "boom"})
+    assert len(cache) == 0
+
+
+def test_negative_results_are_cached_briefly_per_format():
+    cache = AdCache(negative_ttl={"INLINE_BANNER": 0.05})
+    calls = []
+    empty = lambda: calls.append(1) or {"error": NO_ADVERTISER_AGENTS}
+    assert cache.get_or_fetch(PAYLOAD, empty) == {"error": NO_ADVERTISER_AGENTS}
+    assert cache.get_or_fetch(PAYLOAD, empty) == {"error": NO_ADVERTISER_AGENTS}
+    assert len(calls) == 1
+    assert cache.stats["negative_hits"] == 1
+    assert len(cache) == 0
+    time.sleep(0.06)
+    assert cache.get_or_fetch(PAYLOAD, lambda: ADS) == ADS
+    assert cache.stats["negative_entries"] == 0
+    prompt = dict(PAYLOAD, ad_format="SUGGESTED_PROMPT")
+    cache.get_or_fetch(prompt, empty)
+    cache.get_or_fetch(prompt, empty)
+    assert len(calls) == 3
+
+
+def test_transport_errors_are_not_negatively_cached():
+    cache = AdCache(negative_ttl=30.0)
+    calls = []
+    failing = lambda: calls.append(1) or {"error": "Connection refused"}
+    cache.get_or_fetch(PAYLOAD, failing)
+    cache.get_or_fetch(PAYLOAD, failing)
+    assert len(calls) == 2
+    assert cache.stats["negative_hits"] == 0
+
+
+@pytest.mark.asyncio
+async def test_api_error_status_is_negatively_cached():
+    def responder(path, body):
+        return 200, {"payload": {"status": "error", "error": {"message": "bad"}}}
+
+    cache = AdCache(negative_ttl=30.0)
+    with StandInAdServer(responder=responder) as server:
+        fetch = lambda: get_ads(server.url, {}, PAYLOAD)
+        assert cache.get_or_fetch(PAYLOAD, fetch) == {"error": "bad", "status": "error"}
+
+        async def afetch():
+            raise AssertionError("negative result not served from the cache")
+
+        assert (await cache.aget_or_fetch(PAYLOAD, afetch))["error"] == "bad"
+        assert len(server.requests) == 1
+
+
+def test_ttl_expiry_and_lru_eviction():
+    cache = AdCache(ttl=0.05, max_entries=2)
+    for num_ads in (1, 2, 3):
+        cache.set(cache.key(dict(PAYLOAD, num_ads=num_ads)), ADS)
+    assert len(cache) == 2
+    assert cache.get(cache.key(dict(PAYLOAD, num_ads=1))) is None
+    time.sleep(0.06)
+    assert cache.get(cache.key(dict(PAYLOAD, num_ads=3))) is None
+
+
+def test_concurrent_sync_misses_make_one_call():
+    cache = AdCache()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait()
+        return ADS
+
+    threads = [
+        threading.Thread(target=cache.get_or_fetch, args=(PAYLOAD, fetch))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    while cache.coalesced < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_coalesced_sync_caller_waits_within_its_deadline():
+    cache = AdCache()
+    release = threading.Event()
+    leader = threading.Thread(
+        target=cache.get_or_fetch, args=(PAYLOAD, lambda: release.wait() and ADS)
+    )
+    leader.start()
+    while not cache._calls:
+        time.sleep(0.001)
+    started = time.monotonic()
+    result = cache.get_or_fetch(PAYLOAD, lambda: ADS, deadline=Deadline(0.05))
+    assert result == no_ad_result(DEADLINE_EXCEEDED)
+    assert time.monotonic() - started < 0.5
+    release.set()
+    leader.join()
+    assert cache.get_or_fetch(PAYLOAD, lambda: None) == ADS
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_misses_make_one_call():
+    cache = AdCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ADS
+
+    results = await asyncio.gather(
+        *(cache.aget_or_fetch(PAYLOAD, fetch) for _ in range(5))
+    )
+    assert results == [ADS] * 5
+    assert len(calls) == 1
+    assert cache.stats["coalesced"] == 4
+
+
+def test_leader_result_is_a_copy_of_the_cached_entry():
+    cache = AdCache()
+    result = cache.get_or_fetch(PAYLOAD, lambda: dict(ADS))
+    result["advertiser_agents"] = []
+    assert cache.get_or_fetch(PAYLOAD, lambda: None) == ADS
+
+
+@pytest.mark.asyncio
+async def test_cancelled_async_leader_gives_followers_no_ad():
+    cache = AdCache()
+
+    async def fetch():
+        await asyncio.sleep(1)
+        return ADS
+
+    leader = asyncio.ensure_future(cache.aget_or_fetch(PAYLOAD, fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(cache.aget_or_fetch(PAYLOAD, fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == no_ad_result(DEADLINE_EXCEEDED)
+    assert not cache._async_calls
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_tool_run_serves_from_cache(mock_get_ads):
+    mock_get_ads.return_value = ADS
+    tool = Ads4gptsInlineSponsoredResponseTool(
+        ads4gpts_api_key="test_api_key", cache=AdCache()
+    )
+    kwargs = dict(
+        tid="aadc300e-6957-480a-9685-7628446fc319",
+        user_gender="FEMALE",
+        ad_recommendation="test_recommendation",
+        undesired_ads="test_undesired_ads",
+        context="test_context",
+        tool_call_id="test_call_id",
+    )
+    assert tool._run(**kwargs) == ADS
+    assert tool._run(**dict(kwargs, tool_call_id="other_call_id")) == ADS
+    mock_get_ads.assert_called_once()
@@ -0,0 +1,134 @@
+import multiprocessing
+import time
+import pytest
+
+from ads4gpts_langchain.cache import AdCache
+from ads4gpts_langchain.cache_backends import (
+    CacheBackend,
+    MmapCacheBackend,
+    RedisCacheBackend,
+    SQLiteCacheBackend,
+    decode_result,
+    encode_result,
+)
+from ads4gpts_langchain.tests.standin import StandInRedisServer
+
+ADS = {"advertiser_agents": [{"ad_id": "ad-1", "ad_title": "Stand-in ad"}]}
+PAYLOAD = {"ad_format": "INLINE_BANNER", "context": "running shoes", "num_ads": 1}
+
+
+@pytest.fixture
+def redis_server():
+    with StandInRedisServer() as server:
+        yield server
+
+
+@pytest.fixture(params=["mmap", "sqlite", "redis"])
+def backend(request, tmp_path, redis_server):
+    if request.param == "mmap":
+        backend = MmapCacheBackend(str(tmp_path / "cache"), slots=64, slot_size=512)
+    elif request.param == "sqlite":
+        backend = SQLiteCacheBackend(str(tmp_path / "cache.db"))
+    else:
+        backend = RedisCacheBackend(redis_server.url)
+    yield backend
+    backend.close()
+
+
+class SlowBackend(CacheBackend):
+    def get(self, key):
+        raise TimeoutError("backend timed out")
+
+    def set(self, key, value, ttl):
+        raise TimeoutError("backend timed out")
+
+    def delete(self, key):
+        raise TimeoutError("backend timed out")
+
+    def clear(self):
+        raise TimeoutError("backend timed out")
+
+
+def test_encoding_round_trip_is_compact():
+    data = encode_result(ADS)
+    assert decode_result(data) == ADS
+    assert decode_result(b"?unknown") is None
+    assert len(data) < len(str(ADS))
+
+
+def test_backend_get_set_delete_and_expiry(backend):
+    key = AdCache().key(PAYLOAD)
+    assert backend.get(key) is None
+    backend.set(key, b"value", ttl=60)
+    assert backend.get(key) == b"value"
+    backend.delete(key)
+    assert backend.get(key) is None
+    backend.set(key, b"value", ttl=0.01)
+    time.sleep(0.03)
+    assert backend.get(key) is None
+    backend.set(key, b"value", ttl=60)
+    backend.clear()
+    assert backend.get(key) is None
+
+
+def test_workers_share_results_through_backend(backend):
+    calls = []
+    fetch = lambda: calls.append(1) or ADS
+    worker_1 = AdCache(backend=backend)
+    worker_2 = AdCache(backend=backend)
+    assert worker_1.get_or_fetch(PAYLOAD, fetch) == ADS
+    assert worker_2.get_or_fetch(PAYLOAD, fetch) == ADS
+    assert len(calls) == 1
+    assert worker_2.stats["backend_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_lookup_through_backend(backend):
+    async def fetch():
+        return ADS
+
+    await AdCache(backend=backend).aget_or_fetch(PAYLOAD, fetch)
+    second = AdCache(backend=backend)
+    assert await second.aget_or_fetch(PAYLOAD, fetch) == ADS
+    assert second.stats["backend_hits"] == 1
+
+
+def test_backend_timeout_falls_through_to_api():
+    cache = AdCache(backend=SlowBackend())
+    assert cache.get_or_fetch(PAYLOAD, lambda: ADS) == ADS
+    assert cache.stats["backend_errors"] == 2
+
+
+def test_unreachable_redis_is_a_bounded_miss(redis_server):
+    redis_server.latency = 0.5
+    backend = RedisCacheBackend(redis_server.url, timeout=0.05)
+    cache = AdCache(backend=backend)
+    start = time.monotonic()
+    assert cache.get_or_fetch(PAYLOAD, lambda: ADS) == ADS
+    assert time.monotonic() - start < 0.4
+    assert cache.stats["backend_errors"] == 2
+
+
+def _write_from_child(path):
+    backend = MmapCacheBackend(path, slots=64, slot_size=512)
+    backend.set("shared-key", encode_result(ADS), ttl=60)
+    backend.close()
+
+
+def test_mmap_backend_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "cache")
+    backend = MmapCacheBackend(path, slots=64, slot_size=512)
+    child = multiprocessing.get_context("fork").Process(
+        target=_write_from_child, args=(path,)
+    )
+    child.start()
+    child.join()
+    assert decode_result(backend.get("shared-key")) == ADS
+    backend.close()
+
+
+def test_mmap_backend_skips_oversized_entries(tmp_path):
+    backend = MmapCacheBackend(str(tmp_path / "cache"), slots=4, slot_size=64)
+    backend.set("key", b"x" * 100, ttl=60)
+    assert backend.get("key") is None
+    backend.close()
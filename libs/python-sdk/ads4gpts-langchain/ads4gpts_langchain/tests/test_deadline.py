@@ -0,0 +1,113 @@
+import pytest
+
+from ads4gpts_langchain.tests.standin import StandInAdServer
+from ads4gpts_langchain.tools import Ads4gptsInlineBannerTool
+from ads4gpts_langchain.transport import AsyncTransport, SyncTransport
+from ads4gpts_langchain.utils import (
+    DEADLINE_EXCEEDED,
+    Deadline,
+    async_get_ads,
+    get_ads,
+    no_ad_result,
+)
+
+PAYLOAD = {"ad_format": "INLINE_BANNER", "num_ads": 1}
+HEADERS = {"Authorization": "Bearer test_api_key"}
+TOOL_ARGS = dict(
+    tid="aadc300e-6957-480a-9685-7628446fc319",
+    user_gender="FEMALE",
+    ad_recommendation="test_recommendation",
+    undesired_ads="test_undesired_ads",
+    context="test_context",
+    tool_call_id="test_call_id",
+)
+
+
+def test_slow_server_returns_no_ad_within_budget():
+    with StandInAdServer(latency=0.5) as server, SyncTransport() as transport:
+        result = get_ads(
+            server.url, HEADERS, PAYLOAD, transport=transport, deadline=Deadline(0.1)
+        )
+    assert result == no_ad_result(DEADLINE_EXCEEDED)
+
+
+def test_backoff_does_not_overrun_budget():
+    def responder(path, body):
+        return 503, {}
+
+    with StandInAdServer(responder=responder) as server, SyncTransport() as transport:
+        result = get_ads(
+            server.url,
+            HEADERS,
+            PAYLOAD,
+            backoff_factor=1.0,
+            transport=transport,
+            deadline=Deadline(0.5),
+        )
+    assert result == no_ad_result(DEADLINE_EXCEEDED)
+    assert len(server.requests) == 1
+
+
+def test_expired_budget_skips_the_request():
+    with StandInAdServer() as server:
+        result = get_ads(server.url, HEADERS, PAYLOAD, deadline=Deadline(0.0))
+    assert result["no_ad_reason"] == DEADLINE_EXCEEDED
+    assert server.requests == []
+
+
+@pytest.mark.asyncio
+async def test_async_get_ads_respects_deadline():
+    with StandInAdServer(latency=0.5) as server:
+        async with AsyncTransport() as transport:
+            result = await async_get_ads(
+                server.url,
+                HEADERS,
+                PAYLOAD,
+                transport=transport,
+                deadline=Deadline(0.1),
+            )
+    assert result == no_ad_result(DEADLINE_EXCEEDED)
+
+
+def test_tool_budget_and_per_call_override():
+    with StandInAdServer(latency=0.3) as server:
+        tool = Ads4gptsInlineBannerTool(
+            ads4gpts_api_key="test_api_key",
+            base_url=server.url,
+            ads_endpoint="",
+            latency_budget=0.05,
+        )
+        assert tool._run(**TOOL_ARGS) == no_ad_result(DEADLINE_EXCEEDED)
+        result = tool._run(latency_budget=5.0, **TOOL_ARGS)
+    assert result["advertiser_agents"][0]["ad_id"] == "ad-0"
+
+
+@pytest.mark.asyncio
+async def test_async_tool_cancels_in_flight_request():
+    with StandInAdServer(latency=0.5) as server:
+        async with Ads4gptsInlineBannerTool(
+            ads4gpts_api_key="test_api_key",
+            base_url=server.url,
+            ads_endpoint="",
+            async_transport=AsyncTransport(),
+        ) as tool:
+            result = await tool._arun(latency_budget=0.05, **TOOL_ARGS)
+    assert result == no_ad_result(DEADLINE_EXCEEDED)
+
+
+@pytest.mark.asyncio
+async def test_budget_override_from_run_config():
+    with StandInAdServer(latency=0.5) as server:
+        tool = Ads4gptsInlineBannerTool(
+            ads4gpts_api_key="test_api_key",
+            base_url=server.url,
+            ads_endpoint="",
+            async_transport=AsyncTransport(),
+        )
+        args = {k: v for k, v in TOOL_ARGS.items() if k != "tool_call_id"}
+        message = await tool.ainvoke(
+            {"args": args, "id": "call_1", "name": tool.name, "type": "tool_call"},
+            config={"configurable": {"latency_budget": 0.05}},
+        )
+        await tool.aclose()
+    assert DEADLINE_EXCEEDED in message.content
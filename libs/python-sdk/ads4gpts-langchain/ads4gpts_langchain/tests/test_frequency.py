@@ -0,0 +1,100 @@
+import pytest
+
+from ads4gpts_langchain.frequency import (
+    DailyCap,
+    EveryN,
+    FibonacciBackoff,
+    FrequencyEngine,
+    FrequencyPolicy,
+    MinInterval,
+    SQLiteFrequencyStore,
+    fibonacci,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def shown_turns(engine, turns, user_id="user-1"):
+    return [turn for turn in range(1, turns + 1) if engine.decide(user_id)]
+
+
+def test_fibonacci_closed_form():
+    assert [fibonacci(n) for n in range(1, 11)] == [1, 1, 2, 3, 5, 8, 13, 21, 34, 55]
+    assert fibonacci(60) == 1548008755920
+
+
+def test_every_n():
+    assert shown_turns(FrequencyEngine([EveryN(3)]), 9) == [3, 6, 9]
+
+
+def test_fibonacci_backoff_matches_example_sequence():
+    # Gaps of 1, 2, 3, 5 turns, as with next_fibonacci_number starting at 1.
+    assert shown_turns(FrequencyEngine([FibonacciBackoff()]), 11) == [1, 3, 6, 11]
+    capped = FrequencyEngine([FibonacciBackoff(max_gap=2)])
+    assert shown_turns(capped, 8) == [1, 3, 5, 7]
+
+
+def test_min_interval_and_daily_cap():
+    clock = FakeClock()
+    engine = FrequencyEngine([MinInterval(60), DailyCap(2)], clock=clock)
+    assert engine.decide()
+    assert not engine.decide()
+    clock.now += 60
+    assert engine.decide()
+    clock.now += 3600
+    assert not engine.decide()  # Daily cap reached.
+    clock.now += 86400
+    assert engine.decide()
+    assert engine.stats == {"shown": 3, "suppressed": 2}
+
+
+def test_users_are_independent():
+    engine = FrequencyEngine([EveryN(2)])
+    assert not engine.decide("a")
+    assert not engine.decide("b")
+    assert engine.decide("a")
+
+
+def test_sqlite_store_shared_across_engines(tmp_path):
+    path = str(tmp_path / "frequency.db")
+    first = FrequencyEngine([EveryN(2)], store=SQLiteFrequencyStore(path))
+    second = FrequencyEngine([EveryN(2)], store=SQLiteFrequencyStore(path))
+    assert not first.decide("user-1")
+    assert second.decide("user-1")
+    assert first.store.get("user-1").ads == 1
+
+
+def test_should_show_ad_reads_user_from_config():
+    engine = FrequencyEngine([EveryN(2)])
+    config = {"configurable": {"thread_id": "t", "user_id": "u"}}
+    engine.should_show_ad({}, config)
+    assert engine.store.get("u").turns == 1
+    assert engine.store.get("t").turns == 0
+
+
+def test_should_show_ad_skips_capping_without_user(caplog):
+    engine = FrequencyEngine([EveryN(2)])
+    assert engine.should_show_ad({}, {"configurable": {}})
+    assert engine.should_show_ad({}, None)
+    assert engine.store.get("default").turns == 0
+    assert engine.stats == {"shown": 0, "suppressed": 0}
+    assert "frequency capping is skipped" in caplog.text
+
+
+def test_policy_must_implement_allow():
+    class Incomplete(FrequencyPolicy):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_invalid_every_n():
+    with pytest.raises(ValueError):
+        EveryN(0)
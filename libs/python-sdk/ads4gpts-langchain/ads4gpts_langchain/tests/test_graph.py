@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from typing import Annotated, List, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.message import add_messages
+
+from ads4gpts_langchain.graph import AdBranch, build_ad_graph
+
+
+class State(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+    ad_counter: int
+    ad_frequency: int
+
+
+def make_agent(delay):
+    async def agent_node(state):
+        await asyncio.sleep(delay)
+        return {
+            "messages": [AIMessage(content="answer")],
+            "ad_counter": state.get("ad_counter", 0) + 1,
+        }
+
+    return agent_node
+
+
+def make_ad_node(delay):
+    async def ad_node(state, config):
+        await asyncio.sleep(delay)
+        return {"messages": [AIMessage(content="ad")], "ad_counter": 0}
+
+    return ad_node
+
+
+async def contents(graph, **inputs):
+    state = await graph.compile().ainvoke(
+        {"messages": [HumanMessage(content="hi")], **inputs}
+    )
+    return [message.content for message in state["messages"]], state
+
+
+@pytest.mark.asyncio
+async def test_parallel_branch_appends_ad_after_answer():
+    graph = build_ad_graph(State, make_agent(0.05), make_ad_node(0.03))
+    messages, state = await contents(graph)
+    assert messages == ["hi", "answer", "ad"]
+    assert state["ad_counter"] == 0
+
+
+@pytest.mark.asyncio
+async def test_parallel_branch_overlaps_agent():
+    graph = build_ad_graph(State, make_agent(0.1), make_ad_node(0.1))
+    start = asyncio.get_running_loop().time()
+    await contents(graph)
+    assert asyncio.get_running_loop().time() - start < 0.18
+
+
+@pytest.mark.asyncio
+async def test_late_ad_is_dropped():
+    branch = AdBranch(make_ad_node(1.0), budget=0.05)
+    messages, state = await contents(build_ad_graph(State, make_agent(0.01), branch))
+    assert messages == ["hi", "answer"]
+    assert state["ad_counter"] == 1
+    assert branch.stats == {"shown": 0, "dropped": 1, "skipped": 0}
+
+
+@pytest.mark.asyncio
+async def test_should_show_ad_gates_fetch_across_turns():
+    branch = AdBranch(
+        make_ad_node(0),
+        should_show_ad=lambda s: s.get("ad_counter", 0) + 1 >= s["ad_frequency"],
+    )
+    compiled = build_ad_graph(State, make_agent(0), branch).compile(
+        checkpointer=MemorySaver()
+    )
+    config = {"configurable": {"thread_id": "t"}}
+    for _ in range(3):
+        state = await compiled.ainvoke(
+            {"messages": [HumanMessage(content="hi")], "ad_frequency": 3}, config
+        )
+    assert [m.content for m in state["messages"]][-2:] == ["answer", "ad"]
+    assert branch.stats == {"shown": 1, "dropped": 0, "skipped": 2}
+
+
+@pytest.mark.asyncio
+async def test_sequential_mode():
+    graph = build_ad_graph(State, make_agent(0), make_ad_node(0), parallel=False)
+    messages, _ = await contents(graph)
+    assert messages == ["hi", "answer", "ad"]
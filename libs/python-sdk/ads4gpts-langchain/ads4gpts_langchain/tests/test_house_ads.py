@@ -0,0 +1,119 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from ads4gpts_langchain.house_ads import HouseAdInventory, fallback_reason
+from ads4gpts_langchain.tools import Ads4gptsInlineSponsoredResponseTool
+from ads4gpts_langchain.utils import (
+    CIRCUIT_OPEN,
+    DEADLINE_EXCEEDED,
+    LOW_INTENT,
+    NO_ADVERTISER_AGENTS,
+    no_ad_result,
+)
+
+HOUSE_ADS = [
+    {
+        "ad_id": "house-shoes",
+        "ad_title": "Run further",
+        "ad_format": ["INLINE_SPONSORED_RESPONSE", "INLINE_BANNER"],
+        "keywords": ["running", "shoes"],
+    },
+    {
+        "ad_id": "house-women",
+        "ad_title": "For her",
+        "ad_format": "INLINE_SPONSORED_RESPONSE",
+        "keywords": ["running"],
+        "genders": ["FEMALE"],
+    },
+    {"ad_id": "house-generic-1", "ad_title": "Try our app"},
+    {"ad_id": "house-generic-2", "ad_title": "Join the newsletter"},
+]
+PAYLOAD = {
+    "ad_format": "INLINE_SPONSORED_RESPONSE",
+    "context": "Looking for running shoes",
+    "ad_recommendation": "sports gear",
+    "undesired_ads": "none",
+    "user_gender": "MALE",
+    "num_ads": 1,
+}
+
+
+def ad_ids(ads):
+    return [ad["ad_id"] for ad in ads]
+
+
+def test_fallback_only_replaces_failures():
+    assert fallback_reason(no_ad_result(DEADLINE_EXCEEDED)) == DEADLINE_EXCEEDED
+    assert fallback_reason(no_ad_result(CIRCUIT_OPEN)) == CIRCUIT_OPEN
+    assert fallback_reason({"error": "Connection refused"}) == "upstream_error"
+    assert fallback_reason(no_ad_result(LOW_INTENT)) is None
+    assert fallback_reason({"error": NO_ADVERTISER_AGENTS}) is None
+    assert fallback_reason({"advertiser_agents": [{"ad_id": "paid"}]}) is None
+
+
+def test_select_prefers_keyword_matches_within_bucket():
+    house = HouseAdInventory(HOUSE_ADS)
+    assert ad_ids(house.select(dict(PAYLOAD, num_ads=3))) == [
+        "house-shoes",
+        "house-generic-1",
+        "house-generic-2",
+    ]
+    female = dict(PAYLOAD, context="running", user_gender="FEMALE", num_ads=2)
+    assert set(ad_ids(house.select(female))) == {"house-shoes", "house-women"}
+    blocked = dict(PAYLOAD, undesired_ads="shoes")
+    assert ad_ids(house.select(blocked))[0].startswith("house-generic")
+    assert "keywords" not in house.select(PAYLOAD)[0]
+
+
+def test_undesired_ads_block_untargeted_ads_by_their_text():
+    house = HouseAdInventory(
+        [
+            {"ad_id": "casino", "ad_title": "Casino night", "ad_body": "Win big"},
+            {"ad_id": "books", "ad_title": "Read more", "ad_body": "Poker books"},
+            {"ad_id": "app", "ad_title": "Try our app"},
+        ]
+    )
+    payload = dict(PAYLOAD, undesired_ads="casino, poker", num_ads=3)
+    for _ in range(3):
+        assert ad_ids(house.select(payload)) == ["app"]
+
+
+def test_untargeted_ads_rotate_and_stats_count_fallbacks():
+    house = HouseAdInventory(HOUSE_ADS)
+    payload = dict(PAYLOAD, context="weather tomorrow", ad_format="SUGGESTED_PROMPT")
+    first = house.fallback(payload, {"error": "timeout"})
+    second = house.fallback(payload, {"error": "timeout"})
+    assert first["fallback_reason"] == "upstream_error"
+    assert ad_ids(first["advertiser_agents"]) != ad_ids(second["advertiser_agents"])
+    assert HouseAdInventory().fallback(payload, {"error": "x"}) == {"error": "x"}
+    assert house.stats["served_by_format"] == {"SUGGESTED_PROMPT": 2}
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_from_file(tmp_path, suffix):
+    path = tmp_path / f"house_ads{suffix}"
+    if suffix == ".jsonl":
+        path.write_text("\n".join(json.dumps(ad) for ad in HOUSE_ADS))
+    else:
+        path.write_text(json.dumps({"INLINE_BANNER": [{"ad_id": "banner"}]}))
+    house = HouseAdInventory.from_file(str(path))
+    payload = dict(PAYLOAD, ad_format="INLINE_BANNER", context="news")
+    assert house.select(payload)
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_tool_serves_house_ad_when_api_fails(mock_get_ads):
+    mock_get_ads.return_value = {"error": "503 Service Unavailable"}
+    tool = Ads4gptsInlineSponsoredResponseTool(
+        ads4gpts_api_key="test_api_key", house_ads=HouseAdInventory(HOUSE_ADS)
+    )
+    result = tool._run(
+        tid="aadc300e-6957-480a-9685-7628446fc319",
+        ad_recommendation="sports gear",
+        undesired_ads="none",
+        context="Looking for running shoes",
+        tool_call_id="call-1",
+    )
+    assert ad_ids(result["advertiser_agents"]) == ["house-shoes"]
+    assert tool.house_ads.stats["served"] == 1
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import ads4gpts_langchain
+from ads4gpts_langchain.utils import load_env
+
+
+def loaded_modules(statement: str, modules):
+    code = f"import sys; {statement}; print(' '.join(m for m in {modules!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def test_package_import_is_lazy():
+    heavy = ("langchain_core", "langgraph", "requests", "httpx", "dotenv")
+    assert loaded_modules("import ads4gpts_langchain", heavy) == []
+
+
+def test_tools_do_not_load_unused_http_stack():
+    deferred = ("langgraph", "httpx", "dotenv")
+    assert loaded_modules("import ads4gpts_langchain.toolkit", deferred) == []
+
+
+def test_public_api_resolves_on_access():
+    from ads4gpts_langchain.toolkit import Ads4gptsToolkit
+
+    assert ads4gpts_langchain.Ads4gptsToolkit is Ads4gptsToolkit
+    assert "Ads4gptsToolkit" in dir(ads4gpts_langchain)
+
+
+def test_dotenv_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv("ADS4GPTS_API_KEY", raising=False)
+    dotenv = tmp_path / ".env"
+    dotenv.write_text("ADS4GPTS_API_KEY=from_dotenv\n")
+    assert load_env(str(dotenv))
+    assert (
+        ads4gpts_langchain.get_from_dict_or_env(
+            {}, "ads4gpts_api_key", "ADS4GPTS_API_KEY"
+        )
+        == "from_dotenv"
+    )
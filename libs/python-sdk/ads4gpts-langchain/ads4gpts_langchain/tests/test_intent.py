@@ -0,0 +1,85 @@
+import uuid
+import pytest
+from unittest.mock import patch
+
+from ads4gpts_langchain.intent import IntentFilter, features
+from ads4gpts_langchain.tools import Ads4gptsInlineSponsoredResponseTool
+from ads4gpts_langchain.utils import LOW_INTENT, NO_ADVERTISER_AGENTS
+
+COMMERCIAL = {
+    "context": "The user wants to buy running shoes and compare the best brands",
+    "ad_recommendation": "running shoes",
+    "undesired_ads": "gambling",
+}
+SENSITIVE = {
+    "context": "The user is grieving after their father died last week",
+    "ad_recommendation": "UNDISCLOSED",
+    "undesired_ads": "UNDISCLOSED",
+}
+UNDESIRED = {
+    "context": "Looking for the best betting apps to buy into gambling deals",
+    "ad_recommendation": "gambling apps",
+    "undesired_ads": "gambling",
+}
+AD = {"advertiser_agents": [{"ad_id": "ad-1"}]}
+
+
+def tool_args(payload):
+    return {
+        "tid": str(uuid.uuid4()),
+        "user_gender": "FEMALE",
+        "user_age_range": "25-34",
+        "user_persona": "runner",
+        "tool_call_id": "call-1",
+        **payload,
+    }
+
+
+def test_features_and_scores():
+    assert features(UNDESIRED)["undesired"] == 1.0
+    assert features(SENSITIVE)["sensitive"] == 1.0
+    intent = IntentFilter()
+    assert intent.score(COMMERCIAL) > 0.9
+    assert intent.score(SENSITIVE) < intent.threshold
+    assert intent.score(UNDESIRED) < intent.threshold
+
+
+def test_skips_without_calling_api():
+    intent = IntentFilter()
+    fetch_calls = []
+    result = intent.get_or_fetch(SENSITIVE, lambda: fetch_calls.append(1) or AD)
+    assert result == {"advertiser_agents": [], "no_ad_reason": LOW_INTENT}
+    assert not fetch_calls
+    assert intent.get_or_fetch(COMMERCIAL, lambda: AD) == AD
+    assert intent.stats["skipped"] == 1
+    assert intent.stats["true_calls"] == 1
+
+
+def test_shadow_mode_measures_precision():
+    intent = IntentFilter(shadow=True)
+    assert intent.get_or_fetch(SENSITIVE, lambda: {"error": NO_ADVERTISER_AGENTS})
+    assert intent.get_or_fetch(UNDESIRED, lambda: AD) == AD
+    stats = intent.stats
+    assert stats["skipped"] == 0
+    assert (stats["true_skips"], stats["false_skips"]) == (1, 1)
+    assert stats["skip_precision"] == 0.5
+
+
+def test_fit_learns_from_outcomes():
+    payloads = [COMMERCIAL, SENSITIVE] * 20
+    intent = IntentFilter(weights=dict.fromkeys(("commercial", "sensitive"), 0.0))
+    intent.fit(payloads, [True, False] * 20)
+    assert intent.weights["commercial"] > 0 > intent.weights["sensitive"]
+
+
+@patch("ads4gpts_langchain.tools.async_get_ads")
+@pytest.mark.asyncio
+async def test_tool_skips_low_intent_call(mock_async_get_ads):
+    mock_async_get_ads.return_value = AD
+    tool = Ads4gptsInlineSponsoredResponseTool(
+        ads4gpts_api_key="test_api_key", intent_filter=IntentFilter()
+    )
+    result = await tool._arun(**tool_args(SENSITIVE))
+    assert result["no_ad_reason"] == LOW_INTENT
+    mock_async_get_ads.assert_not_called()
+    assert await tool._arun(**tool_args(COMMERCIAL)) == AD
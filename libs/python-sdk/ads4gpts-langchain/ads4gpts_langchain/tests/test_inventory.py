@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from ads4gpts_langchain.inventory import AdInventory
+from ads4gpts_langchain.tools import Ads4gptsInlineSponsoredResponseTool
+
+PAYLOAD = {"session_id": "session-1", "ad_format": "INLINE_BANNER", "num_ads": 1}
+
+
+class FakeApi:
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, payload):
+        self.requests.append(payload)
+        offset = len(self.requests) * 100
+        return {
+            "advertiser_agents": [
+                {"ad_id": offset + i} for i in range(payload["num_ads"])
+            ]
+        }
+
+    async def afetch(self, payload):
+        return self(payload)
+
+
+def test_buffer_serves_one_ad_per_turn():
+    api = FakeApi()
+    inventory = AdInventory(batch_size=3)
+    served = [
+        inventory.get_or_fetch(PAYLOAD, api)["advertiser_agents"] for _ in range(4)
+    ]
+    assert served == [
+        [{"ad_id": 100}],
+        [{"ad_id": 101}],
+        [{"ad_id": 102}],
+        [{"ad_id": 200}],
+    ]
+    assert [request["num_ads"] for request in api.requests] == [3, 3]
+    assert inventory.stats["served"] == 2
+
+
+def test_buffers_are_per_session_and_format():
+    api = FakeApi()
+    inventory = AdInventory(batch_size=3)
+    inventory.get_or_fetch(PAYLOAD, api)
+    inventory.get_or_fetch(dict(PAYLOAD, session_id="session-2"), api)
+    inventory.get_or_fetch(dict(PAYLOAD, ad_format="SUGGESTED_PROMPT"), api)
+    assert len(api.requests) == 3
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("undesired_ads", "gambling"),
+        ("user_gender", "FEMALE"),
+        ("user_age_range", "25-34"),
+        ("min_bid", 0.5),
+    ],
+)
+def test_targeting_changes_start_a_new_buffer(field, value):
+    api = FakeApi()
+    inventory = AdInventory(batch_size=3)
+    inventory.get_or_fetch(PAYLOAD, api)
+    changed = inventory.get_or_fetch(dict(PAYLOAD, **{field: value}), api)
+    assert changed["advertiser_agents"] == [{"ad_id": 200}]
+    assert len(api.requests) == 2
+
+
+def test_requests_without_session_bypass_buffer():
+    api = FakeApi()
+    inventory = AdInventory(batch_size=3)
+    payload = dict(PAYLOAD, session_id=None)
+    inventory.get_or_fetch(payload, api)
+    inventory.get_or_fetch(payload, api)
+    assert [request["num_ads"] for request in api.requests] == [1, 1]
+
+
+def test_expired_ads_are_not_served():
+    api = FakeApi()
+    inventory = AdInventory(batch_size=3, ttl=-1.0)
+    inventory.get_or_fetch(PAYLOAD, api)
+    inventory.get_or_fetch(PAYLOAD, api)
+    assert len(api.requests) == 2
+
+
+def test_errors_are_passed_through():
+    inventory = AdInventory()
+    result = inventory.get_or_fetch(PAYLOAD, lambda payload: {"error": "boom"})
+    assert result == {"error": "boom"}
+
+
+@pytest.mark.asyncio
+async def test_async_path_refills_in_background():
+    api = FakeApi()
+    inventory = AdInventory(batch_size=2, refill_threshold=1)
+    first = await inventory.aget_or_fetch(PAYLOAD, api.afetch)
+    second = await inventory.aget_or_fetch(PAYLOAD, api.afetch)
+    assert len(inventory._tasks) == 1
+    await asyncio.sleep(0)
+    third = await inventory.aget_or_fetch(PAYLOAD, api.afetch)
+    assert [first, second, third] == [
+        {"advertiser_agents": [{"ad_id": 100}]},
+        {"advertiser_agents": [{"ad_id": 101}]},
+        {"advertiser_agents": [{"ad_id": 200}]},
+    ]
+    assert len(api.requests) == 2
+    await asyncio.sleep(0)
+    assert not inventory._tasks
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_tool_run_requests_batch_once(mock_get_ads):
+    mock_get_ads.side_effect = lambda url, headers, payload, **kwargs: {
+        "advertiser_agents": [{"ad_id": i} for i in range(payload["num_ads"])]
+    }
+    tool = Ads4gptsInlineSponsoredResponseTool(
+        ads4gpts_api_key="test_api_key", inventory=AdInventory(batch_size=4)
+    )
+    for turn in range(4):
+        result = tool._run(
+            tid="aadc300e-6957-480a-9685-7628446fc319",
+            user_gender="FEMALE",
+            ad_recommendation="test_recommendation",
+            undesired_ads="test_undesired_ads",
+            context="test_context",
+            session_id="test_session",
+            tool_call_id=f"call_{turn}",
+        )
+        assert result == {"advertiser_agents": [{"ad_id": turn}]}
+    mock_get_ads.assert_called_once()
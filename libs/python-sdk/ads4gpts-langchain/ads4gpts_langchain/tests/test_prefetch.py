@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from typing import Annotated, List, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from ads4gpts_langchain.prefetch import AdPrefetcher
+
+
+class State(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+    ad_counter: int
+    ad_frequency: int
+
+
+class FakeAdFetch:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, state):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"messages": [AIMessage(content=f"ad {self.calls}")], "ad_counter": 0}
+
+
+@pytest.mark.asyncio
+async def test_prefetch_is_consumed_by_ad_turn():
+    fetch = FakeAdFetch()
+    prefetcher = AdPrefetcher(fetch)
+    await prefetcher.prefetch_node({"ad_counter": 1, "ad_frequency": 2})
+    result = await prefetcher.ad_node({"ad_counter": 2, "ad_frequency": 2})
+    assert result["messages"][0].content == "ad 1"
+    assert fetch.calls == 1
+    assert prefetcher.stats["used"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_prefetch_when_threshold_is_far():
+    fetch = FakeAdFetch()
+    prefetcher = AdPrefetcher(fetch)
+    await prefetcher.prefetch_node({"ad_counter": 1, "ad_frequency": 5})
+    assert prefetcher.stats["started"] == 0
+    await prefetcher.ad_node({"ad_counter": 5, "ad_frequency": 5})
+    assert fetch.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancel_when_conversation_ends():
+    fetch = FakeAdFetch(delay=10)
+    prefetcher = AdPrefetcher(fetch)
+    prefetcher.prefetch({"ad_counter": 1, "ad_frequency": 2}, "thread-1")
+    await asyncio.sleep(0)
+    assert prefetcher.cancel("thread-1")
+    assert prefetcher.stats == {"started": 1, "used": 0, "cancelled": 1, "pending": 0}
+
+
+@pytest.mark.asyncio
+async def test_stale_prefetch_expires():
+    prefetcher = AdPrefetcher(FakeAdFetch(delay=10), max_age=0.01)
+    prefetcher.prefetch({}, "thread-1")
+    await asyncio.sleep(0.05)
+    assert prefetcher.stats["cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_prefetch_in_frequency_graph():
+    fetch = FakeAdFetch()
+    prefetcher = AdPrefetcher(fetch)
+
+    async def agent_node(state):
+        return {
+            "messages": [AIMessage(content="answer")],
+            "ad_counter": state.get("ad_counter", 0) + 1,
+        }
+
+    def agent_edge(state):
+        if state["ad_counter"] < state.get("ad_frequency", 1):
+            return END
+        return "ad_node"
+
+    workflow = StateGraph(State)
+    workflow.add_node("agent_node", agent_node)
+    workflow.add_node("prefetch_node", prefetcher.prefetch_node)
+    workflow.add_node("ad_node", prefetcher.ad_node)
+    workflow.add_edge(START, "agent_node")
+    workflow.add_edge("agent_node", "prefetch_node")
+    workflow.add_conditional_edges("prefetch_node", agent_edge)
+    workflow.add_edge("ad_node", END)
+    graph = workflow.compile(checkpointer=MemorySaver())
+
+    config = {"configurable": {"thread_id": "conversation-1"}}
+    turns = [
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content="hi")], "ad_frequency": 3}, config
+        )
+        for _ in range(3)
+    ]
+    assert turns[-1]["messages"][-1].content == "ad 1"
+    assert prefetcher.stats["used"] == 1
+    assert fetch.calls == 1
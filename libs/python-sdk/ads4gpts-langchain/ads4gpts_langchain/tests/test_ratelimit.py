@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from ads4gpts_langchain.ratelimit import RateLimiter
+from ads4gpts_langchain.toolkit import Ads4gptsToolkit
+from ads4gpts_langchain.tools import Ads4gptsInlineBannerTool
+from ads4gpts_langchain.tests.standin import StandInAdServer
+from ads4gpts_langchain.utils import RATE_LIMITED, no_ad_result
+
+TOOL_ARGS = dict(
+    tid="aadc300e-6957-480a-9685-7628446fc319",
+    user_gender="FEMALE",
+    ad_recommendation="test_recommendation",
+    undesired_ads="test_undesired_ads",
+    context="test_context",
+    tool_call_id="test_call_id",
+)
+
+
+def test_burst_then_shed():
+    limiter = RateLimiter(rate=1.0, burst=3, max_in_flight=None, mode="shed")
+    assert [limiter.acquire() for _ in range(4)] == [True, True, True, False]
+    assert limiter.stats["shed"] == 1
+
+
+def test_queue_waits_for_tokens():
+    limiter = RateLimiter(rate=50.0, burst=1, max_in_flight=None, queue_timeout=1.0)
+    started = time.monotonic()
+    assert all(limiter.acquire() for _ in range(3))
+    assert 0.03 <= time.monotonic() - started < 0.5
+
+
+def test_queue_times_out():
+    limiter = RateLimiter(rate=1.0, burst=1, max_in_flight=None, queue_timeout=0.05)
+    assert limiter.acquire()
+    assert not limiter.acquire()
+
+
+def test_concurrency_cap_hands_slot_to_waiter():
+    limiter = RateLimiter(rate=None, max_in_flight=1, queue_timeout=1.0)
+    assert limiter.acquire()
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(limiter.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    assert limiter.stats["queue_depth"] == 1
+    limiter.release()
+    waiter.join()
+    assert admitted == [True]
+    assert limiter.stats == {
+        "admitted": 2,
+        "shed": 0,
+        "queue_depth": 0,
+        "in_flight": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_callers_respect_cap():
+    limiter = RateLimiter(rate=None, max_in_flight=2, queue_timeout=1.0)
+    running = peak = 0
+
+    async def call():
+        nonlocal running, peak
+        assert await limiter.aacquire()
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        limiter.release()
+
+    await asyncio.gather(*(call() for _ in range(10)))
+    assert peak == 2
+    assert limiter.stats["admitted"] == 10
+
+
+@pytest.mark.asyncio
+async def test_async_shed_when_saturated():
+    limiter = RateLimiter(rate=None, max_in_flight=1, mode="shed")
+    assert await limiter.aacquire()
+    assert not await limiter.aacquire()
+    assert limiter.stats["queue_depth"] == 0
+
+
+def test_limiter_is_shared_per_api_key():
+    limiter = RateLimiter.for_api_key("key-a", rate=5.0)
+    assert RateLimiter.for_api_key("key-a") is limiter
+    assert RateLimiter.for_api_key("key-b") is not limiter
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_toolkit_tools_share_shed_budget(mock_get_ads):
+    mock_get_ads.return_value = {"advertiser_agents": [{"ad_id": "ad-1"}]}
+    toolkit = Ads4gptsToolkit(
+        ads4gpts_api_key="test_api_key",
+        rate_limiter=RateLimiter(rate=0.1, burst=2, max_in_flight=None, mode="shed"),
+    )
+    tools = toolkit.get_tools()
+    results = [tool._run(**TOOL_ARGS) for tool in tools[3:6]]
+    assert results[-1] == no_ad_result(RATE_LIMITED)
+    assert mock_get_ads.call_count == 2
+
+
+def test_retries_take_tokens_from_the_limiter():
+    with StandInAdServer(responder=lambda path, body: (503, {})) as server:
+        tool = Ads4gptsInlineBannerTool(
+            ads4gpts_api_key="test_api_key",
+            base_url=server.url,
+            rate_limiter=RateLimiter(
+                rate=0.01, burst=2, max_in_flight=None, mode="shed"
+            ),
+        )
+        first = tool._run(**TOOL_ARGS)
+        second = tool._run(**TOOL_ARGS)
+    assert first["retryable"]
+    assert second == no_ad_result(RATE_LIMITED)
+    # One request per token, not one per retry of each admitted call.
+    assert len(server.requests) == 2
@@ -0,0 +1,141 @@
+from importlib.metadata import EntryPoint
+from typing import ClassVar
+from unittest.mock import patch
+
+from ads4gpts_langchain.registry import ToolRegistry
+from ads4gpts_langchain.toolkit import Ads4gptsToolkit
+from ads4gpts_langchain.tools import Ads4gptsBaseTool, Ads4gptsInlineBannerTool
+from ads4gpts_langchain.transport import AsyncTransport
+
+
+class CountingTool(Ads4gptsBaseTool):
+    name: str = "ads4gpts_counting"
+    instances: ClassVar[int] = 0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        type(self).instances += 1
+
+
+def test_get_tools_reuses_instances():
+    toolkit = Ads4gptsToolkit(ads4gpts_api_key="test_api_key", registry=ToolRegistry())
+    first = toolkit.get_tools()
+    second = toolkit.get_tools()
+    assert all(a is b for a, b in zip(first, second))
+
+
+def test_toolkits_with_same_configuration_share_tools():
+    registry = ToolRegistry()
+    transport = AsyncTransport()
+    kwargs = dict(
+        ads4gpts_api_key="test_api_key",
+        registry=registry,
+        async_transport=transport,
+        base_url="https://tenant-a.example/",
+    )
+    tools = Ads4gptsToolkit(**kwargs).get_tools()
+    assert Ads4gptsToolkit(**kwargs).get_tools() == tools
+    other = Ads4gptsToolkit(**dict(kwargs, base_url="https://tenant-b.example/"))
+    assert other.get_tools()[0] is not tools[0]
+    assert other.get_tools()[0].base_url == "https://tenant-b.example/"
+
+
+def test_per_request_toolkits_share_cached_tools():
+    registry = ToolRegistry()
+    tools = Ads4gptsToolkit(ads4gpts_api_key="test_api_key", registry=registry)
+    tools = tools.get_tools()
+    for _ in range(300):
+        toolkit = Ads4gptsToolkit(ads4gpts_api_key="test_api_key", registry=registry)
+        assert toolkit.get_tools() == tools
+    assert len(registry._instances) == len(tools)
+
+
+def test_in_place_configuration_edits_are_picked_up():
+    toolkit = Ads4gptsToolkit(ads4gpts_api_key="test_api_key", registry=ToolRegistry())
+    assert len(toolkit.get_tools()) == 6
+    toolkit.tools = ["ads4gpts_inline_banner"]
+    assert len(toolkit.get_tools()) == 1
+    toolkit.tools.append("ads4gpts_suggested_prompt")
+    assert len(toolkit.get_tools()) == 2
+    toolkit.tool_args["base_url"] = "https://tenant-a.example/"
+    assert {tool.base_url for tool in toolkit.get_tools()} == {
+        "https://tenant-a.example/"
+    }
+
+
+def test_filtered_out_tools_are_not_built():
+    registry = ToolRegistry()
+    registry.register(CountingTool)
+    toolkit = Ads4gptsToolkit(
+        ads4gpts_api_key="test_api_key",
+        tools=["ads4gpts_inline_banner"],
+        registry=registry,
+    )
+    tools = toolkit.get_tools()
+    assert [type(tool) for tool in tools] == [Ads4gptsInlineBannerTool]
+    assert CountingTool.instances == 0
+
+
+def test_render_agent_is_part_of_configuration():
+    registry = ToolRegistry()
+    plain = Ads4gptsToolkit(ads4gpts_api_key="test_api_key", registry=registry)
+    rendered = Ads4gptsToolkit(
+        ads4gpts_api_key="test_api_key",
+        registry=registry,
+        async_transport=plain.async_transport,
+        tool_render_agents={"ads4gpts_inline_banner": "render_agent"},
+    )
+    assert plain.get_tools()[3].ads4gpts_render_agent is None
+    assert rendered.get_tools()[3].ads4gpts_render_agent == "render_agent"
+
+
+def test_plugin_tools_are_loaded_from_entry_points():
+    entry_point = EntryPoint(
+        name="counting",
+        value=f"{__name__}:CountingTool",
+        group="ads4gpts_langchain.tools",
+    )
+    with patch(
+        "ads4gpts_langchain.registry.entry_points", return_value=[entry_point]
+    ) as mock_entry_points:
+        toolkit = Ads4gptsToolkit(
+            ads4gpts_api_key="test_api_key", registry=ToolRegistry()
+        )
+        tools = toolkit.get_tools()
+        toolkit.get_tools()
+    assert isinstance(tools[-1], CountingTool)
+    assert len(tools) == 7
+    mock_entry_points.assert_called_once_with(group="ads4gpts_langchain.tools")
+
+
+def test_container_arguments_are_keyed_by_content():
+    registry = ToolRegistry()
+
+    def get_tool(tenant):
+        return registry.get_tool(
+            Ads4gptsInlineBannerTool,
+            ads4gpts_api_key="test_api_key",
+            metadata={"tenant": tenant, "tags": [tenant]},
+        )
+
+    tool = get_tool("a")
+    assert get_tool("a") is tool
+    other = get_tool("b")
+    assert other is not tool
+    assert other.metadata == {"tenant": "b", "tags": ["b"]}
+
+
+def test_unhashable_arguments_bypass_the_cache():
+    class Unhashable:
+        __hash__ = None
+
+    registry = ToolRegistry()
+    metadata = {"value": Unhashable()}
+    first = registry.get_tool(
+        Ads4gptsInlineBannerTool, ads4gpts_api_key="test_api_key", metadata=metadata
+    )
+    second = registry.get_tool(
+        Ads4gptsInlineBannerTool, ads4gpts_api_key="test_api_key", metadata=metadata
+    )
+    assert first is not second
+    assert not registry._instances
@@ -0,0 +1,135 @@
+import uuid
+import pytest
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.graph import END
+
+from ads4gpts_langchain.render import AdRenderer
+from ads4gpts_langchain.tools import (
+    AdFormat,
+    Ads4gptsInlineBannerTool,
+    Ads4gptsInlineSponsoredResponseTool,
+)
+
+BANNER = {
+    "ad_id": "ad-1",
+    "ad_creative": "https://example.com/ad.png",
+    "ad_title": "Visit Paris",
+    "ad_body": "Tours <b>& more</b>",
+    "ad_link": "https://example.com",
+    "ad_link_cta": "Book Now",
+}
+
+
+def tool_call(**args):
+    return {
+        "type": "tool_call",
+        "id": "call-1",
+        "name": "ads4gpts_inline_banner",
+        "args": {
+            "tid": str(uuid.uuid4()),
+            "user_gender": "FEMALE",
+            "user_age_range": "25-34",
+            "user_persona": "traveller",
+            "ad_recommendation": "city tours",
+            "undesired_ads": "none",
+            "context": "Planning a trip to Paris",
+            **args,
+        },
+    }
+
+
+def test_markdown_banner():
+    rendered = AdRenderer().render({"advertiser_agents": [BANNER]}, "INLINE_BANNER")
+    assert rendered.splitlines() == [
+        "![Visit Paris](https://example.com/ad.png)",
+        "**Visit Paris** · _Ad_",
+        "Tours <b>& more</b>",
+        "[Book Now](https://example.com)",
+    ]
+
+
+def test_html_escapes_and_text_skips_empty_lines():
+    html = AdRenderer(output="html").render_ad(BANNER, AdFormat.SUGGESTED_BANNER)
+    assert "Tours &lt;b&gt;&amp; more&lt;/b&gt;" in html
+    text = AdRenderer(output="text").render_ad(
+        {"ad_title": "Visit Paris", "ad_body": "Tours"}, AdFormat.INLINE_BANNER
+    )
+    assert text == "[Ad] Visit Paris\nTours"
+
+
+@pytest.mark.parametrize("output", ["markdown", "html", "text"])
+def test_unsafe_links_are_dropped(output):
+    ad = {
+        **BANNER,
+        "ad_link": "javascript:alert(1)",
+        "ad_creative": " JaVaScRiPt:alert(2)",
+    }
+    rendered = AdRenderer(output=output).render_ad(ad, AdFormat.INLINE_BANNER)
+    assert "alert" not in rendered.lower()
+    assert "Visit Paris" in rendered
+    for link in ("data:text/html,<script>", "java\tscript:alert(1)", "//evil.com"):
+        rendered = AdRenderer(output=output).render_ad(
+            {"ad_text": "Hi", "ad_link": link}, AdFormat.INLINE_SPONSORED_RESPONSE
+        )
+        assert "script" not in rendered and "evil" not in rendered
+
+
+def test_markdown_link_target_cannot_be_closed_early():
+    rendered = AdRenderer().render_ad(
+        {"ad_text": "Hi", "ad_link": "https://example.com/a)(javascript:x)"},
+        AdFormat.INLINE_SPONSORED_RESPONSE,
+    )
+    assert rendered.endswith("[Learn more](https://example.com/a%29%28javascript:x%29)")
+
+
+def test_fragment_cache_by_ad_id():
+    renderer = AdRenderer(cache_size=1)
+    first = renderer.render_ad(BANNER, AdFormat.INLINE_BANNER)
+    assert renderer.render_ad(BANNER, AdFormat.INLINE_BANNER) == first
+    renderer.render_ad({**BANNER, "ad_id": "ad-2"}, AdFormat.INLINE_BANNER)
+    assert renderer.stats == {"hits": 1, "misses": 2, "size": 1}
+
+
+def test_no_ads_render_empty():
+    renderer = AdRenderer()
+    assert (
+        renderer.render({"advertiser_agents": [], "no_ad_reason": "X"}, "INLINE_BANNER")
+        == ""
+    )
+    assert renderer.render({"error": "boom"}, "INLINE_BANNER") == ""
+
+
+def test_unknown_output_rejected():
+    with pytest.raises(ValueError):
+        AdRenderer(output="pdf")
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_tool_routes_rendered_ads_to_end(mock_get_ads):
+    mock_get_ads.return_value = {"advertiser_agents": [BANNER]}
+    tool = Ads4gptsInlineBannerTool(
+        ads4gpts_api_key="test_api_key",
+        ads4gpts_render_agent="render_agent",
+        renderer=AdRenderer(),
+    )
+    command = tool.invoke(tool_call())
+    assert command.goto == END
+    tool_message, ad_message = command.update["messages"]
+    assert isinstance(tool_message, ToolMessage)
+    assert tool_message.tool_call_id == "call-1"
+    assert isinstance(ad_message, AIMessage)
+    assert ad_message.content.startswith("![Visit Paris]")
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_unrendered_format_keeps_render_agent(mock_get_ads):
+    mock_get_ads.return_value = {"advertiser_agents": [BANNER]}
+    tool = Ads4gptsInlineSponsoredResponseTool(
+        ads4gpts_api_key="test_api_key",
+        ads4gpts_render_agent="render_agent",
+        renderer=AdRenderer(formats=[AdFormat.INLINE_BANNER]),
+    )
+    command = tool.invoke({**tool_call(), "name": tool.name})
+    assert command.goto == "render_agent"
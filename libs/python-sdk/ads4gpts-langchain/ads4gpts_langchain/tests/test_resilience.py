@@ -0,0 +1,240 @@
+import asyncio
+import itertools
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from ads4gpts_langchain.resilience import CircuitBreaker, RequestHedger
+from ads4gpts_langchain.tests.standin import StandInAdServer, success_response
+from ads4gpts_langchain.toolkit import Ads4gptsToolkit
+from ads4gpts_langchain.tools import Ads4gptsInlineBannerTool
+from ads4gpts_langchain.transport import AsyncTransport
+from ads4gpts_langchain.utils import (
+    CIRCUIT_OPEN,
+    DEADLINE_EXCEEDED,
+    NO_ADVERTISER_AGENTS,
+    no_ad_result,
+    retryable_error,
+)
+
+ERROR = retryable_error("503 Service Unavailable")
+ADS = {"advertiser_agents": [{"ad_id": "ad-1"}]}
+TOOL_ARGS = dict(
+    tid="aadc300e-6957-480a-9685-7628446fc319",
+    user_gender="FEMALE",
+    ad_recommendation="test_recommendation",
+    undesired_ads="test_undesired_ads",
+    context="test_context",
+    tool_call_id="test_call_id",
+)
+
+
+def test_breaker_opens_and_recovers_after_cooldown():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(ERROR)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial while half open
+    breaker.record(ADS)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats["short_circuited"] == 2
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record(ERROR)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(ERROR)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_api_answers_do_not_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    for result in (
+        {"error": NO_ADVERTISER_AGENTS},
+        {"error": "Invalid ad format", "status": "error"},
+        {"error": "400 Client Error: Bad Request"},
+    ) * 2:
+        assert breaker.allow()
+        breaker.record(result)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(no_ad_result(DEADLINE_EXCEEDED))
+    breaker.record(ERROR)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_breaker_is_shared_across_toolkit(mock_get_ads):
+    mock_get_ads.return_value = ERROR
+    toolkit = Ads4gptsToolkit(
+        ads4gpts_api_key="test_api_key",
+        circuit_breaker=CircuitBreaker(failure_threshold=3, cooldown=60),
+    )
+    tools = toolkit.get_tools()
+    banner = next(t for t in tools if t.name == "ads4gpts_inline_banner")
+    referral = next(t for t in tools if t.name == "ads4gpts_inline_referral")
+    for _ in range(3):
+        assert banner._run(**TOOL_ARGS) == ERROR
+    assert referral._run(**TOOL_ARGS) == no_ad_result(CIRCUIT_OPEN)
+    assert mock_get_ads.call_count == 3
+
+
+@patch("ads4gpts_langchain.tools.async_get_ads")
+@pytest.mark.asyncio
+async def test_async_breaker_short_circuits(mock_async_get_ads):
+    mock_async_get_ads.return_value = ERROR
+    tool = Ads4gptsInlineBannerTool(
+        ads4gpts_api_key="test_api_key",
+        circuit_breaker=CircuitBreaker(failure_threshold=1, cooldown=60),
+    )
+    assert await tool._arun(**TOOL_ARGS) == ERROR
+    assert await tool._arun(**TOOL_ARGS) == no_ad_result(CIRCUIT_OPEN)
+    mock_async_get_ads.assert_called_once()
+
+
+@patch("ads4gpts_langchain.tools.async_get_ads")
+@pytest.mark.asyncio
+async def test_async_deadline_cancellation_is_recorded(mock_async_get_ads):
+    async def hang(**kwargs):
+        await asyncio.sleep(1)
+
+    mock_async_get_ads.side_effect = hang
+    tool = Ads4gptsInlineBannerTool(
+        ads4gpts_api_key="test_api_key",
+        circuit_breaker=CircuitBreaker(failure_threshold=1, cooldown=60),
+    )
+    assert await tool._arun(**TOOL_ARGS, latency_budget=0.02) == no_ad_result(
+        DEADLINE_EXCEEDED
+    )
+    assert tool.circuit_breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_over_slow_primary():
+    delays = iter([1.0, 0.0])
+
+    async def afetch():
+        await asyncio.sleep(next(delays))
+        return ADS
+
+    hedger = RequestHedger(delay=0.02)
+    started = time.monotonic()
+    assert await hedger.run(afetch) == ADS
+    assert time.monotonic() - started < 0.5
+    assert hedger.stats["hedged"] == 1
+    assert hedger.stats["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    calls = itertools.count()
+
+    async def afetch():
+        next(calls)
+        return ADS
+
+    hedger = RequestHedger(delay=0.05)
+    assert await hedger.run(afetch) == ADS
+    assert next(calls) == 1
+    assert hedger.stats["hedged"] == 0
+
+
+def test_sync_hedge_skips_failed_copy():
+    results = iter([(0.3, ADS), (0.0, ERROR)])
+
+    def fetch():
+        delay, result = next(results)
+        time.sleep(delay)
+        return result
+
+    hedger = RequestHedger(delay=0.02)
+    assert hedger.run_sync(fetch) == ADS
+    assert hedger.stats["hedge_wins"] == 0
+    hedger.close()
+
+
+def test_sync_hedge_wins_over_slow_primary():
+    results = iter([(1.0, ADS), (0.0, {"advertiser_agents": [{"ad_id": "ad-2"}]})])
+
+    def fetch():
+        delay, result = next(results)
+        time.sleep(delay)
+        return result
+
+    hedger = RequestHedger(delay=0.02)
+    started = time.monotonic()
+    assert hedger.run_sync(fetch) == {"advertiser_agents": [{"ad_id": "ad-2"}]}
+    assert time.monotonic() - started < 0.5
+    assert hedger.stats["hedged"] == 1
+    assert hedger.stats["hedge_wins"] == 1
+    hedger.close()
+
+
+def test_sync_hedge_delay_counts_from_primary_start():
+    calls = itertools.count()
+    hedger = RequestHedger(delay=0.1, max_workers=1)
+    blocker = hedger._get_executor().submit(time.sleep, 0.15)
+
+    def fetch():
+        next(calls)
+        time.sleep(0.05)
+        return ADS
+
+    assert hedger.run_sync(fetch) == ADS
+    blocker.result()
+    assert next(calls) == 1
+    assert hedger.stats["hedged"] == 0
+    hedger.close()
+
+
+def test_sync_hedge_answers_when_primary_fails():
+    results = iter([(0.1, ERROR), (0.0, ADS)])
+
+    def fetch():
+        delay, result = next(results)
+        time.sleep(delay)
+        return result
+
+    hedger = RequestHedger(delay=0.02)
+    assert hedger.run_sync(fetch) == ADS
+    assert hedger.stats["hedge_wins"] == 1
+    hedger.close()
+
+
+def test_hedge_delay_follows_observed_quantile():
+    hedger = RequestHedger(quantile=0.9, min_samples=10)
+    assert hedger.hedge_delay() is None
+    for latency in range(10):
+        hedger._observe(time.monotonic() - latency / 100, ADS)
+    assert hedger.hedge_delay() == pytest.approx(0.09, abs=0.005)
+
+
+@pytest.mark.asyncio
+async def test_async_tool_hedges_slow_upstream():
+    requests = itertools.count()
+
+    def responder(path, body):
+        if next(requests) == 0:
+            time.sleep(0.5)
+        return 200, success_response(body)
+
+    with StandInAdServer(responder=responder) as server:
+        async with Ads4gptsInlineBannerTool(
+            ads4gpts_api_key="test_api_key",
+            base_url=server.url,
+            ads_endpoint="",
+            async_transport=AsyncTransport(),
+            hedger=RequestHedger(delay=0.05),
+        ) as tool:
+            started = time.monotonic()
+            result = await tool._arun(**TOOL_ARGS)
+            elapsed = time.monotonic() - started
+    assert result["advertiser_agents"]
+    assert elapsed < 0.4
+    assert tool.hedger.stats["hedge_wins"] == 1
@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("numpy")
+
+from ads4gpts_langchain.semantic_cache import SemanticAdCache
+from ads4gpts_langchain.tools import Ads4gptsInlineBannerTool
+
+ADS = {"advertiser_agents": [{"ad_id": "ad-1"}]}
+PAYLOAD = {
+    "ad_format": "INLINE_BANNER",
+    "user_gender": "FEMALE",
+    "user_age_range": "25-34",
+    "num_ads": 1,
+    "min_bid": 0.01,
+    "undesired_ads": "gambling, alcohol",
+    "context": "The user is asking about running shoes for marathon training",
+    "ad_recommendation": "running shoes and sports gear",
+}
+PARAPHRASE = dict(
+    PAYLOAD,
+    context="The user asks about running shoes for marathon training",
+    ad_recommendation="Running shoes, sports gear",
+)
+
+
+def test_similar_request_is_served_from_cache():
+    cache = SemanticAdCache()
+    cache.set(PAYLOAD, ADS)
+    assert cache.get(PARAPHRASE) == ADS
+    assert cache.stats["hits"] == 1
+
+
+def test_unrelated_request_misses():
+    cache = SemanticAdCache()
+    cache.set(PAYLOAD, ADS)
+    assert (
+        cache.get(
+            dict(PAYLOAD, context="Vegan lasagna recipe", ad_recommendation="cookware")
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("ad_format", "SUGGESTED_PROMPT"),
+        ("user_gender", "MALE"),
+        ("num_ads", 2),
+        ("min_bid", 0.5),
+        ("undesired_ads", "gambling, alcohol, running shoes"),
+        ("undesired_ads", None),
+    ],
+)
+def test_results_are_partitioned_by_format_and_bucket(field, value):
+    cache = SemanticAdCache()
+    cache.set(PAYLOAD, ADS)
+    assert cache.get(dict(PARAPHRASE, **{field: value})) is None
+
+
+def test_undesired_ads_are_normalized():
+    cache = SemanticAdCache()
+    cache.set(PAYLOAD, ADS)
+    assert cache.get(dict(PARAPHRASE, undesired_ads="Alcohol;  gambling")) == ADS
+
+
+def test_oldest_entries_are_evicted_and_entries_expire():
+    cache = SemanticAdCache(max_entries=2)
+    cache.set(PAYLOAD, ADS)
+    cache.set(dict(PAYLOAD, num_ads=2), ADS)
+    cache.set(dict(PAYLOAD, num_ads=3), ADS)
+    assert cache.get(PAYLOAD) is None
+    expired = SemanticAdCache(ttl=-1.0)
+    expired.set(PAYLOAD, ADS)
+    assert expired.get(PAYLOAD) is None
+
+
+def test_get_many_matches_single_lookups():
+    cache = SemanticAdCache()
+    cache.set(PAYLOAD, ADS)
+    other = dict(PAYLOAD, context="Cheap flights to Europe", ad_recommendation="travel")
+    assert cache.get_many([PARAPHRASE, other]) == [ADS, None]
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_tool_run_uses_semantic_tier(mock_get_ads):
+    mock_get_ads.return_value = ADS
+    tool = Ads4gptsInlineBannerTool(
+        ads4gpts_api_key="test_api_key", semantic_cache=SemanticAdCache()
+    )
+    kwargs = dict(
+        tid="aadc300e-6957-480a-9685-7628446fc319",
+        user_gender="FEMALE",
+        user_age_range="25-34",
+        undesired_ads="none",
+        tool_call_id="test_call_id",
+    )
+    for payload in (PAYLOAD, PARAPHRASE):
+        result = tool._run(
+            context=payload["context"],
+            ad_recommendation=payload["ad_recommendation"],
+            **kwargs,
+        )
+        assert result == ADS
+    mock_get_ads.assert_called_once()
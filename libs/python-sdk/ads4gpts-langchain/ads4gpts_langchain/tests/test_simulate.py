@@ -0,0 +1,70 @@
+import json
+import pytest
+
+from ads4gpts_langchain.frequency import EveryN, FibonacciBackoff
+from ads4gpts_langchain.simulate import (
+    engine_decider,
+    frequency_function_decider,
+    main,
+    parse_policies,
+    simulate,
+)
+
+
+def next_fibonacci_number(n):
+    a, b = 0, 1
+    while b <= n:
+        a, b = b, a + b
+    return b
+
+
+def turn_log(conversations=2, turns=11):
+    lines = []
+    for t in range(turns):
+        for c in range(conversations):
+            record = {"conversation_id": f"c{c}", "user_id": "u", "timestamp": t}
+            lines.append(json.dumps(record))
+    return lines
+
+
+def test_frequency_function_matches_engine_policy():
+    legacy = simulate(turn_log(), frequency_function_decider(next_fibonacci_number))
+    engine = simulate(turn_log(), engine_decider([FibonacciBackoff()]))
+    assert legacy == engine
+    assert legacy["ad_turns"] == 8  # Turns 1, 3, 6 and 11 of both conversations.
+    assert legacy["calls_per_conversation"]["max"] == 4
+
+
+def test_report_density_latency_and_qps():
+    report = simulate(
+        turn_log(), engine_decider([EveryN(2)]), ad_latency_ms=100, scale=10
+    )
+    assert report["turns"] == 22
+    assert report["ad_density"] == pytest.approx(10 / 22)
+    assert report["added_latency_ms"]["total"] == 1000
+    assert report["projected_qps"] == {"mean": 10.0, "peak": 20.0}
+
+
+def test_per_user_keys_decisions_by_user():
+    report = simulate(turn_log(turns=2), engine_decider([EveryN(2)]), per_user=True)
+    assert report["ad_turns"] == 2
+    assert report["conversations"] == 2
+
+
+def test_parse_policies():
+    policies = parse_policies("every:3, fibonacci:13,interval:60,daily:5")
+    assert [type(p).__name__ for p in policies] == [
+        "EveryN",
+        "FibonacciBackoff",
+        "MinInterval",
+        "DailyCap",
+    ]
+    with pytest.raises(ValueError):
+        parse_policies("hourly:3")
+
+
+def test_cli(tmp_path, capsys):
+    log = tmp_path / "turns.jsonl"
+    log.write_text("\n".join(turn_log()) + "\n")
+    main([str(log), "--policy", "every:11"])
+    assert json.loads(capsys.readouterr().out)["api_calls"] == 2
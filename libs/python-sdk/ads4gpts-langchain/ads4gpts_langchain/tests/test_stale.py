@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from ads4gpts_langchain.cache import AdCache
+from ads4gpts_langchain.stale import StaleAdCache
+from ads4gpts_langchain.tools import Ads4gptsSuggestedPromptTool
+
+OLD = {"advertiser_agents": [{"ad_id": "ad-1"}]}
+NEW = {"advertiser_agents": [{"ad_id": "ad-2"}]}
+PAYLOAD = {"ad_format": "SUGGESTED_PROMPT", "context": "pre-chat", "num_ads": 1}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_serves_stale_result_and_refreshes_in_background():
+    clock = Clock()
+    stale = StaleAdCache(refresh_after=10, clock=clock)
+    assert stale.get_or_fetch(PAYLOAD, lambda: OLD) == OLD
+    clock.now = 5
+    assert stale.get_or_fetch(PAYLOAD, lambda: NEW) == OLD
+    assert stale.stats["refreshes"] == 0
+    clock.now = 20
+    refreshed = threading.Event()
+    fetch = lambda: refreshed.set() or NEW
+    assert stale.get_or_fetch(PAYLOAD, fetch) == OLD
+    assert refreshed.wait(1)
+    stale.close()
+    while stale.stats["refreshing"]:
+        time.sleep(0.001)
+    assert stale.get_or_fetch(PAYLOAD, lambda: OLD) == NEW
+    assert stale.stats["refreshes"] == 1
+
+
+def test_per_format_staleness_limit_and_pass_through():
+    clock = Clock()
+    stale = StaleAdCache(max_stale={"SUGGESTED_PROMPT": 60}, clock=clock)
+    stale.get_or_fetch(PAYLOAD, lambda: OLD)
+    clock.now = 61
+    assert stale.get_or_fetch(PAYLOAD, lambda: NEW) == NEW
+    banner = dict(PAYLOAD, ad_format="INLINE_BANNER")
+    calls = []
+    stale.get_or_fetch(banner, lambda: calls.append(1) or OLD)
+    stale.get_or_fetch(banner, lambda: calls.append(1) or OLD)
+    assert len(calls) == 2
+    assert stale.stats["misses"] == 2
+
+
+def test_failed_refresh_keeps_last_good_result():
+    clock = Clock()
+    stale = StaleAdCache(refresh_after=0, clock=clock)
+    stale.get_or_fetch(PAYLOAD, lambda: OLD)
+    stale.get_or_fetch(PAYLOAD, lambda: {"error": "boom"})
+    stale.close()
+    while stale.stats["refreshing"]:
+        time.sleep(0.001)
+    assert stale.get_or_fetch(PAYLOAD, lambda: NEW) == OLD
+    assert stale.stats["refresh_failures"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_are_capped():
+    stale = StaleAdCache(refresh_after=0, max_refreshes=2)
+    release = asyncio.Event()
+    payloads = [dict(PAYLOAD, context=f"pre-chat {i}") for i in range(4)]
+
+    async def old():
+        return OLD
+
+    async def slow():
+        await release.wait()
+        return NEW
+
+    for payload in payloads:
+        await stale.aget_or_fetch(payload, old)
+    for payload in payloads:
+        assert await stale.aget_or_fetch(payload, slow) == OLD
+    assert stale.stats["refreshing"] == 2
+    assert stale.stats["refreshes_skipped"] == 2
+    release.set()
+    while stale.stats["refreshing"]:
+        await asyncio.sleep(0)
+    assert stale.stats["refreshes"] == 2
+    await stale.aclose()
+
+
+@patch("ads4gpts_langchain.tools.async_get_ads")
+@pytest.mark.asyncio
+async def test_tool_serves_stale_prompt_without_waiting(mock_async_get_ads):
+    release = asyncio.Event()
+
+    async def get_ads(**kwargs):
+        if mock_async_get_ads.await_count > 1:
+            await release.wait()
+            return NEW
+        return OLD
+
+    mock_async_get_ads.side_effect = get_ads
+    stale = StaleAdCache(refresh_after=0)
+    tool = Ads4gptsSuggestedPromptTool(
+        ads4gpts_api_key="test_api_key", stale_cache=stale
+    )
+    args = {
+        "tid": "aadc300e-6957-480a-9685-7628446fc319",
+        "ad_recommendation": "productivity apps",
+        "undesired_ads": "none",
+        "context": "pre-chat suggestions",
+        "tool_call_id": "call-1",
+    }
+    assert await tool._arun(**args) == OLD
+    assert await asyncio.wait_for(tool._arun(**args), 0.5) == OLD
+    release.set()
+    while stale.stats["refreshing"]:
+        await asyncio.sleep(0)
+    assert await tool._arun(**args) == NEW
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_refresh_bypasses_exact_cache(mock_get_ads):
+    mock_get_ads.side_effect = [OLD, NEW]
+    clock = Clock()
+    stale = StaleAdCache(refresh_after=30, clock=clock)
+    tool = Ads4gptsSuggestedPromptTool(
+        ads4gpts_api_key="test_api_key", cache=AdCache(ttl=60), stale_cache=stale
+    )
+    args = {
+        "tid": "aadc300e-6957-480a-9685-7628446fc319",
+        "ad_recommendation": "productivity apps",
+        "undesired_ads": "none",
+        "context": "pre-chat suggestions",
+        "tool_call_id": "call-1",
+    }
+    assert tool._run(**args) == OLD
+    clock.now = 31
+    assert tool._run(**args) == OLD
+    stale.close()
+    while stale.stats["refreshing"]:
+        time.sleep(0.001)
+    assert mock_get_ads.call_count == 2
+    assert tool._run(**args) == NEW
+    assert stale.stats["refreshes"] == 1
@@ -9,6 +9,8 @@ from ads4gpts_langchain.tools import (
     Ads4gptsSuggestedBannerTool,
     Ads4gptsBaseTool,
     Ads4gptsInlineReferralTool,
+    Ads4gptsInlineConversationalInput,
+    Ads4gptsAdTool,
 )
 from ads4gpts_langchain.toolkit import Ads4gptsToolkit
 
@@ -300,3 +302,79 @@ async def test_referral_tool_arun(mock_async_get_ads, referral_tool):
     )
     mock_async_get_ads.assert_called_once()
     assert result == {"ads": "test_ad"}
+
+
+def test_missing_gender_uses_default():
+    validated = Ads4gptsInlineConversationalInput(
+        tid="aadc300e-6957-480a-9685-7628446fc319",
+        ad_recommendation="test_recommendation",
+        undesired_ads="test_undesired_ads",
+        context="test_context",
+        tool_call_id="test_call_id",
+    )
+    assert validated.user_gender == "UNDISCLOSED"
+    assert validated.num_ads == 1
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_tool_call_is_validated_once(mock_get_ads, referral_tool):
+    mock_get_ads.return_value = {"ads": "test_ad"}
+    args = {
+        "tid": "aadc300e-6957-480a-9685-7628446fc319",
+        "ad_recommendation": "test_recommendation",
+        "undesired_ads": "test_undesired_ads",
+        "context": "test_context",
+    }
+    with patch("ads4gpts_langchain.tools.uuid.UUID") as mock_uuid:
+        message = referral_tool.invoke(
+            {
+                "args": args,
+                "id": "call_1",
+                "name": referral_tool.name,
+                "type": "tool_call",
+            }
+        )
+    mock_uuid.assert_called_once()
+    assert message.tool_call_id == "call_1"
+    payload = mock_get_ads.call_args.kwargs["payload"]
+    assert "tool_call_id" not in payload
+    assert payload["ad_format"] == "INLINE_REFERRAL"
+
+
+def test_multiplexed_toolkit_exposes_single_tool():
+    toolkit = Ads4gptsToolkit(
+        ads4gpts_api_key="test_api_key",
+        multiplexed=True,
+        tool_render_agents={"ads4gpts_ad": "render_agent"},
+    )
+    tools = toolkit.get_tools()
+    assert len(tools) == 1
+    assert isinstance(tools[0], Ads4gptsAdTool)
+    assert tools[0].ads4gpts_render_agent == "render_agent"
+    per_format = Ads4gptsToolkit(ads4gpts_api_key="test_api_key").get_tools()
+
+    def schema_size(tools):
+        return sum(
+            len(str(tool.tool_call_schema.model_json_schema())) + len(tool.description)
+            for tool in tools
+        )
+
+    assert schema_size(tools) * 4 < schema_size(per_format)
+
+
+@patch("ads4gpts_langchain.tools.get_ads")
+def test_multiplexed_tool_keeps_format_rules(mock_get_ads):
+    mock_get_ads.return_value = {"ads": "test_ad"}
+    tool = Ads4gptsAdTool(ads4gpts_api_key="test_api_key")
+    kwargs = dict(
+        tid="aadc300e-6957-480a-9685-7628446fc319",
+        ad_recommendation="test_recommendation",
+        undesired_ads="test_undesired_ads",
+        context="test_context",
+        num_ads=2,
+        tool_call_id="test_call_id",
+    )
+    assert "error" in tool._run(ad_format="INLINE_CONVERSATIONAL", **kwargs)
+    assert "error" in tool._run(**kwargs)
+    assert tool._run(ad_format="INLINE_BANNER", **kwargs) == {"ads": "test_ad"}
+    assert mock_get_ads.call_args.kwargs["payload"]["ad_format"] == "INLINE_BANNER"
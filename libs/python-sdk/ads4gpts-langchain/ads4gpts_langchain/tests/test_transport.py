@@ -0,0 +1,301 @@
+import asyncio
+import contextvars
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from ads4gpts_langchain.toolkit import Ads4gptsToolkit
+from ads4gpts_langchain.tools import Ads4gptsInlineBannerTool
+from ads4gpts_langchain.transport import (
+    AsyncTransport,
+    BackgroundLoop,
+    SyncTransport,
+    aclose_default_async_transports,
+    get_default_async_transport,
+    get_default_transport,
+)
+from ads4gpts_langchain.utils import async_get_ads, get_ads
+from ads4gpts_langchain.tests.standin import StandInAdServer, success_response
+
+PAYLOAD = {"ad_format": "INLINE_BANNER", "num_ads": 1}
+HEADERS = {"Authorization": "Bearer test_api_key"}
+
+
+@pytest.fixture
+def server():
+    with StandInAdServer() as server:
+        yield server
+
+
+def test_default_transport_is_shared():
+    assert get_default_transport() is get_default_transport()
+
+
+def test_get_ads_reuses_pooled_connection(server):
+    with SyncTransport() as transport:
+        for _ in range(5):
+            result = get_ads(server.url, HEADERS, PAYLOAD, transport=transport)
+            assert result["advertiser_agents"][0]["ad_format"] == "INLINE_BANNER"
+    assert len(server.requests) == 5
+    assert server.connections == 1
+
+
+def test_transport_is_shared_across_threads(server):
+    with SyncTransport(pool_maxsize=4) as transport:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(
+                pool.map(
+                    lambda _: get_ads(
+                        server.url, HEADERS, PAYLOAD, transport=transport
+                    ),
+                    range(40),
+                )
+            )
+    assert all("advertiser_agents" in result for result in results)
+    assert server.connections <= 4
+
+
+def test_idle_connections_are_evicted(server):
+    with SyncTransport(idle_timeout=0.0) as transport:
+        get_ads(server.url, HEADERS, PAYLOAD, transport=transport)
+        get_ads(server.url, HEADERS, PAYLOAD, transport=transport)
+    assert server.connections == 2
+
+
+def test_get_ads_retries_server_errors():
+    statuses = iter([503, 200])
+
+    def responder(path, body):
+        status = next(statuses)
+        return status, success_response(body) if status == 200 else {}
+
+    with StandInAdServer(responder=responder) as server, SyncTransport() as transport:
+        result = get_ads(
+            server.url, HEADERS, PAYLOAD, backoff_factor=0.0, transport=transport
+        )
+    assert "advertiser_agents" in result
+    assert len(server.requests) == 2
+
+
+def test_get_ads_honours_retry_after_on_429():
+    responses = iter([(429, {}, {"Retry-After": "0.2"}), (200, None)])
+
+    def responder(path, body):
+        status, response, *extra = next(responses)
+        return (status, response or success_response(body), *extra)
+
+    with StandInAdServer(responder=responder) as server, SyncTransport() as transport:
+        started = time.monotonic()
+        result = get_ads(
+            server.url, HEADERS, PAYLOAD, backoff_factor=0.0, transport=transport
+        )
+        assert time.monotonic() - started >= 0.2
+    assert "advertiser_agents" in result
+    assert len(server.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_get_ads_gives_up_when_retry_after_exceeds_timeout():
+    def responder(path, body):
+        return 429, {}, {"Retry-After": "60"}
+
+    with StandInAdServer(responder=responder) as server:
+        async with AsyncTransport() as transport:
+            result = await async_get_ads(
+                server.url, HEADERS, PAYLOAD, timeout=1.0, transport=transport
+            )
+    assert result["retryable"]
+    assert len(server.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_get_ads_reuses_client_per_loop(server):
+    async with AsyncTransport() as transport:
+        client = transport.get_client()
+        for _ in range(5):
+            result = await async_get_ads(
+                server.url, HEADERS, PAYLOAD, transport=transport
+            )
+            assert "advertiser_agents" in result
+        assert transport.get_client() is client
+    assert client.is_closed
+    assert server.connections == 1
+
+
+def test_async_transport_creates_client_per_event_loop():
+    transport = AsyncTransport()
+
+    async def client_and_close():
+        client = transport.get_client()
+        await transport.aclose()
+        return client
+
+    assert asyncio.run(client_and_close()) is not asyncio.run(client_and_close())
+
+
+def test_async_transport_closes_only_current_loop_client():
+    transport = AsyncTransport()
+
+    async def get_client():
+        return transport.get_client()
+
+    async def close_here():
+        client = transport.get_client()
+        await transport.aclose()
+        return client
+
+    other = asyncio.new_event_loop()
+    other_client = other.run_until_complete(get_client())
+    assert asyncio.run(close_here()).is_closed
+    assert not other_client.is_closed
+    other.run_until_complete(transport.aclose())
+    assert other_client.is_closed
+    other.close()
+
+
+def test_async_transport_http2_requires_h2():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError, match="h2"):
+            AsyncTransport(http2=True)
+    else:
+        assert AsyncTransport(http2=True).http2
+
+
+@pytest.mark.asyncio
+async def test_toolkit_shares_and_closes_its_async_transport():
+    async with Ads4gptsToolkit(
+        ads4gpts_api_key="test_api_key", async_transport=AsyncTransport()
+    ) as toolkit:
+        tools = toolkit.get_tools()
+        assert all(tool.async_transport is toolkit.async_transport for tool in tools)
+        client = toolkit.async_transport.get_client()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_toolkit_leaves_shared_default_transport_open():
+    async with Ads4gptsToolkit(ads4gpts_api_key="test_api_key") as toolkit:
+        assert toolkit.async_transport is get_default_async_transport()
+        client = toolkit.async_transport.get_client()
+        async with toolkit.get_tools()[0]:
+            pass
+        assert not client.is_closed
+    assert not client.is_closed
+    await aclose_default_async_transports()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_async_transport_queues_beyond_max_connections():
+    import httpx
+
+    with StandInAdServer(latency=0.1) as server:
+        async with AsyncTransport(max_connections=1) as transport:
+            first = asyncio.ensure_future(
+                transport.post(server.url, PAYLOAD, HEADERS, timeout=1.0)
+            )
+            await asyncio.sleep(0.01)
+            with pytest.raises(httpx.PoolTimeout):
+                await transport.post(server.url, PAYLOAD, HEADERS, timeout=0.02)
+            assert (await first).status_code == 200
+    assert server.connections == 1
+
+
+def test_background_loop_runs_callers_on_one_loop_with_their_context():
+    request_id = contextvars.ContextVar("request_id")
+    background = BackgroundLoop()
+
+    async def work(value):
+        await asyncio.sleep(0.001)
+        return asyncio.get_running_loop(), request_id.get(), threading.current_thread()
+
+    def call(value):
+        request_id.set(value)
+        return background.run(work(value))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(call, range(8)))
+    assert len({loop for loop, _, _ in results}) == 1
+    assert [value for _, value, _ in results] == list(range(8))
+    assert {thread.name for _, _, thread in results} == {"ads4gpts-loop"}
+    with pytest.raises(TimeoutError):
+        background.run(asyncio.sleep(1), timeout=0.01)
+    background.close()
+    assert background.run(asyncio.sleep(0, "restarted")) == "restarted"
+    background.close()
+
+
+def test_sync_run_over_background_loop_shares_async_client(server):
+    background = BackgroundLoop()
+    toolkit = Ads4gptsToolkit(
+        ads4gpts_api_key="test_api_key",
+        base_url=server.url,
+        background_loop=background,
+        tools=["ads4gpts_inline_banner"],
+    )
+    (tool,) = toolkit.get_tools()
+    kwargs = dict(
+        tid="aadc300e-6957-480a-9685-7628446fc319",
+        ad_recommendation="test_recommendation",
+        undesired_ads="test_undesired_ads",
+        context="test_context",
+        tool_call_id="test_call_id",
+    )
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: tool._run(**kwargs), range(16)))
+    assert all(result["advertiser_agents"] for result in results)
+    assert len(server.requests) == 16
+    assert server.connections <= 8
+    assert len(toolkit.async_transport._clients) == 1
+    background.run(toolkit.aclose())
+    background.close()
+
+
+def test_background_loop_close_closes_bound_clients():
+    background = BackgroundLoop()
+    transport = AsyncTransport()
+
+    async def get_client():
+        return transport.get_client()
+
+    client = background.run(get_client())
+    background.close()
+    assert client.is_closed
+    assert background.run(get_client()) is not client
+    background.close()
+
+
+def test_background_loop_drops_coroutines_that_timed_out_before_starting():
+    background = BackgroundLoop()
+    ran = threading.Event()
+
+    async def work():
+        ran.set()
+
+    background.loop.call_soon_threadsafe(time.sleep, 0.2)
+    with pytest.raises(TimeoutError):
+        background.run(work(), timeout=0.05)
+    assert background.run(asyncio.sleep(0, "after")) == "after"
+    assert not ran.is_set()
+    background.close()
+
+
+def test_background_loop_errors_are_returned_as_results():
+    background = BackgroundLoop()
+    tool = Ads4gptsInlineBannerTool(
+        ads4gpts_api_key="test_api_key", background_loop=background
+    )
+
+    def busy(coro, timeout=None):
+        coro.close()
+        raise TimeoutError("loop busy")
+
+    with patch.object(background, "run", side_effect=busy):
+        assert tool._run(tid="aadc300e-6957-480a-9685-7628446fc319") == {
+            "error": "loop busy"
+        }
+    background.close()
@@ -4,9 +4,21 @@ import inspect
 from typing import List, Dict, Optional, Type
 
 from langchain_core.tools import BaseTool, BaseToolkit
-from pydantic import Field, model_validator, ValidationError
-from ads4gpts_langchain.utils import get_from_dict_or_env
+from pydantic import ConfigDict, Field, PrivateAttr, model_validator, ValidationError
+from ads4gpts_langchain.utils import get_from_dict_or_env, load_env
+from ads4gpts_langchain.transport import (
+    AsyncTransport,
+    get_default_async_transport,
+    is_default_async_transport,
+)
+from ads4gpts_langchain.registry import (
+    ToolRegistry,
+    default_registry,
+    freeze_args,
+    tool_name,
+)
 from ads4gpts_langchain.tools import (
+    Ads4gptsAdTool,
     Ads4gptsInlineSponsoredResponseTool,
     Ads4gptsSuggestedPromptTool,
     Ads4gptsInlineConversationalTool,
@@ -14,9 +26,6 @@ from ads4gpts_langchain.tools import (
     Ads4gptsSuggestedBannerTool,
     Ads4gptsInlineReferralTool,
 )
-from dotenv import load_dotenv
-
-load_dotenv()
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -28,6 +37,8 @@ logger.addHandler(handler)
 
 
 class Ads4gptsToolkit(BaseToolkit):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     ads4gpts_api_key: str = Field(
         default=None, description="API key for authenticating with the ads database."
     )
@@ -42,6 +53,22 @@ class Ads4gptsToolkit(BaseToolkit):
         default=None,
         description="Mapping of tool names to specific ads4gpts_render_agent values.",
     )
+    async_transport: Optional[AsyncTransport] = Field(
+        default=None,
+        description="Async HTTP client pool shared by all tools of the toolkit. Defaults to the process-wide pool.",
+    )
+    multiplexed: bool = Field(
+        default=False,
+        description="Expose a single ads4gpts_ad tool taking an ad_format argument instead of one tool per format.",
+    )
+    registry: ToolRegistry = Field(
+        default=default_registry,
+        exclude=True,
+        description="Registry providing plugin tool classes and cached tool instances.",
+    )
+
+    # Resolved (cache key, constructor arguments) per selected tool class.
+    _plan: Optional[tuple] = PrivateAttr(default=None)
 
     # Move the registry of available tool classes to a class attribute.
     available_tool_classes: List[Type[BaseTool]] = [
@@ -58,8 +85,14 @@ class Ads4gptsToolkit(BaseToolkit):
         ads4gpts_api_key: str,
         tools: Optional[List[str]] = None,
         tool_render_agents: Optional[Dict[str, str]] = None,
+        http2: bool = False,
+        async_transport: Optional[AsyncTransport] = None,
+        load_dotenv: bool = False,
+        multiplexed: bool = False,
         **kwargs,
     ):
+        if load_dotenv:
+            load_env()
         if not ads4gpts_api_key:
             ads4gpts_api_key = os.environ.get("ADS4GPTS_API_KEY")
         if not ads4gpts_api_key:
@@ -72,11 +105,26 @@ class Ads4gptsToolkit(BaseToolkit):
         self.tools = tools
         # Dictionary mapping tool names to their specific render agents.
         self.tool_render_agents = tool_render_agents or {}
+        # One async client pool per event loop, shared by every tool of the
+        # toolkit and, unless one is given, by every toolkit of the process, so
+        # toolkits built per request get the cached tools.
+        self.async_transport = async_transport or get_default_async_transport(http2)
+        # One tool with an ad_format argument keeps the bound tool schemas small.
+        self.multiplexed = multiplexed
 
     def filter_tool_args(self, tool_class, args):
         """Filter the arguments to only include those accepted by the tool's __init__ method."""
-        valid_fields = set(tool_class.model_fields.keys())
-        return {k: v for k, v in args.items() if k in valid_fields}
+        return self.registry.filter_args(tool_class, args)
+
+    def tool_classes(self) -> List[Type[BaseTool]]:
+        """The built-in tool classes followed by those registered as plugins."""
+        if self.multiplexed:
+            return [Ads4gptsAdTool]
+        classes = list(self.available_tool_classes)
+        for tool_class in self.registry.tool_classes():
+            if tool_class not in classes:
+                classes.append(tool_class)
+        return classes
 
     def get_tools(self) -> List[BaseTool]:
         """
@@ -84,20 +132,65 @@ class Ads4gptsToolkit(BaseToolkit):
         If a subset of tool names is provided via the 'tools' parameter,
         only those tools will be instantiated.
         Each tool's 'ads4gpts_render_agent' is updated if specified.
+
+        Tools are built once per configuration and reused by later calls, also
+        across toolkits that share the same arguments and transports.
         """
-        tools_to_use = []
-        for tool_class in self.available_tool_classes:
-            # Instantiate the tool first
-            tool_instance = tool_class(
+        return [
+            self.registry.get_tool_by_key(key, tool_args)
+            for key, tool_args in self._tool_plan()
+        ]
+
+    def _tool_plan(self) -> List[tuple]:
+        """Filter classes and constructor arguments once, redoing it only when the configuration changes."""
+        signature = (
+            self.multiplexed,
+            self.registry.version,
+            self.ads4gpts_api_key,
+            self.async_transport,
+            None if self.tools is None else tuple(self.tools),
+            freeze_args(self.tool_render_agents),
+            freeze_args(self.tool_args),
+        )
+        cached = self._plan
+        # Arguments that cannot be hashed make the plan uncacheable.
+        cacheable = None not in (signature[-2], signature[-1])
+        if cacheable and cached is not None and cached[0] == signature:
+            return cached[1]
+        plan = []
+        for tool_class in self.tool_classes():
+            name = tool_name(tool_class)
+            # The multiplexed tool covers every format, so format tool names don't apply.
+            if (
+                self.tools is not None
+                and not self.multiplexed
+                and name not in self.tools
+            ):
+                continue
+            tool_args = self.filter_tool_args(tool_class, self.tool_args)
+            if name in self.tool_render_agents:
+                tool_args["ads4gpts_render_agent"] = self.tool_render_agents[name]
+            tool_args.update(
                 ads4gpts_api_key=self.ads4gpts_api_key,
-                **self.filter_tool_args(tool_class, self.tool_args),
+                async_transport=self.async_transport,
             )
-            # Now filter based on the instance's name attribute
-            if self.tools is not None and tool_instance.name not in self.tools:
-                continue
-            if tool_instance.name in self.tool_render_agents:
-                tool_instance.ads4gpts_render_agent = self.tool_render_agents[
-                    tool_instance.name
-                ]
-            tools_to_use.append(tool_instance)
-        return tools_to_use
+            plan.append((self.registry.instance_key(tool_class, tool_args), tool_args))
+        self._plan = (signature, plan)
+        return plan
+
+    async def aclose(self):
+        """
+        Close the toolkit's ``async_transport`` on the running event loop.
+
+        The process-wide pool used when no ``async_transport`` was given is shared
+        by every other toolkit and is left open; close it on application shutdown
+        with ``aclose_default_async_transports``.
+        """
+        if not is_default_async_transport(self.async_transport):
+            await self.async_transport.aclose()
+
+    async def __aenter__(self) -> "Ads4gptsToolkit":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -1,13 +1,42 @@
 import logging
-from typing import Any, Dict, Union, List, Optional, Type, Literal, Annotated
+from typing import Any, Dict, Union, List, Optional, Tuple, Type, Literal, Annotated
 
 from pydantic import BaseModel, Field, model_validator
 from enum import Enum
 from langchain_core.tools import BaseTool
-from ads4gpts_langchain.utils import get_from_dict_or_env, get_ads, async_get_ads
-from langgraph.types import Command
+from ads4gpts_langchain.utils import (
+    CIRCUIT_OPEN,
+    DEADLINE_EXCEEDED,
+    RATE_LIMITED,
+    Deadline,
+    async_get_ads,
+    get_ads,
+    get_from_dict_or_env,
+    no_ad_result,
+    retryable_error,
+)
+from ads4gpts_langchain.transport import (
+    AsyncTransport,
+    BackgroundLoop,
+    SyncTransport,
+    is_default_async_transport,
+)
+from ads4gpts_langchain.batching import AdRequestBatcher
+from ads4gpts_langchain.cache import AdCache
+from ads4gpts_langchain.semantic_cache import SemanticAdCache
+from ads4gpts_langchain.stale import StaleAdCache
+from ads4gpts_langchain.inventory import AdInventory
+from ads4gpts_langchain.resilience import CircuitBreaker, RequestHedger
+from ads4gpts_langchain.ratelimit import RateLimiter
+from ads4gpts_langchain.render import AdRenderer
+from ads4gpts_langchain.intent import IntentFilter
+from ads4gpts_langchain.house_ads import HouseAdInventory
 from langchain_core.tools.base import InjectedToolCallId
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import ensure_config
+import asyncio
+import functools
+import itertools
 import uuid
 
 # Configure logging
@@ -21,6 +50,12 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 
+VALID_GENDERS = frozenset({"MALE", "FEMALE", "OTHER", "UNDISCLOSED"})
+# Key under which ``_parse_input`` hands the validated model to ``_run``/``_arun``.
+_VALIDATED_INPUT = "__ads4gpts_validated_input__"
+_PAYLOAD_EXCLUDE = frozenset({"tool_call_id"})
+
+
 class Ads4gptsBaseInput(BaseModel):
     """Base Input schema for Ads4gpts tools."""
 
@@ -65,30 +100,22 @@ class Ads4gptsBaseInput(BaseModel):
     )
 
     @model_validator(mode="before")
-    def validate_user(cls, values):
-        """Validate user fields to ensure they contain valid values."""
+    def validate_fields(cls, values):
+        """Validate the user gender and the tid UUID in a single pass over the raw input."""
+        if not isinstance(values, dict):
+            return values
         gender = values.get("user_gender")
-
-        valid_genders = {"MALE", "FEMALE", "OTHER", "UNDISCLOSED"}
-
-        if gender not in valid_genders:
+        # A missing gender falls back to the field default.
+        if gender is not None and gender not in VALID_GENDERS:
             raise ValueError(
-                f"Invalid gender value: {gender}. Must be one of {valid_genders}"
+                f"Invalid gender value: {gender}. Must be one of {set(VALID_GENDERS)}"
             )
-
-        return values
-
-    @model_validator(mode="before")
-    def validate_tid(cls, values):
-        """Validate tid field to ensure it's a valid UUID."""
-
         tid = values.get("tid")
         if tid:
             try:
                 uuid.UUID(tid)
             except ValueError:
                 raise ValueError(f"Invalid UUID format for tid: {tid}")
-
         return values
 
 
@@ -101,6 +128,13 @@ class AdFormat(str, Enum):
     INLINE_REFERRAL = "INLINE_REFERRAL"
 
 
+def _validate_single_ad(values):
+    num_ads = values.get("num_ads", 1) if isinstance(values, dict) else 1
+    if num_ads != 1:
+        raise ValueError("num_ads must be exactly 1 for Inline Conversational ads.")
+    return values
+
+
 class Ads4gptsInlineSponsoredResponseInput(Ads4gptsBaseInput):
     """Input schema for Ads4gptsInlineSponsoredResponseTool."""
 
@@ -120,10 +154,7 @@ class Ads4gptsInlineConversationalInput(Ads4gptsBaseInput):
 
     @model_validator(mode="before")
     def validate_num_ads(cls, values):
-        num_ads = values.get("num_ads")
-        if num_ads != 1:
-            raise ValueError("num_ads must be exactly 1 for Inline Conversational ads.")
-        return values
+        return _validate_single_ad(values)
 
 
 class Ads4gptsInlineBannerInput(Ads4gptsBaseInput):
@@ -144,6 +175,22 @@ class Ads4gptsInlineReferralInput(Ads4gptsBaseInput):
     ad_format: AdFormat = AdFormat.INLINE_REFERRAL
 
 
+class Ads4gptsAdInput(Ads4gptsBaseInput):
+    """Input schema for Ads4gptsAdTool, which serves every ad format."""
+
+    ad_format: AdFormat = Field(..., description="Ad format to retrieve.")
+
+    @model_validator(mode="before")
+    def validate_format_rules(cls, values):
+        """Apply the rules of the per-format schemas to the selected format."""
+        if (
+            isinstance(values, dict)
+            and values.get("ad_format") == AdFormat.INLINE_CONVERSATIONAL
+        ):
+            return _validate_single_ad(values)
+        return values
+
+
 class Ads4gptsBaseTool(BaseTool):
     """Base tool for Ads4gpts."""
 
@@ -165,6 +212,80 @@ class Ads4gptsBaseTool(BaseTool):
         default=None,
         description="The render agent to use for rendering ads. Defaults to None.",
     )
+    transport: Optional[SyncTransport] = Field(
+        default=None,
+        exclude=True,
+        description="Pooled HTTP transport for synchronous calls. Defaults to the process-wide transport.",
+    )
+    async_transport: Optional[AsyncTransport] = Field(
+        default=None,
+        exclude=True,
+        description="Pooled async HTTP client per event loop. Defaults to the process-wide transport.",
+    )
+    background_loop: Optional[BackgroundLoop] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in event loop thread running synchronous calls through the async path, so both share one pooled client.",
+    )
+    batcher: Optional[AdRequestBatcher] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in batcher coalescing concurrent async requests into batched calls.",
+    )
+    cache: Optional[AdCache] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in response cache shared by the sync and async paths.",
+    )
+    semantic_cache: Optional[SemanticAdCache] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in similarity cache tier consulted after the exact cache.",
+    )
+    stale_cache: Optional[StaleAdCache] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in stale-while-revalidate tier serving the last good result at once and refreshing it in the background.",
+    )
+    inventory: Optional[AdInventory] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in per-session buffer serving ads fetched in bulk over later turns.",
+    )
+    circuit_breaker: Optional[CircuitBreaker] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in breaker returning no ads without calling the API after repeated failures.",
+    )
+    hedger: Optional[RequestHedger] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in hedging of slow API calls with a duplicate request.",
+    )
+    rate_limiter: Optional[RateLimiter] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in client-side rate limit and concurrency cap, e.g. RateLimiter.for_api_key(key).",
+    )
+    intent_filter: Optional[IntentFilter] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in local pre-filter returning no ads without calling the API for requests unlikely to yield one.",
+    )
+    house_ads: Optional[HouseAdInventory] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in local house ads served when the API call fails or exceeds its latency budget.",
+    )
+    renderer: Optional[AdRenderer] = Field(
+        default=None,
+        exclude=True,
+        description="Opt-in template renderer returning ready-to-display ads instead of going through the render agent.",
+    )
+    latency_budget: Optional[float] = Field(
+        default=None,
+        description="Seconds a call may take end to end before it returns a no-ad result. Can be overridden per call.",
+    )
     args_schema: Type[Ads4gptsBaseInput] = Ads4gptsBaseInput
 
     @model_validator(mode="before")
@@ -178,31 +299,302 @@ class Ads4gptsBaseTool(BaseTool):
             values["ads4gpts_api_key"] = api_key
         return values
 
+    def _parse_input(
+        self, tool_input: Union[str, Dict], tool_call_id: Optional[str]
+    ) -> Union[str, Dict]:
+        """
+        Validate tool input once.
+
+        LangChain would validate against ``args_schema`` and ``_run`` would validate
+        the result again; instead the validated model is handed over as is.
+        """
+        if not isinstance(tool_input, dict) or tool_call_id is None:
+            return super()._parse_input(tool_input, tool_call_id)
+        tool_input["tool_call_id"] = tool_call_id
+        return {_VALIDATED_INPUT: self.args_schema.model_validate(tool_input)}
+
+    def _validate(self, kwargs: Dict[str, Any]) -> Ads4gptsBaseInput:
+        """The model validated by ``_parse_input``, or a fresh validation of direct calls."""
+        validated = kwargs.pop(_VALIDATED_INPUT, None)
+        if validated is None:
+            validated = self.args_schema(**kwargs)
+        return validated
+
+    def _deadline(self, kwargs: Dict[str, Any]) -> Optional[Deadline]:
+        """
+        Start the latency budget of a call.
+
+        A ``latency_budget`` keyword or a ``configurable["latency_budget"]`` entry of
+        the run config overrides the tool's budget for this call.
+        """
+        budget = kwargs.pop("latency_budget", None)
+        if budget is None:
+            budget = ensure_config()["configurable"].get(
+                "latency_budget", self.latency_budget
+            )
+        return Deadline(budget) if budget is not None else None
+
+    def _fetch_ads(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+    ) -> Dict:
+        """Fetch ads synchronously through the configured inventory and cache tiers."""
+
+        def fetch(payload: Dict[str, Any]) -> Dict:
+            calls = itertools.count()
+
+            def call() -> Dict:
+                limiter = self.rate_limiter
+                # The limiter admitted the first call; a hedged duplicate takes
+                # another token.
+                if next(calls) and limiter is not None:
+                    if not limiter.acquire_retry(
+                        deadline.remaining() if deadline else None
+                    ):
+                        return retryable_error(
+                            "Hedged request shed by the rate limiter"
+                        )
+                return get_ads(
+                    url=url,
+                    headers=headers,
+                    payload=payload,
+                    transport=self.transport,
+                    deadline=deadline,
+                    rate_limiter=limiter,
+                )
+
+            def fetch_breaker() -> Dict:
+                breaker = self.circuit_breaker
+                if breaker is not None and not breaker.allow():
+                    return no_ad_result(CIRCUIT_OPEN)
+                try:
+                    result = self.hedger.run_sync(call) if self.hedger else call()
+                except Exception as err:
+                    result = retryable_error(str(err))
+                if breaker is not None:
+                    breaker.record(result)
+                return result
+
+            def fetch_upstream() -> Dict:
+                limiter = self.rate_limiter
+                if limiter is None:
+                    return fetch_breaker()
+                if not limiter.acquire(deadline.remaining() if deadline else None):
+                    return no_ad_result(RATE_LIMITED)
+                try:
+                    return fetch_breaker()
+                finally:
+                    limiter.release()
+
+            # The stale-while-revalidate tier is consulted first, then the exact
+            # cache, the semantic tier, the intent pre-filter and the API.
+            if self.intent_filter is not None:
+                fetch_upstream = functools.partial(
+                    self.intent_filter.get_or_fetch, payload, fetch_upstream
+                )
+            # Stale results are refreshed past the caches, which would return them.
+            fetch_fresh = fetch_upstream
+            if self.semantic_cache is not None:
+                fetch_upstream = functools.partial(
+                    self.semantic_cache.get_or_fetch, payload, fetch_upstream
+                )
+            if self.cache is not None:
+                # Callers coalesced onto another's fetch wait within their own budget.
+                fetch_upstream = functools.partial(
+                    self.cache.get_or_fetch, payload, fetch_upstream, deadline=deadline
+                )
+            if self.stale_cache is not None:
+                return self.stale_cache.get_or_fetch(
+                    payload, fetch_upstream, refresh=fetch_fresh
+                )
+            return fetch_upstream()
+
+        if self.inventory is not None:
+            return self.inventory.get_or_fetch(payload, fetch)
+        return fetch(payload)
+
+    async def _afetch_ads(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+    ) -> Dict:
+        """Fetch ads asynchronously through the configured inventory and cache tiers."""
+
+        async def fetch(payload: Dict[str, Any]) -> Dict:
+            calls = itertools.count()
+
+            async def call() -> Dict:
+                limiter = self.rate_limiter
+                if next(calls) and limiter is not None:
+                    if not await limiter.aacquire_retry(
+                        deadline.remaining() if deadline else None
+                    ):
+                        return retryable_error(
+                            "Hedged request shed by the rate limiter"
+                        )
+                if self.batcher is not None:
+                    return await self.batcher.submit(
+                        url,
+                        headers,
+                        payload,
+                        transport=self.async_transport,
+                        deadline=deadline,
+                        rate_limiter=limiter,
+                    )
+                return await async_get_ads(
+                    url=url,
+                    headers=headers,
+                    payload=payload,
+                    transport=self.async_transport,
+                    deadline=deadline,
+                    rate_limiter=limiter,
+                )
+
+            async def fetch_breaker() -> Dict:
+                breaker = self.circuit_breaker
+                if breaker is not None and not breaker.allow():
+                    return no_ad_result(CIRCUIT_OPEN)
+                try:
+                    result = await (self.hedger.run(call) if self.hedger else call())
+                except asyncio.CancelledError:
+                    # Cancelled by the latency budget: the call missed its deadline.
+                    if breaker is not None:
+                        breaker.record(no_ad_result(DEADLINE_EXCEEDED))
+                    raise
+                except Exception as err:
+                    result = retryable_error(str(err))
+                if breaker is not None:
+                    breaker.record(result)
+                return result
+
+            async def fetch_upstream() -> Dict:
+                limiter = self.rate_limiter
+                if limiter is None:
+                    return await fetch_breaker()
+                timeout = deadline.remaining() if deadline else None
+                if not await limiter.aacquire(timeout):
+                    return no_ad_result(RATE_LIMITED)
+                try:
+                    return await fetch_breaker()
+                finally:
+                    limiter.release()
+
+            if self.intent_filter is not None:
+                fetch_upstream = functools.partial(
+                    self.intent_filter.aget_or_fetch, payload, fetch_upstream
+                )
+            fetch_fresh = fetch_upstream
+            for tier in (self.semantic_cache, self.cache):
+                if tier is not None:
+                    fetch_upstream = functools.partial(
+                        tier.aget_or_fetch, payload, fetch_upstream
+                    )
+            if self.stale_cache is not None:
+                return await self.stale_cache.aget_or_fetch(
+                    payload, fetch_upstream, refresh=fetch_fresh
+                )
+            return await fetch_upstream()
+
+        if self.inventory is not None:
+            fetching = self.inventory.aget_or_fetch(payload, fetch)
+        else:
+            fetching = fetch(payload)
+        if deadline is None:
+            return await fetching
+        try:
+            # Cancels the in-flight request once the budget runs out.
+            return await asyncio.wait_for(fetching, deadline.remaining())
+        except asyncio.TimeoutError:
+            logger.warning("Latency budget exceeded, returning no ads")
+            return no_ad_result(DEADLINE_EXCEEDED)
+
+    def _respond(self, ads: Dict, ad_format: Any, tool_call_id: Optional[str]) -> Any:
+        """
+        Shape the tool result.
+
+        Formats handled by the ``renderer`` are returned ready to display, and
+        inside a graph the tool routes to ``END`` with the rendered ads as an
+        ``AIMessage`` after the ``ToolMessage``. Otherwise the raw ads are handed
+        to the render agent, if one is set, or returned as is.
+        """
+        if self.renderer is not None and self.renderer.handles(ad_format):
+            rendered = self.renderer.render(ads, ad_format)
+            if tool_call_id is None:
+                return rendered
+            from langgraph.graph import END
+            from langgraph.types import Command
+
+            messages = [
+                ToolMessage(content=ads, name=self.name, tool_call_id=tool_call_id)
+            ]
+            if rendered:
+                messages.append(AIMessage(content=rendered, name=self.name))
+            return Command(goto=END, update={"messages": messages})
+        if self.ads4gpts_render_agent:
+            from langgraph.types import Command
+
+            return Command(
+                goto=self.ads4gpts_render_agent,
+                update={
+                    "messages": [
+                        ToolMessage(
+                            content=ads,
+                            name=self.name,
+                            tool_call_id=tool_call_id,
+                        )
+                    ]
+                },
+            )
+        return ads
+
+    def _get_ads(self, kwargs: Dict[str, Any]) -> Tuple[Dict, Ads4gptsBaseInput]:
+        """Validate a call and fetch its raw ads, falling back to house ads."""
+        deadline = self._deadline(kwargs)
+        validated_args = self._validate(kwargs)
+        url = f"{self.base_url}{self.ads_endpoint}"
+        headers = {"Authorization": f"Bearer {self.ads4gpts_api_key}"}
+        payload = validated_args.model_dump(exclude=_PAYLOAD_EXCLUDE)
+        if deadline is not None and deadline.expired:
+            ads = no_ad_result(DEADLINE_EXCEEDED)
+        else:
+            ads = self._fetch_ads(url, headers, payload, deadline)
+        if self.house_ads is not None:
+            ads = self.house_ads.fallback(payload, ads)
+        return ads, validated_args
+
+    async def _aget_ads(self, kwargs: Dict[str, Any]) -> Tuple[Dict, Ads4gptsBaseInput]:
+        """Async ``_get_ads``."""
+        deadline = self._deadline(kwargs)
+        validated_args = self._validate(kwargs)
+        url = f"{self.base_url}{self.ads_endpoint}"
+        headers = {"Authorization": f"Bearer {self.ads4gpts_api_key}"}
+        payload = validated_args.model_dump(exclude=_PAYLOAD_EXCLUDE)
+        if deadline is not None and deadline.expired:
+            ads = no_ad_result(DEADLINE_EXCEEDED)
+        else:
+            ads = await self._afetch_ads(url, headers, payload, deadline)
+        if self.house_ads is not None:
+            ads = self.house_ads.fallback(payload, ads)
+        return ads, validated_args
+
     def _run(self, **kwargs) -> Union[Dict, List[Dict]]:
-        """Synchronous method to retrieve ads."""
+        """
+        Synchronous method to retrieve ads.
+
+        With a ``background_loop`` the call runs ``_arun`` on that loop, over the
+        async transport, retries and limits, and blocks until it returns.
+        """
         try:
-            validated_args = self.args_schema(**kwargs)
-            url = f"{self.base_url}{self.ads_endpoint}"
-            headers = {"Authorization": f"Bearer {self.ads4gpts_api_key}"}
-            payload = validated_args.model_dump()
-            tool_call_id = payload.pop("tool_call_id", None)
-            if self.ads4gpts_render_agent:
-                return Command(
-                    goto=self.ads4gpts_render_agent,
-                    update={
-                        "messages": [
-                            ToolMessage(
-                                content=get_ads(
-                                    url=url, headers=headers, payload=payload
-                                ),
-                                name=self.name,
-                                tool_call_id=tool_call_id,
-                            )
-                        ]
-                    },
-                )
-            else:
-                return get_ads(url=url, headers=headers, payload=payload)
+            if self.background_loop is not None:
+                return self.background_loop.run(self._arun(**kwargs))
+            ads, validated_args = self._get_ads(kwargs)
+            ad_format = getattr(validated_args, "ad_format", None)
+            return self._respond(ads, ad_format, validated_args.tool_call_id)
         except Exception as e:
             logger.error(f"An error occurred in _run: {e}")
             return {"error": str(e)}
@@ -210,31 +602,29 @@ class Ads4gptsBaseTool(BaseTool):
     async def _arun(self, **kwargs) -> Union[Dict, List[Dict]]:
         """Asynchronous method to retrieve ads."""
         try:
-            validated_args = self.args_schema(**kwargs)
-            url = f"{self.base_url}{self.ads_endpoint}"
-            headers = {"Authorization": f"Bearer {self.ads4gpts_api_key}"}
-            payload = validated_args.model_dump()
-            tool_call_id = payload.pop("tool_call_id", None)
-            ads = await async_get_ads(url=url, headers=headers, payload=payload)
-            if self.ads4gpts_render_agent:
-                return Command(
-                    goto=self.ads4gpts_render_agent,
-                    update={
-                        "messages": [
-                            ToolMessage(
-                                content=ads,
-                                name=self.name,
-                                tool_call_id=tool_call_id,
-                            )
-                        ]
-                    },
-                )
-            else:
-                return ads
+            ads, validated_args = await self._aget_ads(kwargs)
+            ad_format = getattr(validated_args, "ad_format", None)
+            return self._respond(ads, ad_format, validated_args.tool_call_id)
         except Exception as e:
             logger.error(f"An error occurred in _arun: {e}")
             return {"error": str(e)}
 
+    async def aclose(self):
+        """
+        Close the async client this tool owns on the running event loop; the
+        process-wide pool shared with other tools is left open.
+        """
+        if self.async_transport is not None and not is_default_async_transport(
+            self.async_transport
+        ):
+            await self.async_transport.aclose()
+
+    async def __aenter__(self) -> "Ads4gptsBaseTool":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
 
 class Ads4gptsInlineSponsoredResponseTool(Ads4gptsBaseTool):
     name: str = "ads4gpts_inline_sponsored_response"
@@ -376,3 +766,12 @@ class Ads4gptsInlineReferralTool(Ads4gptsBaseTool):
             Dict: Contains the "advertiser_agents" key with a list of ads.
     """
     args_schema: Type[Ads4gptsInlineReferralInput] = Ads4gptsInlineReferralInput
+
+
+class Ads4gptsAdTool(Ads4gptsBaseTool):
+    name: str = "ads4gpts_ad"
+    description: str = (
+        "Retrieve ads of the given ad_format relevant to the user and context. "
+        "INLINE_CONVERSATIONAL requires num_ads=1."
+    )
+    args_schema: Type[Ads4gptsAdInput] = Ads4gptsAdInput
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, Optional, TypeVar
+
+# The HTTP stacks are imported on first use so only the one actually used is loaded.
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SyncTransport:
+    """
+    Thread-safe, connection-pooled HTTP transport for synchronous ad fetches.
+
+    A single ``requests.Session`` is shared by every caller, so TCP and TLS
+    connections are reused across calls and threads instead of being opened
+    and torn down for every ad.
+
+    Args:
+        pool_connections (int): Number of host pools to cache.
+        pool_maxsize (int): Maximum number of connections kept per host.
+        keep_alive (bool): Reuse connections between requests. If False, every
+            request asks the server to close the connection.
+        idle_timeout (Optional[float]): Seconds a transport may sit unused before
+            its pooled connections are evicted. ``None`` disables eviction.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        keep_alive: bool = True,
+        idle_timeout: Optional[float] = 60.0,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._in_flight = 0
+        self._last_used = time.monotonic()
+
+    def _build_session(self) -> requests.Session:
+        import requests
+
+        session = requests.Session()
+        # Retries are driven by get_ads so the shared adapter carries no per-call state.
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def _acquire(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._session = self._build_session()
+            elif (
+                self.idle_timeout is not None
+                and self._in_flight == 0
+                and time.monotonic() - self._last_used > self.idle_timeout
+            ):
+                logger.debug("Evicting idle pooled connections")
+                for adapter in self._session.adapters.values():
+                    adapter.poolmanager.clear()
+            self._in_flight += 1
+            self._last_used = time.monotonic()
+            return self._session
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._last_used = time.monotonic()
+
+    def post(
+        self,
+        url: str,
+        json: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: float,
+    ) -> requests.Response:
+        """Send a POST request over the pooled session."""
+        session = self._acquire()
+        try:
+            return session.post(url, json=json, headers=headers, timeout=timeout)
+        finally:
+            self._release()
+
+    def close(self):
+        """Close all pooled connections. The transport can still be reused afterwards."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self) -> "SyncTransport":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_transport: Optional[SyncTransport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> SyncTransport:
+    """Return the process-wide transport used when no transport is given."""
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = SyncTransport()
+    return _default_transport
+
+
+# Live async transports, whose clients a ``BackgroundLoop`` closes on shutdown.
+_async_transports: "weakref.WeakSet[AsyncTransport]" = weakref.WeakSet()
+
+
+class AsyncTransport:
+    """
+    Long-lived, connection-pooled ``httpx.AsyncClient`` for asynchronous ad fetches.
+
+    An ``httpx.AsyncClient`` is bound to the event loop it was first used on, so
+    one client is kept per running event loop and reused by every call made on it.
+
+    Args:
+        http2 (bool): Enable HTTP/2 multiplexing. Requires the ``h2`` package.
+        max_connections (int): Maximum number of concurrent connections.
+        max_keepalive_connections (int): Maximum number of idle connections kept alive.
+        keepalive_expiry (float): Seconds an idle connection is kept before eviction.
+    """
+
+    def __init__(
+        self,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+    ):
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    "HTTP/2 support requires the 'h2' package. "
+                    "Install it with `pip install ads4gpts-langchain[http2]`."
+                )
+        import httpx
+
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._lock = threading.Lock()
+        self._clients: (
+            "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]"
+        ) = weakref.WeakKeyDictionary()
+        _async_transports.add(self)
+        self._slots: (
+            "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]"
+        ) = weakref.WeakKeyDictionary()
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Return the client bound to the running event loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._clients.get(loop)
+                if client is None or client.is_closed:
+                    import httpx
+
+                    client = httpx.AsyncClient(http2=self.http2, limits=self.limits)
+                    self._clients[loop] = client
+        return client
+
+    def _slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slot = self._slots.get(loop)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.get(loop)
+                if slot is None:
+                    slot = self._slots[loop] = asyncio.Semaphore(self.max_connections)
+        return slot
+
+    async def post(
+        self,
+        url: str,
+        json: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: float,
+    ) -> httpx.Response:
+        """
+        Send a POST request over the client of the running event loop.
+
+        Requests beyond ``max_connections`` wait in a FIFO queue here rather than
+        in the httpx pool, which wakes every queued request whenever a connection
+        frees up. The wait is bounded by ``timeout``, like the httpx pool timeout.
+        """
+        import httpx
+
+        slot = self._slot()
+        if slot.locked():
+            try:
+                await asyncio.wait_for(slot.acquire(), timeout)
+            except asyncio.TimeoutError:
+                raise httpx.PoolTimeout("Timed out waiting for a pooled connection")
+        else:
+            await slot.acquire()
+        try:
+            return await self.get_client().post(
+                url, json=json, headers=headers, timeout=timeout
+            )
+        finally:
+            slot.release()
+
+    async def aclose(self):
+        """
+        Close the client bound to the running event loop.
+
+        Clients bound to other event loops cannot be awaited from here and are
+        left open; call ``aclose`` on each of those loops to close them.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    async def __aenter__(self) -> "AsyncTransport":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+_default_async_transports: Dict[bool, AsyncTransport] = {}
+
+
+def get_default_async_transport(http2: bool = False) -> AsyncTransport:
+    """Return the process-wide async transport used when no transport is given."""
+    transport = _default_async_transports.get(http2)
+    if transport is None:
+        with _default_transport_lock:
+            transport = _default_async_transports.get(http2)
+            if transport is None:
+                transport = _default_async_transports[http2] = AsyncTransport(
+                    http2=http2
+                )
+    return transport
+
+
+def is_default_async_transport(transport: AsyncTransport) -> bool:
+    """Whether ``transport`` is a process-wide pool, which only shutdown may close."""
+    return any(transport is default for default in _default_async_transports.values())
+
+
+async def aclose_default_async_transports():
+    """
+    Close the running event loop's clients of the process-wide async transports,
+    e.g. on ASGI application shutdown.
+    """
+    for transport in list(_default_async_transports.values()):
+        await transport.aclose()
+
+
+class BackgroundLoop:
+    """
+    An event loop running in a daemon thread, for synchronous callers to share.
+
+    ``run`` hands a coroutine to the loop and blocks the calling thread until it
+    finishes, so synchronous code in any number of threads goes through the
+    async stack: one pooled ``httpx.AsyncClient`` per ``AsyncTransport``, the
+    async retries, rate limits and request batching. The caller's context
+    variables, such as the LangChain run config, are carried over.
+
+    The thread is started on first use and restarted after ``close``.
+
+    Args:
+        name (str): Name of the loop thread.
+    """
+
+    def __init__(self, name: str = "ads4gpts-loop"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _serve(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, starting its thread if needed."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._serve, args=(self._loop,), name=self.name, daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run ``coro`` on the loop and return its result, waiting at most ``timeout`` seconds."""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run would block its own event loop")
+        context = contextvars.copy_context()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        tasks = []
+
+        def done(task: asyncio.Task):
+            if task.cancelled():
+                future.set_exception(concurrent.futures.CancelledError())
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        def start():
+            if not future.set_running_or_notify_cancel():
+                coro.close()
+                return
+            # The task runs in a copy of the caller's context.
+            task = context.run(loop.create_task, coro)
+            task.add_done_callback(done)
+            tasks.append(task)
+
+        loop.call_soon_threadsafe(start)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # Not started yet: ``start`` sees the cancellation and drops the coroutine.
+            if not future.cancel():
+                loop.call_soon_threadsafe(lambda: [task.cancel() for task in tasks])
+            raise
+
+    def close(self):
+        """
+        Cancel pending tasks, close the ``AsyncTransport`` clients bound to the
+        loop, stop the loop and join its thread.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def shutdown():
+            current = asyncio.current_task()
+            pending = [t for t in asyncio.all_tasks() if t is not current]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for transport in list(_async_transports):
+                try:
+                    await transport.aclose()
+                except Exception as err:
+                    logger.warning(f"Failed to close an async client: {err}")
+            await loop.shutdown_asyncgens()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+_default_background_loop: Optional[BackgroundLoop] = None
+
+
+def get_default_background_loop() -> BackgroundLoop:
+    """Return the process-wide background loop."""
+    global _default_background_loop
+    if _default_background_loop is None:
+        with _default_transport_lock:
+            if _default_background_loop is None:
+                _default_background_loop = BackgroundLoop()
+    return _default_background_loop
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Union, Optional
+from typing import List, Dict, Any, Mapping, Union, Optional, Callable
 import os
 
 
@@ -15,6 +15,18 @@ def get_from_env(key: str, env_key: str, default: Optional[str] = None) -> str:
         )
 
 
+def load_env(dotenv_path: Optional[str] = None, override: bool = False) -> bool:
+    """
+    Load environment variables such as ADS4GPTS_API_KEY from a .env file.
+
+    Nothing is read from .env implicitly; call this (or pass ``load_dotenv=True``
+    to ``Ads4gptsToolkit``) to opt in. Requires the ``python-dotenv`` package.
+    """
+    from dotenv import load_dotenv
+
+    return load_dotenv(dotenv_path, override=override)
+
+
 def get_from_dict_or_env(
     data: Dict[str, Any],
     key: Union[str, List[str]],
@@ -33,10 +45,17 @@ def get_from_dict_or_env(
 
 
 import logging
-import requests
-import httpx
+import time
 import asyncio
+from email.utils import parsedate_to_datetime
 
+from ads4gpts_langchain.ratelimit import RateLimiter
+from ads4gpts_langchain.transport import (
+    AsyncTransport,
+    SyncTransport,
+    get_default_async_transport,
+    get_default_transport,
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -48,6 +67,83 @@ formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(messag
 handler.setFormatter(formatter)
 
 
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEADLINE_EXCEEDED = "deadline_exceeded"
+CIRCUIT_OPEN = "circuit_open"
+RATE_LIMITED = "rate_limited"
+LOW_INTENT = "low_intent"
+# Error the API answers with when no ad matched the request.
+NO_ADVERTISER_AGENTS = "No advertiser_agents found in response data"
+
+
+def no_ad_result(reason: str) -> Dict:
+    """Well-defined empty result returned when no ad should be shown."""
+    return {"advertiser_agents": [], "no_ad_reason": reason}
+
+
+def retryable_error(message: str) -> Dict:
+    """
+    Error result of a call the API never answered: a transport failure or a
+    5xx status still returned after the last retry.
+    """
+    return {"error": message, "retryable": True}
+
+
+class Deadline:
+    """A latency budget shared by validation, every attempt and the backoff sleeps of a call."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, budget: float):
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def _backoff_delay(delay: float, deadline: Optional[Deadline]) -> Optional[float]:
+    """Backoff before the next attempt, or None if it would overrun the deadline."""
+    if deadline is not None and delay >= deadline.remaining():
+        return None
+    return delay
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds requested by a ``Retry-After`` header, in seconds or as an HTTP date."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_ads_response(response_json: Dict[str, Any]) -> Dict:
+    """Turn an ads API response body into the tool result dictionary."""
+    payload = response_json.get("payload", {})
+    status = payload.get("status", None)
+    if status == "success":
+        advertiser_agents = payload.get("data", {}).get("advertiser_agents", None)
+        if advertiser_agents:
+            return {"advertiser_agents": advertiser_agents}
+        return {"error": NO_ADVERTISER_AGENTS}
+    elif status == "error":
+        error_msg = payload.get("error", {}).get("message", "Unknown error")
+        # The status tells errors reported by the API from transport failures.
+        return {"error": error_msg, "status": "error"}
+
+    return {"error": "Unexpected response format"}
+
+
 def get_ads(
     url: str,
     headers: Dict[str, str],
@@ -55,45 +151,145 @@ def get_ads(
     num_retries: int = 3,
     backoff_factor: float = 0.2,
     timeout: float = 10.0,
+    transport: Optional[SyncTransport] = None,
+    deadline: Optional[Deadline] = None,
+    rate_limiter: Optional[RateLimiter] = None,
 ) -> Dict:
-    session = requests.Session()
-    retries = requests.adapters.Retry(
-        total=num_retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=[500, 502, 503, 504],
-        allowed_methods=["POST"],
-    )
-    adapter = requests.adapters.HTTPAdapter(max_retries=retries)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
+    """
+    Fetch ads synchronously over a pooled transport, retrying transient failures.
 
-    try:
-        response = session.post(url, json=payload, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        response_json = response.json()
-        payload = response_json.get("payload", {})
-        status = payload.get("status", None)
-        if status == "success":
-            advertiser_agents = payload.get("data", {}).get("advertiser_agents", None)
-            if advertiser_agents:
-                return {"advertiser_agents": advertiser_agents}
-            return {"error": "No advertiser_agents found in response data"}
-        elif status == "error":
-            error_msg = payload.get("error", {}).get("message", "Unknown error")
-            return {"error": error_msg}
-
-        return {"error": "Unexpected response format"}
-    except requests.exceptions.HTTPError as http_err:
-        logger.error(f"HTTP error: {http_err}")
-        return {"error": str(http_err)}
-    except requests.exceptions.RequestException as req_err:
-        logger.error(f"Request error: {req_err}")
-        return {"error": str(req_err)}
-    except Exception as err:
-        logger.error(f"General error: {err}")
-        return {"error": str(err)}
-    finally:
-        session.close()
+    With a ``deadline``, each attempt's timeout is clipped to the remaining budget
+    and a no-ad result is returned once the budget is spent. With a
+    ``rate_limiter``, every retry takes a token of its own. 429 answers are
+    retried after the ``Retry-After`` the server asked for.
+    """
+    import requests
+
+    transport = transport or get_default_transport()
+    for attempt in range(num_retries + 1):
+        attempt_timeout = timeout
+        if deadline is not None:
+            if deadline.expired:
+                return no_ad_result(DEADLINE_EXCEEDED)
+            attempt_timeout = min(timeout, deadline.remaining())
+        retry_after = None
+        try:
+            response = transport.post(
+                url, json=payload, headers=headers, timeout=attempt_timeout
+            )
+            if response.status_code in RETRY_STATUSES and attempt < num_retries:
+                error = f"HTTP error: status {response.status_code}"
+                logger.error(f"{error} on attempt {attempt + 1}")
+                retry_after = _retry_after(response.headers)
+                response.close()
+            else:
+                response.raise_for_status()
+                return _parse_ads_response(response.json())
+        except requests.exceptions.HTTPError as http_err:
+            logger.error(f"HTTP error: {http_err}")
+            if http_err.response is not None and (
+                http_err.response.status_code in RETRY_STATUSES
+            ):
+                return retryable_error(str(http_err))
+            return {"error": str(http_err)}
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ) as conn_err:
+            logger.error(f"Request error on attempt {attempt + 1}: {conn_err}")
+            if deadline is not None and deadline.expired:
+                return no_ad_result(DEADLINE_EXCEEDED)
+            if attempt == num_retries:
+                return retryable_error(str(conn_err))
+            error = str(conn_err)
+        except requests.exceptions.RequestException as req_err:
+            logger.error(f"Request error: {req_err}")
+            return retryable_error(str(req_err))
+        except Exception as err:
+            logger.error(f"General error: {err}")
+            return {"error": str(err)}
+        delay = backoff_factor * (2**attempt)
+        if retry_after is not None:
+            # A server asking for more than an attempt's timeout is not retried.
+            if retry_after > timeout:
+                return retryable_error(error)
+            delay = max(delay, retry_after)
+        delay = _backoff_delay(delay, deadline)
+        if delay is None:
+            return no_ad_result(DEADLINE_EXCEEDED)
+        time.sleep(delay)
+        if rate_limiter is not None and not rate_limiter.acquire_retry(
+            deadline.remaining() if deadline else None
+        ):
+            return retryable_error(error)
+
+
+async def _async_post_with_retries(
+    url: str,
+    headers: Dict[str, str],
+    body: Dict[str, Any],
+    parse: Callable[[Dict[str, Any]], Dict],
+    num_retries: int = 3,
+    backoff_factor: float = 0.2,
+    timeout: float = 10.0,
+    transport: Optional[AsyncTransport] = None,
+    deadline: Optional[Deadline] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> Dict:
+    """POST ``body`` with manual retries and turn the response JSON into a result via ``parse``."""
+    import httpx
+
+    transport = transport or get_default_async_transport()
+    for attempt in range(1, num_retries + 1):
+        attempt_timeout = timeout
+        if deadline is not None:
+            if deadline.expired:
+                return no_ad_result(DEADLINE_EXCEEDED)
+            attempt_timeout = min(timeout, deadline.remaining())
+        retry_after = None
+        try:
+            response = await transport.post(
+                url, json=body, headers=headers, timeout=attempt_timeout
+            )
+            response.raise_for_status()
+            return parse(response.json())
+        except httpx.HTTPStatusError as http_err:
+            logger.error(
+                f"HTTP error on attempt {attempt} of {num_retries}: {http_err}"
+            )
+            if attempt == num_retries:
+                if http_err.response.status_code in RETRY_STATUSES:
+                    return retryable_error(str(http_err))
+                return {"error": str(http_err)}
+            error = str(http_err)
+            if http_err.response.status_code in RETRY_STATUSES:
+                retry_after = _retry_after(http_err.response.headers)
+        except httpx.TransportError as conn_err:
+            logger.error(
+                f"Connection error on attempt {attempt} of {num_retries}: {conn_err}"
+            )
+            if deadline is not None and deadline.expired:
+                return no_ad_result(DEADLINE_EXCEEDED)
+            if attempt == num_retries:
+                return retryable_error(str(conn_err))
+            error = str(conn_err)
+        except Exception as err:
+            logger.error(f"General error: {err}")
+            return {"error": str(err)}
+        delay = backoff_factor * (2 ** (attempt - 1))
+        if retry_after is not None:
+            # A server asking for more than an attempt's timeout is not retried.
+            if retry_after > timeout:
+                return retryable_error(error)
+            delay = max(delay, retry_after)
+        delay = _backoff_delay(delay, deadline)
+        if delay is None:
+            return no_ad_result(DEADLINE_EXCEEDED)
+        await asyncio.sleep(delay)
+        if rate_limiter is not None and not await rate_limiter.aacquire_retry(
+            deadline.remaining() if deadline else None
+        ):
+            return retryable_error(error)
 
 
 async def async_get_ads(
@@ -103,46 +299,20 @@ async def async_get_ads(
     num_retries: int = 3,
     backoff_factor: float = 0.2,
     timeout: float = 10.0,
+    transport: Optional[AsyncTransport] = None,
+    deadline: Optional[Deadline] = None,
+    rate_limiter: Optional[RateLimiter] = None,
 ) -> Dict:
     """Fetch ads asynchronously with manual retry mechanism."""
-
-    async with httpx.AsyncClient() as client:
-        for attempt in range(1, num_retries + 1):
-            try:
-                response = await client.post(
-                    url, json=payload, headers=headers, timeout=timeout
-                )
-                response.raise_for_status()
-                response_json = response.json()
-
-                payload = response_json.get("payload", {})
-                status = payload.get("status", None)
-                if status == "success":
-                    advertiser_agents = payload.get("data", {}).get(
-                        "advertiser_agents", None
-                    )
-                    if advertiser_agents:
-                        return {"advertiser_agents": advertiser_agents}
-                    return {"error": "No advertiser_agents found in response data"}
-                elif status == "error":
-                    error_msg = payload.get("error", {}).get("message", "Unknown error")
-                    return {"error": error_msg}
-
-                return {"error": "Unexpected response format"}
-            except httpx.HTTPStatusError as http_err:
-                logger.error(
-                    f"HTTP error on attempt {attempt} of {num_retries}: {http_err}"
-                )
-                if attempt == num_retries:
-                    return {"error": str(http_err)}
-                await asyncio.sleep(backoff_factor * (2 ** (attempt - 1)))
-            except (httpx.ConnectError, httpx.ReadTimeout) as conn_err:
-                logger.error(
-                    f"Connection error on attempt {attempt} of {num_retries}: {conn_err}"
-                )
-                if attempt == num_retries:
-                    return {"error": str(conn_err)}
-                await asyncio.sleep(backoff_factor * (2 ** (attempt - 1)))
-            except Exception as err:
-                logger.error(f"General error: {err}")
-                return {"error": str(err)}
+    return await _async_post_with_retries(
+        url,
+        headers,
+        payload,
+        _parse_ads_response,
+        num_retries=num_retries,
+        backoff_factor=backoff_factor,
+        timeout=timeout,
+        transport=transport,
+        deadline=deadline,
+        rate_limiter=rate_limiter,
+    )
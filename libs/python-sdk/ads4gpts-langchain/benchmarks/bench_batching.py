@@ -0,0 +1,77 @@
+"""
+Benchmark: individual async ad requests vs the AdRequestBatcher.
+
+Fires waves of concurrent requests, like many LangGraph sessions reaching their
+ad node together, at a local stand-in ads server that also serves a batch
+endpoint. Reports throughput and the number of upstream HTTP requests.
+
+    PYTHONPATH=. python benchmarks/bench_batching.py --sessions 200 --waves 10
+"""
+
+import argparse
+import asyncio
+import time
+
+from ads4gpts_langchain.batching import AdRequestBatcher
+from ads4gpts_langchain.transport import AsyncTransport
+from ads4gpts_langchain.utils import async_get_ads
+from ads4gpts_langchain.tests.standin import StandInAdServer
+
+PAYLOAD = {"ad_format": "INLINE_SPONSORED_RESPONSE", "num_ads": 1}
+HEADERS = {"Authorization": "Bearer bench"}
+
+
+async def run(label, server, fetch, sessions, waves):
+    upstream = len(server.requests)
+    start = time.perf_counter()
+    for _ in range(waves):
+        results = await asyncio.gather(*(fetch() for _ in range(sessions)))
+        assert all("advertiser_agents" in result for result in results), results[0]
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<22} {sessions * waves / elapsed:>9.1f} ads/s"
+        f"   upstream requests {len(server.requests) - upstream}"
+    )
+
+
+async def main(args):
+    with StandInAdServer(latency=args.latency) as server:
+        async with AsyncTransport(max_connections=args.connections) as transport:
+            await run(
+                "individual requests",
+                server,
+                lambda: async_get_ads(
+                    server.url, HEADERS, PAYLOAD, transport=transport
+                ),
+                args.sessions,
+                args.waves,
+            )
+            for label, endpoint in (
+                ("batcher (pass-through)", None),
+                ("batcher (batch)", "batch/"),
+            ):
+                batcher = AdRequestBatcher(
+                    max_batch_size=args.batch_size,
+                    max_wait_ms=args.wait_ms,
+                    batch_endpoint=endpoint,
+                )
+                await run(
+                    label,
+                    server,
+                    lambda: batcher.submit(
+                        server.url, HEADERS, PAYLOAD, transport=transport
+                    ),
+                    args.sessions,
+                    args.waves,
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--waves", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--connections", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
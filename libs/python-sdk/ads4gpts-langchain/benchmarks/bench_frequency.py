@@ -0,0 +1,57 @@
+"""
+Benchmark: cost of a frequency capping decision per store.
+
+Runs ``FrequencyEngine.decide`` with every-N, Fibonacci, time and daily-cap
+policies over a pool of users, in memory and in a local SQLite file.
+
+    PYTHONPATH=. python benchmarks/bench_frequency.py --decisions 100000 --users 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from ads4gpts_langchain.frequency import (
+    DailyCap,
+    EveryN,
+    FibonacciBackoff,
+    FrequencyEngine,
+    MemoryFrequencyStore,
+    MinInterval,
+    SQLiteFrequencyStore,
+)
+
+
+def bench(store, args):
+    engine = FrequencyEngine(
+        [EveryN(2), FibonacciBackoff(max_gap=13), MinInterval(0), DailyCap(50)],
+        store=store,
+    )
+    users = [f"user-{i}" for i in range(args.users)]
+    start = time.perf_counter()
+    for i in range(args.decisions):
+        engine.decide(users[i % args.users])
+    elapsed = time.perf_counter() - start
+    return elapsed / args.decisions * 1e6, engine.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--decisions", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": MemoryFrequencyStore(),
+            "sqlite": SQLiteFrequencyStore(os.path.join(tmp, "frequency.db")),
+        }
+        for label, store in stores.items():
+            per_decision, stats = bench(store, args)
+            print(f"{label:<8} {per_decision:>8.2f} us/decision   {stats}")
+        stores["sqlite"].close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: cost of selecting a house ad on an upstream failure.
+
+Builds a house ad inventory of keyword-targeted and untargeted ads across the
+ad formats and times ``HouseAdInventory.fallback`` for failed requests.
+
+    PYTHONPATH=. python benchmarks/bench_house_ads.py --ads 5000 --selections 100000
+"""
+
+import argparse
+import random
+import time
+
+from ads4gpts_langchain.house_ads import HouseAdInventory
+from ads4gpts_langchain.tools import AdFormat
+
+VOCABULARY = (
+    "running shoes laptop travel flights hotel coffee recipes fitness yoga "
+    "finance budgeting insurance music headphones gaming books courses python "
+    "gardening pets dogs cats skincare fashion camera photography"
+).split()
+FORMATS = [ad_format.value for ad_format in AdFormat]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ads", type=int, default=5000)
+    parser.add_argument("--selections", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records = [
+        {
+            "ad_id": f"house-{i}",
+            "ad_title": f"House ad {i}",
+            "ad_format": rng.choice(FORMATS),
+            "keywords": rng.sample(VOCABULARY, 2) if i % 4 else [],
+            "genders": ["FEMALE"] if i % 7 == 0 else None,
+        }
+        for i in range(args.ads)
+    ]
+    start = time.perf_counter()
+    house = HouseAdInventory(records)
+    load = time.perf_counter() - start
+    payloads = [
+        {
+            "ad_format": rng.choice(FORMATS),
+            "context": " ".join(rng.sample(VOCABULARY, 6)),
+            "ad_recommendation": "relevant products",
+            "undesired_ads": rng.choice(VOCABULARY),
+            "user_gender": rng.choice(["MALE", "FEMALE", "UNDISCLOSED"]),
+            "num_ads": 1,
+        }
+        for _ in range(1000)
+    ]
+    failure = {"error": "503 Service Unavailable"}
+    start = time.perf_counter()
+    for i in range(args.selections):
+        house.fallback(payloads[i % len(payloads)], failure)
+    elapsed = time.perf_counter() - start
+    print(f"index build    {load * 1000:>8.2f} ms for {args.ads} ads")
+    print(f"fallback       {elapsed / args.selections * 1e6:>8.2f} us/selection")
+    print(f"stats          {house.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: cold import time of ads4gpts_langchain.
+
+Imports each module in a fresh interpreter with ``-X importtime`` and reports
+the median cumulative import time, plus which heavy dependencies got loaded.
+Exits non-zero when importing the bare package exceeds ``--threshold-ms``, so
+the script can guard against import-time regressions in CI.
+
+    PYTHONPATH=. python benchmarks/bench_import.py --runs 5 --threshold-ms 50
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = (
+    "ads4gpts_langchain",
+    "ads4gpts_langchain.tools",
+    "ads4gpts_langchain.toolkit",
+)
+HEAVY = ("langchain_core", "langgraph", "requests", "httpx", "dotenv", "numpy")
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of ``module`` in a fresh interpreter, in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    for line in reversed(result.stderr.splitlines()):
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def loaded_heavy_modules(module: str):
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threshold-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    package_ms = None
+    for module in MODULES:
+        median = statistics.median(import_time_ms(module) for _ in range(args.runs))
+        heavy = ", ".join(loaded_heavy_modules(module)) or "none"
+        print(f"{module:<28} {median:8.1f} ms  heavy deps: {heavy}")
+        if module == MODULES[0]:
+            package_ms = median
+
+    if package_ms > args.threshold_ms:
+        print(
+            f"Regression: importing {MODULES[0]} took {package_ms:.1f} ms "
+            f"(threshold {args.threshold_ms:.1f} ms)"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
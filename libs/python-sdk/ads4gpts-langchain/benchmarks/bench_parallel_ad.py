@@ -0,0 +1,73 @@
+"""
+Benchmark: end-to-end turn latency with a sequential vs a parallel ad branch.
+
+Builds the same graph with ``build_ad_graph(parallel=False)`` and
+``build_ad_graph(parallel=True)``: a fake chat model answers the user and an
+``Ads4gptsAdNode`` fetches an ad from a local stand-in ads server on every turn.
+
+    PYTHONPATH=. python benchmarks/bench_parallel_ad.py --turns 20 --llm-latency 0.3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Annotated, List, TypedDict
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import BaseMessage, HumanMessage
+from langgraph.graph.message import add_messages
+
+from ads4gpts_langchain.ad_node import Ads4gptsAdNode
+from ads4gpts_langchain.graph import AdBranch, build_ad_graph
+from ads4gpts_langchain.tests.standin import StandInAdServer
+from ads4gpts_langchain.tools import Ads4gptsAdTool
+
+
+class State(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+
+
+async def run(label, parallel, server, args):
+    llm = FakeListChatModel(
+        responses=["Marathon training needs good shoes."], sleep=args.llm_latency
+    )
+
+    async def agent_node(state):
+        return {"messages": [await llm.ainvoke(state["messages"])]}
+
+    tool = Ads4gptsAdTool(
+        ads4gpts_api_key="bench", base_url=server.url, ads_endpoint=""
+    )
+    branch = AdBranch(Ads4gptsAdNode(tool=tool, counter_key=None), budget=args.budget)
+    graph = build_ad_graph(State, agent_node, branch, parallel=parallel).compile()
+
+    latencies = []
+    for _ in range(args.turns):
+        start = time.perf_counter()
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content="Which shoes for a marathon?")]}
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"{label:<12} mean {statistics.mean(latencies):>7.1f} ms"
+        f"   p95 {p95:>7.1f} ms   ads {branch.stats}"
+    )
+    await tool.aclose()
+
+
+async def main(args):
+    with StandInAdServer(latency=args.api_latency) as server:
+        await run("sequential", False, server, args)
+        await run("parallel", True, server, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--api-latency", type=float, default=0.15)
+    parser.add_argument("--budget", type=float, default=None)
+    asyncio.run(main(parser.parse_args()))
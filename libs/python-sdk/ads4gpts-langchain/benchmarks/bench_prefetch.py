@@ -0,0 +1,111 @@
+"""
+Benchmark: ad-turn latency with and without speculative prefetch.
+
+Runs a frequency-capped LangGraph conversation with a fake agent LLM and an
+ad fetch (fake LLM hop + call to a local stand-in ads server), once with the
+ad fetched on the ad turn and once with AdPrefetcher starting it a turn early.
+
+    PYTHONPATH=. python benchmarks/bench_prefetch.py --turns 30 --frequency 3
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Annotated, List, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from ads4gpts_langchain.prefetch import AdPrefetcher
+from ads4gpts_langchain.transport import AsyncTransport
+from ads4gpts_langchain.utils import async_get_ads
+from ads4gpts_langchain.tests.standin import StandInAdServer
+
+
+class State(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+    ad_counter: int
+    ad_frequency: int
+
+
+def build_graph(args, fetch_ad, prefetcher=None):
+    async def agent_node(state):
+        await asyncio.sleep(args.agent_latency)
+        return {
+            "messages": [AIMessage(content="answer")],
+            "ad_counter": state.get("ad_counter", 0) + 1,
+        }
+
+    def agent_edge(state):
+        if state["ad_counter"] < state.get("ad_frequency", 1):
+            return END
+        return "ad_node"
+
+    workflow = StateGraph(State)
+    workflow.add_node("agent_node", agent_node)
+    workflow.add_edge(START, "agent_node")
+    if prefetcher is None:
+        workflow.add_node("ad_node", fetch_ad)
+        workflow.add_conditional_edges("agent_node", agent_edge)
+    else:
+        workflow.add_node("prefetch_node", prefetcher.prefetch_node)
+        workflow.add_node("ad_node", prefetcher.ad_node)
+        workflow.add_edge("agent_node", "prefetch_node")
+        workflow.add_conditional_edges("prefetch_node", agent_edge)
+    workflow.add_edge("ad_node", END)
+    return workflow.compile(checkpointer=MemorySaver())
+
+
+async def run(label, graph, args):
+    config = {"configurable": {"thread_id": label}}
+    ad_turns, other_turns = [], []
+    for _ in range(args.turns):
+        start = time.perf_counter()
+        state = await graph.ainvoke(
+            {"messages": [HumanMessage(content="hi")], "ad_frequency": args.frequency},
+            config,
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        is_ad_turn = state["messages"][-1].content.startswith("ad")
+        (ad_turns if is_ad_turn else other_turns).append(elapsed)
+        # User think time between turns.
+        await asyncio.sleep(args.think_time)
+    print(
+        f"{label:<12} ad turn {sum(ad_turns) / len(ad_turns):>7.1f} ms"
+        f"   other turns {sum(other_turns) / len(other_turns):>7.1f} ms"
+    )
+
+
+async def main(args):
+    with StandInAdServer(latency=args.api_latency) as server:
+        async with AsyncTransport() as transport:
+
+            async def fetch_ad(state):
+                # Stands in for the LLM hop filling in the ad request.
+                await asyncio.sleep(args.llm_latency)
+                ads = await async_get_ads(
+                    server.url,
+                    {"Authorization": "Bearer bench"},
+                    {"ad_format": "INLINE_SPONSORED_RESPONSE", "num_ads": 1},
+                    transport=transport,
+                )
+                return {"messages": [AIMessage(content=f"ad {ads}")], "ad_counter": 0}
+
+            await run("sequential", build_graph(args, fetch_ad), args)
+            prefetcher = AdPrefetcher(fetch_ad)
+            await run("prefetch", build_graph(args, fetch_ad, prefetcher), args)
+            await prefetcher.aclose()
+            print(f"prefetch stats: {prefetcher.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--frequency", type=int, default=3)
+    parser.add_argument("--agent-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    parser.add_argument("--think-time", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
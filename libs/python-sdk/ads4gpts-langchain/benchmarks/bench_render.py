@@ -0,0 +1,55 @@
+"""
+Benchmark: native ad rendering cost per ad turn.
+
+Times rendering a banner result with the template renderer, with and without
+the fragment cache, in each output. The LLM render agent it replaces costs a
+full model round trip (typically several hundred milliseconds) per ad turn.
+
+    PYTHONPATH=. python benchmarks/bench_render.py --calls 100000 --ads 3
+"""
+
+import argparse
+import time
+
+from ads4gpts_langchain.render import OUTPUTS, AdRenderer
+
+
+def make_result(num_ads):
+    return {
+        "advertiser_agents": [
+            {
+                "ad_id": f"ad-{i}",
+                "ad_creative": f"https://example.com/creative-{i}.png",
+                "ad_title": f"Marathon shoes {i}",
+                "ad_body": "Lightweight racing shoes with a carbon plate.",
+                "ad_link": f"https://example.com/shoes-{i}",
+                "ad_link_cta": "Shop now",
+            }
+            for i in range(num_ads)
+        ]
+    }
+
+
+def bench(renderer, result, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        renderer.render(result, "INLINE_BANNER")
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--ads", type=int, default=3)
+    args = parser.parse_args()
+
+    result = make_result(args.ads)
+    print(f"{'output':<10}{'uncached us':>14}{'cached us':>12}")
+    for output in OUTPUTS:
+        uncached = bench(AdRenderer(output=output, cache_size=0), result, args.calls)
+        cached = bench(AdRenderer(output=output), result, args.calls)
+        print(f"{output:<10}{uncached:>14.2f}{cached:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: SemanticAdCache lookup latency at 100k entries.
+
+Fills the index with synthetic requests and measures single and batched
+nearest-neighbour lookups. Requires numpy.
+
+    PYTHONPATH=. python benchmarks/bench_semantic_cache.py --entries 100000
+"""
+
+import argparse
+import random
+import time
+
+from ads4gpts_langchain.semantic_cache import SemanticAdCache
+
+_vocabulary = random.Random(1)
+# Synthetic vocabulary so stored contexts are about as diverse as real traffic.
+WORDS = [
+    "".join(
+        _vocabulary.choices("abcdefghijklmnopqrstuvwxyz", k=_vocabulary.randint(4, 9))
+    )
+    for _ in range(5000)
+]
+FORMATS = ("INLINE_SPONSORED_RESPONSE", "INLINE_BANNER", "SUGGESTED_PROMPT")
+
+
+def random_payload(rng):
+    return {
+        "ad_format": rng.choice(FORMATS),
+        "user_gender": "UNDISCLOSED",
+        "user_age_range": "25-34",
+        "num_ads": 1,
+        "context": "The user is asking about " + " ".join(rng.sample(WORDS, 8)),
+        "ad_recommendation": " ".join(rng.sample(WORDS, 4)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cache = SemanticAdCache(max_entries=args.entries)
+    result = {"advertiser_agents": [{"ad_id": "ad-1"}]}
+    stored = [random_payload(rng) for _ in range(args.entries)]
+    start = time.perf_counter()
+    for payload in stored:
+        cache.set(payload, result)
+    print(f"insert: {(time.perf_counter() - start) / args.entries * 1e6:.1f} us/entry")
+
+    queries = [
+        dict(payload, context=payload["context"] + " please")
+        for payload in rng.sample(stored, args.queries // 2)
+    ] + [random_payload(rng) for _ in range(args.queries // 2)]
+
+    signatures = cache.signatures(queries)
+    partitions = [cache._partition(query) for query in queries]
+    now = time.monotonic()
+    start = time.perf_counter()
+    for signature, partition in zip(signatures, partitions):
+        cache._search(signature, partition, now)
+    search = (time.perf_counter() - start) / len(queries)
+    print(f"index search only: {search * 1e3:.3f} ms/query")
+
+    start = time.perf_counter()
+    for query in queries:
+        cache.get(query)
+    single = (time.perf_counter() - start) / len(queries)
+    print(f"get (vectorize + search): {single * 1e3:.3f} ms/query")
+
+    start = time.perf_counter()
+    for offset in range(0, len(queries), args.batch):
+        cache.get_many(queries[offset : offset + args.batch])
+    batched = (time.perf_counter() - start) / len(queries)
+    print(f"get_many batch={args.batch}: {batched * 1e3:.3f} ms/query")
+    print(f"stats: {cache.stats}")
+
+
+if __name__ == "__main__":
+    main()
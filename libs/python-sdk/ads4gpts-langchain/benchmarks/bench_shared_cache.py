@@ -0,0 +1,110 @@
+"""
+Benchmark: ad API calls and lookup latency of worker processes sharing an ad cache.
+
+Forks worker processes that each run an ``AdCache`` over the same Zipf-distributed
+stream of requests against a stubbed API, with only a process-local cache and
+with an mmap, SQLite and stand-in Redis backend shared between them.
+
+    PYTHONPATH=. python benchmarks/bench_shared_cache.py --workers 4 --requests 5000 --keys 500
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ads4gpts_langchain.cache import AdCache
+from ads4gpts_langchain.cache_backends import (
+    MmapCacheBackend,
+    RedisCacheBackend,
+    SQLiteCacheBackend,
+)
+from ads4gpts_langchain.tests.standin import StandInRedisServer
+
+
+def make_backend(kind, location):
+    if kind == "mmap":
+        return MmapCacheBackend(location, slots=8192)
+    if kind == "sqlite":
+        return SQLiteCacheBackend(location)
+    if kind == "redis":
+        return RedisCacheBackend(location)
+    return None
+
+
+def worker(kind, location, seed, args, results):
+    backend = make_backend(kind, location)
+    cache = AdCache(ttl=300.0, max_entries=args.local_entries, backend=backend)
+    rng = np.random.default_rng(seed)
+    keys = rng.zipf(args.zipf, args.requests) % args.keys
+    calls = 0
+    latencies = []
+
+    def fetch():
+        nonlocal calls
+        calls += 1
+        time.sleep(args.api_ms / 1000)
+        return {"advertiser_agents": [{"ad_id": f"ad-{key}", "ad_title": "Ad"}]}
+
+    for key in keys:
+        payload = {"ad_format": "INLINE_SPONSORED_RESPONSE", "context": f"ctx-{key}"}
+        before = calls
+        start = time.perf_counter()
+        cache.get_or_fetch(payload, fetch)
+        # Lookup latency of cache hits, local or shared.
+        if calls == before:
+            latencies.append(time.perf_counter() - start)
+    if backend is not None:
+        backend.close()
+    results.put((calls, latencies))
+
+
+def run(kind, location, args):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(kind, location, seed, args, results))
+        for seed in range(args.workers)
+    ]
+    for proc in procs:
+        proc.start()
+    outcomes = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    calls = sum(calls for calls, _ in outcomes)
+    latencies = np.array([lat for _, lats in outcomes for lat in lats]) * 1e6
+    p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+    return calls, p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--zipf", type=float, default=1.2)
+    parser.add_argument("--local-entries", type=int, default=128)
+    parser.add_argument("--api-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    total = args.workers * args.requests
+    with tempfile.TemporaryDirectory() as tmp, StandInRedisServer() as redis:
+        locations = {
+            "local": None,
+            "mmap": os.path.join(tmp, "cache.shm"),
+            "sqlite": os.path.join(tmp, "cache.db"),
+            "redis": redis.url,
+        }
+        for kind, location in locations.items():
+            calls, p50, p99 = run(kind, location, args)
+            print(
+                f"{kind:<7} api calls {calls:>6} / {total}   "
+                f"lookup p50 {p50:>7.1f} us   p99 {p99:>7.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
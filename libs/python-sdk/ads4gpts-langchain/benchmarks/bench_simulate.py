@@ -0,0 +1,66 @@
+"""
+Benchmark: throughput of the offline frequency simulator.
+
+Generates a synthetic JSONL log of conversations with random turn counts and
+think times in memory, then replays it with an engine policy and with an
+``agent_edge`` style frequency function.
+
+    PYTHONPATH=. python benchmarks/bench_simulate.py --turns 1000000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from ads4gpts_langchain.frequency import DailyCap, FibonacciBackoff
+from ads4gpts_langchain.simulate import (
+    engine_decider,
+    frequency_function_decider,
+    simulate,
+)
+
+
+def next_fibonacci_number(n):
+    a, b = 0, 1
+    while b <= n:
+        a, b = b, a + b
+    return b
+
+
+def make_log(turns, seed=0):
+    rng = random.Random(seed)
+    records, conversation, now = [], 0, 0.0
+    while len(records) < turns:
+        conversation += 1
+        for _ in range(rng.randint(1, 40)):
+            now += rng.expovariate(50)
+            records.append(
+                json.dumps({"conversation_id": f"c{conversation}", "timestamp": now})
+            )
+    return records[:turns]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    log = make_log(args.turns)
+    deciders = {
+        "engine": lambda: engine_decider([FibonacciBackoff(max_gap=13), DailyCap(20)]),
+        "function": lambda: frequency_function_decider(next_fibonacci_number),
+    }
+    for label, decider in deciders.items():
+        start = time.perf_counter()
+        report = simulate(log, decider())
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:<10} {args.turns / elapsed / 1e6:>6.2f} M turns/s"
+            f"   ad density {report['ad_density']:.3f}"
+            f"   calls/conversation {report['calls_per_conversation']['mean']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: pre-chat ad latency with and without stale-while-revalidate.
+
+Loads suggested prompts for a rotating set of page contexts through the sync
+tool against a local stand-in ads server, once calling the API every time,
+once behind a short-TTL AdCache and once behind a StaleAdCache.
+
+    PYTHONPATH=. python benchmarks/bench_stale.py --loads 300 --contexts 10 --api-latency 0.05
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ads4gpts_langchain.cache import AdCache
+from ads4gpts_langchain.stale import StaleAdCache
+from ads4gpts_langchain.tests.standin import StandInAdServer
+from ads4gpts_langchain.tools import Ads4gptsSuggestedPromptTool
+
+
+def run(label, server, args, **tool_kwargs):
+    tool = Ads4gptsSuggestedPromptTool(
+        ads4gpts_api_key="bench", base_url=server.url, **tool_kwargs
+    )
+    upstream = len(server.requests)
+    latencies = []
+    for i in range(args.loads):
+        start = time.perf_counter()
+        tool._run(
+            tid="aadc300e-6957-480a-9685-7628446fc319",
+            ad_recommendation="productivity apps",
+            undesired_ads="none",
+            context=f"landing page {i % args.contexts}",
+            tool_call_id=f"call-{i}",
+        )
+        latencies.append(time.perf_counter() - start)
+        time.sleep(args.think_time)
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    print(
+        f"{label:<22} p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms"
+        f"   upstream requests {len(server.requests) - upstream}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--loads", type=int, default=300)
+    parser.add_argument("--contexts", type=int, default=10)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    parser.add_argument("--think-time", type=float, default=0.002)
+    parser.add_argument("--ttl", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with StandInAdServer(latency=args.api_latency) as server:
+        run("no cache", server, args)
+        run("AdCache", server, args, cache=AdCache(ttl=args.ttl))
+        stale = StaleAdCache(refresh_after=args.ttl)
+        run("StaleAdCache", server, args, stale_cache=stale)
+        print(f"{'':<22} {stale.stats}")
+        stale.close()
+
+
+if __name__ == "__main__":
+    main()
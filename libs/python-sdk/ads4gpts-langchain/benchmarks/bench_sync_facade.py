@@ -0,0 +1,118 @@
+"""
+Benchmark: throughput of many threads calling the sync tool, per transport mode.
+
+Runs ``_run`` from a thread pool against a local stand-in ads server, in a
+separate process so it does not compete for the GIL, with a new
+``requests.Session`` per call, with the pooled ``SyncTransport`` and with the
+calls sent to a ``BackgroundLoop`` sharing one pooled async client.
+
+    PYTHONPATH=. python benchmarks/bench_sync_facade.py --threads 64 --calls 2000 --latency 0.005
+"""
+
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ads4gpts_langchain.tests.standin import StandInAdServer
+from ads4gpts_langchain.tools import Ads4gptsInlineBannerTool
+from ads4gpts_langchain.transport import AsyncTransport, BackgroundLoop, SyncTransport
+
+KWARGS = dict(
+    tid="aadc300e-6957-480a-9685-7628446fc319",
+    ad_recommendation="running shoes",
+    undesired_ads="none",
+    context="Looking for running shoes",
+    tool_call_id="call-1",
+)
+
+
+class PerCallSessionTransport(SyncTransport):
+    """A new ``requests.Session`` and connection for every call."""
+
+    def post(self, url, json, headers, timeout):
+        import requests
+
+        with requests.Session() as session:
+            return session.post(url, json=json, headers=headers, timeout=timeout)
+
+
+def serve(latency, commands, replies):
+    with StandInAdServer(latency=latency) as server:
+        replies.put(server.url)
+        # Each command asks for the number of connections opened so far.
+        while commands.get() is not None:
+            replies.put(server.connections)
+
+
+def connections(commands, replies):
+    commands.put("connections")
+    return replies.get()
+
+
+def run(label, server, args, **tool_kwargs):
+    url, commands, replies = server
+    tool = Ads4gptsInlineBannerTool(
+        ads4gpts_api_key="bench", base_url=url, **tool_kwargs
+    )
+    opened = connections(commands, replies)
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(lambda _: tool._run(**KWARGS), range(args.threads)))
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: tool._run(**KWARGS), range(args.calls)))
+        elapsed = time.perf_counter() - start
+    errors = sum("error" in result for result in results)
+    opened = connections(commands, replies) - opened
+    print(
+        f"{label:<26} {args.calls / elapsed:>8.1f} calls/s"
+        f"   connections opened {opened:>5}   errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--async-connections", type=int, default=8)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    commands, replies = ctx.Queue(), ctx.Queue()
+    process = ctx.Process(
+        target=serve, args=(args.latency, commands, replies), daemon=True
+    )
+    process.start()
+    server = (replies.get(), commands, replies)
+    try:
+        run(
+            "requests.Session per call",
+            server,
+            args,
+            transport=PerCallSessionTransport(),
+        )
+        with SyncTransport(pool_maxsize=args.threads) as transport:
+            run("pooled SyncTransport", server, args, transport=transport)
+        background = BackgroundLoop()
+        # Sync threads only wait on the loop, so a few pooled connections carry
+        # them; the httpx pool gets slower with every connection it holds.
+        async_transport = AsyncTransport(
+            max_connections=args.async_connections,
+            max_keepalive_connections=args.async_connections,
+        )
+        run(
+            "BackgroundLoop + httpx",
+            server,
+            args,
+            background_loop=background,
+            async_transport=async_transport,
+        )
+        background.run(async_transport.aclose())
+        background.close()
+    finally:
+        commands.put(None)
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: prompt tokens spent on binding the toolkit's tool schemas.
+
+Serializes the tools the way chat models receive them (OpenAI function
+schemas) for the default one-tool-per-format toolkit and for the multiplexed
+single tool, and counts their tokens with tiktoken. When the tiktoken encoding
+cannot be loaded (e.g. offline), a 4 characters per token estimate is used.
+
+    PYTHONPATH=. python benchmarks/bench_tool_tokens.py --encoding o200k_base
+"""
+
+import argparse
+import json
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from ads4gpts_langchain.toolkit import Ads4gptsToolkit
+
+
+def token_counter(encoding_name: str):
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(encoding_name)
+        return (lambda text: len(encoding.encode(text))), encoding_name
+    except Exception as err:
+        print(f"tiktoken encoding unavailable ({type(err).__name__}), estimating")
+        return (lambda text: round(len(text) / 4)), "~4 chars/token"
+
+
+def schema_text(toolkit: Ads4gptsToolkit) -> str:
+    return json.dumps([convert_to_openai_tool(tool) for tool in toolkit.get_tools()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--encoding", default="o200k_base")
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+
+    count, label = token_counter(args.encoding)
+    per_format = count(schema_text(Ads4gptsToolkit(ads4gpts_api_key="bench")))
+    multiplexed = count(
+        schema_text(Ads4gptsToolkit(ads4gpts_api_key="bench", multiplexed=True))
+    )
+    print(f"tokens ({label})")
+    print(f"per-format tools  {per_format:6d}")
+    print(f"multiplexed tool  {multiplexed:6d}")
+    print(
+        f"saved per LLM call {per_format - multiplexed:5d} "
+        f"({1 - multiplexed / per_format:.0%}), "
+        f"{(per_format - multiplexed) * args.turns} over {args.turns} turns"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: per-call requests.Session vs the pooled SyncTransport.
+
+Runs concurrent get_ads calls against a local stand-in ads server and reports
+requests per second and p99 latency for both transports.
+
+    PYTHONPATH=. python benchmarks/bench_transport.py --requests 2000 --threads 16
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ads4gpts_langchain.transport import SyncTransport
+from ads4gpts_langchain.utils import get_ads
+from ads4gpts_langchain.tests.standin import StandInAdServer
+
+PAYLOAD = {"ad_format": "INLINE_SPONSORED_RESPONSE", "num_ads": 1}
+HEADERS = {"Authorization": "Bearer bench"}
+
+
+def per_call_session(url):
+    # Mirrors the previous behaviour: a fresh session and adapter per ad fetch.
+    with SyncTransport() as transport:
+        return get_ads(url, HEADERS, PAYLOAD, transport=transport)
+
+
+def run(label, server, call, num_requests, threads):
+    latencies = []
+    connections = server.connections
+
+    def timed(_):
+        start = time.perf_counter()
+        result = call()
+        latencies.append(time.perf_counter() - start)
+        assert "advertiser_agents" in result, result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(timed, range(num_requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(
+        f"{label:<18} {num_requests / elapsed:>9.1f} req/s"
+        f"   p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms"
+        f"   connections {server.connections - connections}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    with StandInAdServer() as server:
+        run(
+            "per-call session",
+            server,
+            lambda: per_call_session(server.url),
+            args.requests,
+            args.threads,
+        )
+        with SyncTransport(pool_maxsize=args.threads) as transport:
+            run(
+                "pooled transport",
+                server,
+                lambda: get_ads(server.url, HEADERS, PAYLOAD, transport=transport),
+                args.requests,
+                args.threads,
+            )
+
+
+if __name__ == "__main__":
+    main()
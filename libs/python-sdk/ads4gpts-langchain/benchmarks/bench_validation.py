@@ -0,0 +1,67 @@
+"""
+Benchmark: per-call input validation overhead of a tool invocation.
+
+Compares the previous path (LangChain validates against ``args_schema``, then
+``_run`` validates the result again and copies it through ``model_dump`` and
+``pop``) with the single-pass path ``_parse_input`` -> ``_validate`` ->
+``model_dump(exclude=...)``, and reports the CPU share at a target call rate.
+
+    PYTHONPATH=. python benchmarks/bench_validation.py --calls 100000 --rate 100000
+"""
+
+import argparse
+import time
+
+from langchain_core.tools import BaseTool
+
+from ads4gpts_langchain.tools import _PAYLOAD_EXCLUDE, Ads4gptsInlineBannerTool
+
+ARGS = {
+    "tid": "aadc300e-6957-480a-9685-7628446fc319",
+    "user_gender": "FEMALE",
+    "user_age_range": "25-34",
+    "ad_recommendation": "running shoes and sports gear",
+    "undesired_ads": "gambling",
+    "context": "The user is asking about running shoes for marathon training",
+}
+
+
+def two_pass(tool):
+    kwargs = BaseTool._parse_input(tool, dict(ARGS), "call_1")
+    payload = tool.args_schema(**kwargs).model_dump()
+    payload.pop("tool_call_id", None)
+    return payload
+
+
+def single_pass(tool):
+    kwargs = tool._parse_input(dict(ARGS), "call_1")
+    return tool._validate(kwargs).model_dump(exclude=_PAYLOAD_EXCLUDE)
+
+
+def measure(fn, tool, calls: int) -> float:
+    for _ in range(1000):
+        fn(tool)
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn(tool)
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--rate", type=float, default=100_000)
+    args = parser.parse_args()
+
+    tool = Ads4gptsInlineBannerTool(ads4gpts_api_key="bench")
+    assert two_pass(tool) == single_pass(tool)
+    for label, fn in (("two-pass", two_pass), ("single-pass", single_pass)):
+        per_call = measure(fn, tool, args.calls)
+        print(
+            f"{label:<12} {per_call * 1e6:7.2f} us/call  "
+            f"{per_call * args.rate:5.2f} cores at {args.rate:,.0f} calls/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
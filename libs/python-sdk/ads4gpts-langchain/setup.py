@@ -23,16 +23,36 @@ dependencies = tool_poetry.get("dependencies", {})
 
 
 # Process dependencies
+def requirement(pkg, ver):
+    if isinstance(ver, dict):
+        ver = ver.get("version", "*")
+    return f"{pkg}{ver if ver != '*' else ''}"
+
+
+def is_optional(ver):
+    return isinstance(ver, dict) and ver.get("optional", False)
+
+
 install_requires = [
-    f"{pkg}{ver if ver != '*' else ''}"
+    requirement(pkg, ver)
     for pkg, ver in dependencies.items()
-    if pkg != "python"
+    if pkg != "python" and not is_optional(ver)
 ]
 
+# Optional dependencies are installed through extras, e.g. `pip install .[semantic]`
+extras_require = {
+    extra: [requirement(pkg, dependencies[pkg]) for pkg in pkgs]
+    for extra, pkgs in tool_poetry.get("extras", {}).items()
+}
+
 # Adjust version specifiers to comply with PEP 440
 install_requires = [
     dep.replace("^", ">=") if "^" in dep else dep for dep in install_requires
 ]
+extras_require = {
+    extra: [dep.replace("^", ">=") if "^" in dep else dep for dep in deps]
+    for extra, deps in extras_require.items()
+}
 
 # Process python_requires
 python_version = dependencies.get("python", "")
@@ -60,5 +80,6 @@ setup(
     keywords=keywords,
     packages=find_packages(where="."),
     install_requires=install_requires,
+    extras_require=extras_require,
     python_requires=python_requires,
 )